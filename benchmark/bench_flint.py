@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the lines per second and the peak memory of every check and
+formatter and of complete `flint.py` runs on synthetic corpora.
+
+The corpus is generated by `corpus.py` with a fixed seed, so the numbers
+of different releases can be compared.
+
+Usage: python3 benchmark/bench_flint.py [--size SIZE] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARK_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import corpus
+from check.abstract_check import run_checks
+from file_io import CodeFile
+from flint import ALL_CHECKS, ALL_FORMATTERS
+
+
+def _measure(func, repeat: int = 1):
+    """
+    Run `func` once with tracing of allocations for the peak memory and
+    `repeat` times without it for the fastest wall time.
+
+    :returns: tuple of the seconds and the peak memory in bytes
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, peak
+
+
+def bench_rules(paths: list, repeat: int):
+    """
+    Time reading with the shared preprocessing, every check and every
+    formatter on its own over all `paths`.
+
+    :returns: list of result dicts
+    """
+    # Importing the rules registers their line patterns, load them before
+    # the first file is classified as `flint.py` does.
+    checks = sorted(ALL_CHECKS.items())
+    formatters = sorted(ALL_FORMATTERS.items())
+
+    def prepare(path):
+        code = CodeFile(path)
+        code.scope_tree()
+        return code
+
+    def preprocessing():
+        for path in paths:
+            prepare(path)
+
+    # Rules work with the shared classification, that is measured on its
+    # own above.
+    codes = [prepare(path) for path in paths]
+    lines = sum(code.line_count() for code in codes)
+
+    def check(check_class):
+        def run():
+            for code in codes:
+                for _ in run_checks(code, [check_class]):
+                    pass
+        return run
+
+    def format_code(formatter_class):
+        def run():
+            for code in codes:
+                # The edits are not applied, the code stays unchanged for
+                # the next run.
+                formatter_class(code).format()
+        return run
+
+    benchmarks = [("preprocessing", preprocessing)]
+    benchmarks += [("check " + name, check(check_class))
+                   for name, check_class in checks]
+    benchmarks += [("format " + name, format_code(formatter_class))
+                   for name, formatter_class in formatters]
+
+    results = []
+    for name, func in benchmarks:
+        seconds, peak = _measure(func, repeat)
+        results.append({"name": name, "lines": lines, "seconds": seconds,
+                        "peak_memory": peak})
+    return results
+
+
+def _run_flint(arguments: list):
+    """
+    Run `flint.py` in a new process.
+
+    :returns: tuple of the seconds and the peak resident memory in bytes
+              or `None` if it is not known
+    """
+    command = [sys.executable, os.path.join(SRC_DIR, "flint.py")] + arguments
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+
+    if not hasattr(os, "wait4"):
+        # Not available on Windows, the peak memory is not reported.
+        process.wait()
+        return time.perf_counter() - start, None
+
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = status
+    # Linux reports kilobytes, macOS bytes.
+    factor = 1 if sys.platform == "darwin" else 1024
+    return elapsed, usage.ru_maxrss * factor
+
+
+def bench_end_to_end(paths: list):
+    """
+    Time complete single process `check` and `format --check` runs.
+
+    :returns: list of result dicts
+    """
+    lines = 0
+    for path in paths:
+        with open(path, "rb") as fortran_file:
+            lines += fortran_file.read().count(b"\n")
+
+    results = []
+    for name, arguments in [("flint check", ["check", "-j", "1"]),
+                            ("flint format", ["format", "--check",
+                                              "-j", "1"])]:
+        seconds, peak = _run_flint(arguments + paths)
+        results.append({"name": name, "lines": lines, "seconds": seconds,
+                        "peak_memory": peak})
+    return results
+
+
+def _print_results(kind: str, results: list):
+    print(kind)
+    for result in results:
+        peak = result["peak_memory"]
+        print("  {:<32} {:>12.0f} lines/s {:>10}".format(
+            result["name"], result["lines"] / result["seconds"],
+            "-" if peak is None else "{:.1f} MB".format(peak / 2**20)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size", choices=sorted(corpus.SIZES),
+                        default="small",
+                        help="Number of lines of every corpus kind.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the corpus generator.")
+    parser.add_argument("--kinds", type=str,
+                        help="Comma separated corpus kinds to run, "
+                        "defaults to all.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of timed runs per rule, the fastest "
+                        "one counts.")
+    parser.add_argument("--no-end-to-end", action="store_true",
+                        help="Only time the single rules.")
+    parser.add_argument("--json", type=str,
+                        help="File to write all results to as JSON.")
+    args = parser.parse_args()
+
+    generated = corpus.generate(corpus.SIZES[args.size], args.seed)
+    if args.kinds:
+        generated = {kind: generated[kind] for kind in args.kinds.split(",")}
+
+    report = {"size": args.size, "seed": args.seed, "kinds": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = corpus.write_corpus(directory, generated)
+        # The generated lines are not needed anymore.
+        del generated
+
+        for kind in sorted(paths):
+            results = bench_rules(paths[kind], args.repeat)
+            if not args.no_end_to_end:
+                results += bench_end_to_end(paths[kind])
+            _print_results(kind, results)
+            report["kinds"][kind] = results
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the lines per second of matching every line pattern with its own
+`re.match` call against the combined `LINE_MATCHER` engine.
+
+Usage: python3 benchmark/bench_matcher.py [number of lines]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Importing the rules registers their patterns in the engine.
+import check.check_format_label as format_label
+import check.check_implicit_none as implicit_none
+import format.format_align_colon as align_colon
+from common_matcher import LINE_MATCHER, match_begin_block, match_end_block,\
+                           match_blank_line, match_commented_line,\
+                           match_ignore_single, match_ignore_start,\
+                           match_ignore_end
+
+UNIT = [
+    "subroutine compute_{0}(n, x)\n",
+    "  implicit none\n",
+    "  integer, intent(in) :: n ! number of values\n",
+    "  real(8), dimension(n), intent(inout) :: x\n",
+    "  integer :: i\n",
+    "\n",
+    "  ! scale all values\n",
+    "  do i = 1, n\n",
+    "    x(i) = 2.0d0 * x(i) + 1.0d0\n",
+    "  end do\n",
+    "  write(*, 100) n\n",
+    "100 format('n = ', i8)\n",
+    "end subroutine compute_{0}\n",
+    "\n",
+]
+
+
+def synthetic_lines(count: int):
+    """Return `count` lines of repeated, realistic looking subroutines."""
+    lines = []
+    unit = 0
+    while len(lines) < count:
+        lines.extend(line.format(unit) for line in UNIT)
+        unit += 1
+    return lines[:count]
+
+
+def chained(line):
+    """Match every pattern on its own, as the rules did before."""
+    return (match_begin_block(line), match_end_block(line),
+            match_blank_line(line), match_commented_line(line),
+            match_ignore_single(line), match_ignore_start(line),
+            match_ignore_end(line),
+            implicit_none._match_implicit(line),
+            format_label._match_format_label(line),
+            format_label._match_print_label(line),
+            format_label._match_write_label(line),
+            align_colon._match_variable_colon(line))
+
+
+def measure(name: str, func, lines: list):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:>12.0f} lines/s".format(name, len(lines) / elapsed))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    lines = synthetic_lines(count)
+    print("Matching {} lines with {} patterns".format(
+        count, len(LINE_MATCHER.names())))
+
+    measure("chained", chained, lines)
+    measure("engine", LINE_MATCHER.match, lines)
+
+
+if __name__ == "__main__":
+    main()
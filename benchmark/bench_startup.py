@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the startup time of short `flint.py` runs in new interpreters.
+
+Short runs, like pre-commit hooks on a single file or listing the rules,
+are dominated by importing the modules. Every command runs `--repeat`
+times and the fastest run counts.
+
+Usage: python3 benchmark/bench_startup.py [--repeat N] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARK_DIR, "..", "src")
+FLINT = os.path.join(SRC_DIR, "flint.py")
+
+# Prints the seconds to import `flint` and the number of loaded modules.
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {!r})
+start = time.perf_counter()
+import flint
+print(time.perf_counter() - start, len(sys.modules))
+"""
+
+SOURCE = """program startup
+  implicit none
+  integer :: i ! counter
+  real(8) :: x ! value
+  x = 1.0d0
+end program startup
+"""
+
+
+def _fastest(command: list, repeat: int):
+    """Return the seconds of the fastest of `repeat` runs of `command`."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_import(repeat: int):
+    """
+    Time importing `flint` without the interpreter startup.
+
+    :returns: tuple of the seconds and the number of loaded modules
+    """
+    best = None
+    modules = 0
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(SRC_DIR)])
+        seconds, modules = output.split()
+        seconds = float(seconds)
+        best = seconds if best is None else min(best, seconds)
+    return best, int(modules)
+
+
+def bench_commands(path: str, repeat: int):
+    """
+    Time complete short runs including the interpreter startup.
+
+    :returns: list of result dicts
+    """
+    commands = [
+        ("python startup", [sys.executable, "-c", "pass"]),
+        ("list checks", [sys.executable, FLINT, "check", "--list-checks"]),
+        ("check one rule", [sys.executable, FLINT, "check", "-j", "1",
+                            "-c", "implicit-none", path]),
+        ("check all rules", [sys.executable, FLINT, "check", "-j", "1",
+                             path]),
+        ("format --check", [sys.executable, FLINT, "format", "--check",
+                            "-j", "1", path]),
+    ]
+    return [{"name": name, "seconds": _fastest(command, repeat)}
+            for name, command in commands]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Number of runs per command, the fastest one "
+                        "counts.")
+    parser.add_argument("--json", type=str,
+                        help="File to write all results to as JSON.")
+    args = parser.parse_args()
+
+    seconds, modules = bench_import(args.repeat)
+    print("  {:<32} {:>8.1f} ms {:>6} modules".format(
+        "import flint", seconds * 1000, modules))
+    report = {"import": {"seconds": seconds, "modules": modules}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.f90")
+        with open(path, "w") as fortran_file:
+            fortran_file.write(SOURCE)
+        report["commands"] = bench_commands(path, args.repeat)
+
+    for result in report["commands"]:
+        print("  {:<32} {:>8.1f} ms".format(result["name"],
+                                            result["seconds"] * 1000))
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generate reproducible synthetic fortran corpora for the benchmarks.
+
+Every corpus is a list of `(name, lines)` tuples. The same seed and size
+always produce the same files, so results of different releases can be
+compared.
+
+Usage: python3 benchmark/corpus.py DIRECTORY [--size SIZE] [--seed SEED]
+"""
+
+import argparse
+import os
+import random
+
+TYPES = ["integer", "integer(8)", "real(8)", "real", "logical",
+         "character(len=32)", "complex(8)"]
+ATTRIBUTES = ["", ", intent(in)", ", intent(inout)", ", dimension(:)",
+              ", allocatable, dimension(:,:)", ", parameter", ", save"]
+STATEMENTS = [
+    "x = x + {0}\n",
+    "call compute_{0}(n, x)\n",
+    "if (n > {0}) then\n",
+    "end if\n",
+    "do i = 1, {0}\n",
+    "end do\n",
+    "write(*, *) 'value: ', x, ' ! not a comment'\n",
+    "print *, n, {0}\n",
+    "y = sqrt(real(x, 8)) * {0}.0d0 ! trailing comment\n",
+]
+
+# Lines of every corpus kind for the size presets.
+SIZES = {
+    "tiny": 2000,
+    "small": 50000,
+    "medium": 500000,
+    "large": 2000000,
+}
+
+
+def _declarations(rng: random.Random, count: int, indent: str):
+    lines = []
+    for i in range(count):
+        line = "{}{}{} :: var_{}".format(indent, rng.choice(TYPES),
+                                         rng.choice(ATTRIBUTES), i)
+        if rng.random() < 0.3:
+            line += " ! declaration {}".format(i)
+        lines.append(line + "\n")
+    return lines
+
+
+def _statements(rng: random.Random, count: int, indent: str):
+    return [indent + rng.choice(STATEMENTS).format(rng.randint(1, 999))
+            for _ in range(count)]
+
+
+def _subroutine(rng: random.Random, name: str, body: int, indent: str = ""):
+    inner = indent + "  "
+    lines = ["{}subroutine {}(n, x)\n".format(indent, name),
+             inner + "implicit none\n"]
+    lines += _declarations(rng, rng.randint(2, 8), inner)
+    lines.append("\n")
+    lines += _statements(rng, body, inner)
+    if rng.random() < 0.3:
+        label = rng.randint(100, 999)
+        lines.append("{}write(*, {}) n\n".format(inner, label))
+        lines.append("{} format('n = ', i8)\n".format(label))
+    lines.append("{}end subroutine {}\n".format(indent, name))
+    lines.append("\n")
+    return lines
+
+
+def module(rng: random.Random, name: str, lines: int):
+    """Return a module with subroutines of roughly `lines` lines."""
+    result = ["module {}\n".format(name), "  implicit none\n"]
+    result += _declarations(rng, 5, "  ")
+    result.append("contains\n")
+    unit = 0
+    while len(result) < lines:
+        result += _subroutine(rng, "{}_sub_{}".format(name, unit),
+                              rng.randint(5, 40), "  ")
+        unit += 1
+    result.append("end module {}\n".format(name))
+    return result
+
+
+def nested(rng: random.Random, name: str, lines: int, depth: int = 12):
+    """Return program units nested `depth` levels deep, repeated."""
+    result = []
+    unit = 0
+    while len(result) < lines:
+        for level in range(depth):
+            indent = "  " * level
+            result.append("{}subroutine {}_{}_{}()\n".format(
+                indent, name, unit, level))
+            if rng.random() < 0.8:
+                result.append(indent + "  implicit none\n")
+            result += _statements(rng, 3, indent + "  ")
+            result.append(indent + "contains\n")
+        for level in reversed(range(depth)):
+            result.append("{}end subroutine {}_{}_{}\n".format(
+                "  " * level, name, unit, level))
+        unit += 1
+    return result
+
+
+def declarations(rng: random.Random, name: str, lines: int):
+    """Return a module whose declaration blocks are thousands long."""
+    result = ["module {}\n".format(name), "  implicit none\n"]
+    while len(result) < lines:
+        result += _declarations(rng, 2000, "  ")
+        result.append("\n")
+    result.append("end module {}\n".format(name))
+    return result
+
+
+def comments(rng: random.Random, name: str, lines: int):
+    """Return a program with long runs of comments and trailing comments."""
+    result = ["program {}\n".format(name), "  implicit none\n"]
+    while len(result) < lines:
+        for i in range(500):
+            if rng.random() < 0.5:
+                result.append("  ! comment line {}\n".format(i))
+            else:
+                result.append("  x = {} {}! trailing {}\n".format(
+                    i, " " * rng.randint(0, 20), i))
+        result.append("  call flush()\n")
+    result.append("end program {}\n".format(name))
+    return result
+
+
+def generate(size: int, seed: int = 0):
+    """
+    Return the corpus kinds, each with about `size` lines in total.
+
+    :returns: dict of the kind to a list of `(file name, lines)`
+    """
+    rng = random.Random(seed)
+    small_files = max(1, size // 200)
+    huge_files = 2
+    return {
+        "many-small": [("small_{}.f90".format(i),
+                        module(rng, "small_{}".format(i), 200))
+                       for i in range(small_files)],
+        "few-huge": [("huge_{}.f90".format(i),
+                      module(rng, "huge_{}".format(i), size // huge_files))
+                     for i in range(huge_files)],
+        "nested": [("nested.f90", nested(rng, "nested", size))],
+        "declarations": [("declarations.f90",
+                          declarations(rng, "declarations", size))],
+        "comments": [("comments.f90", comments(rng, "comments", size))],
+    }
+
+
+def write_corpus(directory: str, corpus: dict):
+    """
+    Write every kind of `corpus` into its own sub directory.
+
+    :returns: dict of the kind to the list of written paths
+    """
+    paths = {}
+    for kind, files in corpus.items():
+        kind_directory = os.path.join(directory, kind)
+        os.makedirs(kind_directory, exist_ok=True)
+        paths[kind] = []
+        for name, lines in files:
+            path = os.path.join(kind_directory, name)
+            with open(path, "w") as fortran_file:
+                fortran_file.writelines(lines)
+            paths[kind].append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("directory", help="Directory to write the corpus to.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small",
+                        help="Number of lines of every corpus kind.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the random generator.")
+    args = parser.parse_args()
+
+    paths = write_corpus(args.directory,
+                         generate(SIZES[args.size], args.seed))
+    for kind, files in sorted(paths.items()):
+        print("{}: {} files".format(kind, len(files)))
+
+
+if __name__ == "__main__":
+    main()
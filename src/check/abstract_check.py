@@ -5,7 +5,9 @@ Define the abstract interface of all checks.
 """
 
 import abc
+from diagnostics import emit
 from file_io import FortranCode
+from tracing import tracer
 
 
 class AbstractCheck(object):
@@ -18,6 +20,8 @@ class AbstractCheck(object):
 
     def __init__(self, f_file: FortranCode):
         self._f_file = f_file
+        # `tracing.Tracer` if the check is traced, otherwise `None`.
+        self._trace = tracer(self, f_file)
 
     @classmethod
     def help(self):
@@ -28,5 +32,42 @@ class AbstractCheck(object):
         pass
 
     @abc.abstractmethod
-    def report(self):
+    def diagnostics(self):
+        """
+        Return an iterator over the `diagnostics.Diagnostic` records of
+        everything `check` found.
+        """
         pass
+
+    def report(self):
+        """Emit all diagnostics for this file."""
+        for diagnostic in self.diagnostics():
+            emit(diagnostic)
+
+
+def run_checks(f_file: FortranCode, check_classes: list, profile=None,
+               names: list = None):
+    """
+    Run the checks on `f_file` and yield their `diagnostics.Diagnostic`
+    records, one check after the other.
+
+    :profile: `profiler.FileProfile` to add the time of every check to
+    :names: names of the checks in the order of `check_classes`, they are
+            set as `rule` of the diagnostics
+    """
+    for index, check_class in enumerate(check_classes):
+        check_instance = check_class(f_file)
+        if profile is None:
+            check_instance.check()
+            diagnostics = check_instance.diagnostics()
+        else:
+            with profile.time("check " + check_class.__name__):
+                check_instance.check()
+                diagnostics = list(check_instance.diagnostics())
+
+        if names is None:
+            yield from diagnostics
+        else:
+            rule = names[index]
+            for diagnostic in diagnostics:
+                yield diagnostic._replace(rule=rule)
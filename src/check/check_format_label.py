@@ -5,19 +5,31 @@ Check for format labels and warn for all `write` statements that use
 such a format label.
 """
 
-import logging
 import re
 
 from check.abstract_check import AbstractCheck
-from common_matcher import match_line, match_begin_block, match_end_block
+from common_matcher import match_line, LINE_MATCHER
 from file_io import CodeFile
-from diagnostics import warning, note
+from diagnostics import create_diagnostic
 
 REGEX_FORMAT_LABEL = re.compile(r'^(\s*)(\w{1,5})(\s+)format(.*)$')
 REGEX_PRINT_LABEL = re.compile(r'^(\s*)print(\s+)(\w{1,5})(\s*,.*)?$')
 REGEX_WRITE_LABEL = re.compile(
     r'^(\s*)write(\s*)\([^,]+,(\s*FMT\s*\=)?\s*(\w{1,5})(\s*)\)(.*)$')
 
+LINE_MATCHER.register("format-label", REGEX_FORMAT_LABEL, ("format",))
+LINE_MATCHER.register("print-label", REGEX_PRINT_LABEL, ("print",))
+LINE_MATCHER.register("write-label", REGEX_WRITE_LABEL, ("write",))
+
+# Pattern names, their regex, the group of the label and True for the
+# definition of a label, in the order they are tried.
+_LABEL_PATTERNS = [
+    ("format-label", REGEX_FORMAT_LABEL, 2, True),
+    ("print-label", REGEX_PRINT_LABEL, 3, False),
+    ("write-label", REGEX_WRITE_LABEL, 4, False),
+]
+_ALL_LABEL_PATTERNS = frozenset(name for name, _, _, _ in _LABEL_PATTERNS)
+
 
 def _match_format_label(line):
     """
@@ -50,7 +62,6 @@ class CheckFormatLabel(AbstractCheck):
         # This mapping is done for each code block because labels might
         # be reused in other functions?!
         self._label_map = []
-        self._log = logging.getLogger(__file__ + "::format_label")
 
     @classmethod
     def help(self):
@@ -60,71 +71,72 @@ class CheckFormatLabel(AbstractCheck):
         """
         Iterate all functional blocks and analyze each of them for format
         labels and/or write statements that use a format label.
+
+        Statements are analysed as logical lines, so continued `WRITE`
+        statements and fixed-form sources are covered.
         """
-        construct_stack = []
-
-        for (i, line) in enumerate(self._f_file.insensitive_lines(), 1):
-            # Detect definiton of format label
-            if _match_format_label(line):
-                match = REGEX_FORMAT_LABEL.match(line)
-                label_number = int(match.group(2))
-
-                # self._log.debug("adding definiton at %d" % i)
-                d = _add_label_definition(construct_stack[-1]["block_info"],
-                                          label_number, i)
-                construct_stack[-1]["block_info"] = d
-                continue
-
-            # Detect uses of labels in `PRINT` statements.
-            if _match_print_label(line):
-                match = REGEX_PRINT_LABEL.match(line)
-                label_number = int(match.group(3))
-
-                # self._log.debug("adding user at %d" % i)
-                d = _add_label_user(construct_stack[-1]["block_info"],
-                                    label_number, i)
-                construct_stack[-1]["block_info"] = d
-                continue
-
-            # Detect uses of labels in `WRITE` statements.
-            if _match_write_label(line):
-                match = REGEX_WRITE_LABEL.match(line)
-                label_number = int(match.group(4))
-
-                # self._log.debug("adding user at %d" % i)
-                d = _add_label_user(construct_stack[-1]["block_info"],
-                                    label_number, i)
-                construct_stack[-1]["block_info"] = d
-                continue
-
-            # End of Construct means the same labels can be used in another
-            # block. To prevent confusion, pop the stack and work the
-            # block_info from the construct below.
-            if match_end_block(line):
-                # Append this block and all its labels to all occurences
-                # if necessary.
-                construct = construct_stack.pop()
-                self._log.debug("removing block at %d" % i)
-                if construct["block_info"]:
-                    self._log.debug("Found format labels in this section")
-                    self._label_map.append(construct["block_info"])
-                continue
-
-            if match_begin_block(line):
-                self._log.debug("adding block at %s" % i)
-                construct_stack.append({"line_start": i, "block_info": None})
-                continue
-
-        assert len(construct_stack) == 0
-
-    def report(self):
+        line_info = self._f_file.line_info()
+        logical_lines = self._f_file.logical_lines()
+        # The line patterns only match single free-form lines.
+        use_matches = not self._f_file.fixed_form()
+
+        # The same labels can be used in another block, so every block
+        # is analyzed on its own.
+        for unit in self._f_file.scope_tree().walk_post_order():
+            block_info = None
+
+            for i in unit.own_lines():
+                statement = logical_lines.starting_at(i)
+                if statement is None:
+                    continue
+                if use_matches and statement.end == i:
+                    matches = line_info[i - 1].matches
+                    if not matches:
+                        continue
+                else:
+                    matches = _ALL_LABEL_PATTERNS
+
+                # Detect the definition of a format label and its uses in
+                # `PRINT` and `WRITE` statements.
+                for name, regex, group, definition in _LABEL_PATTERNS:
+                    if name not in matches:
+                        continue
+                    match = regex.match(statement.text)
+                    if match is None:
+                        continue
+                    label = match.group(group)
+                    if not label.isdigit():
+                        # A format in a variable, like `write(6, fmt)`.
+                        break
+                    if definition:
+                        block_info = _add_label_definition(
+                            block_info, int(label), i)
+                    else:
+                        block_info = _add_label_user(
+                            block_info, int(label), i)
+                    break
+
+            if self._trace is not None:
+                self._trace.event("unit", unit=unit.name, kind=unit.kind,
+                                  line=unit.start,
+                                  labels=sorted(block_info or ()))
+            if block_info:
+                self._label_map.append(block_info)
+
+    def diagnostics(self):
         for block in self._label_map:
             for format_label, info in block.items():
-                warning(self._f_file, info["definition"],
-                        "defined format label '{}' here".format(format_label))
+                if info["definition"] == -1:
+                    # The label is used, but not defined by a `FORMAT`
+                    # statement of the unit.
+                    continue
+                yield create_diagnostic(
+                    self._f_file, info["definition"], "warning",
+                    "defined format label '{}' here".format(format_label))
 
                 for used_at in info["users"]:
-                    note(self._f_file, used_at, "used this label here")
+                    yield create_diagnostic(self._f_file, used_at, "note",
+                                            "used this label here")
 
 
 def _add_label_user(block_info, label_number, used_at):
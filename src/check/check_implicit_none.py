@@ -6,15 +6,15 @@ Check for a fortran file if all function constructs
 Fortran modules are not covered yet, because of nesting.
 """
 
-import logging
 import re
 
 from check.abstract_check import AbstractCheck
-from common_matcher import match_line, match_begin_block, match_end_block
+from common_matcher import match_line, LINE_MATCHER
 from file_io import CodeFile
-from diagnostics import warning
+from diagnostics import create_diagnostic
 
 __regex_implicit = re.compile(r'[^!]*implicit(\s+)none(.*)')
+LINE_MATCHER.register("implicit-none", __regex_implicit, ("implicit",))
 
 
 def _match_implicit(line):
@@ -37,7 +37,6 @@ class CheckImplicitNone(AbstractCheck):
 
         # List of all code locations that do not define `implicit none`.
         self._occurences = []
-        self._log = logging.getLogger(__file__ + "::implicit_none")
 
     @classmethod
     def help(self):
@@ -48,48 +47,23 @@ class CheckImplicitNone(AbstractCheck):
         Iterate all function constructs of `f_file` and check if they all
         contain a `implicit none`.
         """
-        construct_stack = []
+        line_info = self._f_file.line_info()
 
-        for (i, line) in enumerate(self._f_file.insensitive_lines(), 1):
-            # Check for the implicit none
-            if _match_implicit(line):
-                self._log.debug("found implicit none with regex")
-                self._log.debug(line)
-                assert len(construct_stack) > 0
-
-                construct_stack[-1]["implicit_none"] = True
-                continue
-
-            # Handle the code construct exit.
-            # This must be done first, because the entry would trigger
-            # given the string search.
-            if match_end_block(line):
-                self._log.debug("exiting construct")
-                self._log.debug(line)
-
-                construct = construct_stack.pop()
-                if not construct["implicit_none"]:
-                    self._occurences.append(construct["line_start"])
-                continue
-
-            # Handle the code construct entry.
-            # This is the last state change, because the coarse grain
-            # string searching would trigger on 'end function' ...
-            if match_begin_block(line):
-                self._log.debug("entering construct")
-                self._log.debug(line)
-
-                construct_stack.append({
-                    "line_start": i,
-                    "implicit_none": False
-                })
+        for unit in self._f_file.scope_tree().walk_post_order():
+            if unit.parent is None:
                 continue
 
-        assert len(construct_stack) == 0
-
-    def report(self):
-        """
-        Emit all warnings for this file.
-        """
+            # An `implicit none` in a nested unit does not count for the
+            # enclosing one.
+            found = any("implicit-none" in line_info[i - 1].matches
+                        for i in unit.own_lines())
+            if self._trace is not None:
+                self._trace.event("unit", unit=unit.name, kind=unit.kind,
+                                  line=unit.start, implicit_none=found)
+            if not found:
+                self._occurences.append(unit.start)
+
+    def diagnostics(self):
         for line_nbr in self._occurences:
-            warning(self._f_file, line_nbr, "no 'implicit none' found")
+            yield create_diagnostic(self._f_file, line_nbr, "warning",
+                                    "no 'implicit none' found")
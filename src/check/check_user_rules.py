@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Report all lines that match the declarative rules of the user, see
+`user_rules`.
+
+All rules of a scope are combined into one regular expression with a
+named group per rule. A line is scanned once per scope that has rules,
+the group of the match names a matching rule and only lines with a match
+try the other single rules, so many rules cost about as much as one.
+Rules that can not be combined, e.g. because of backreferences, are
+matched on their own.
+"""
+
+import re
+
+from check.abstract_check import AbstractCheck
+from file_io import CodeFile
+from diagnostics import create_diagnostic
+from line_classification import LINE_CODE
+from tokenizer import comment_start, mask_strings
+from user_rules import SCOPES, user_rules
+
+# Compiled `RuleSet` of the current user rules, rebuilt if they change.
+_compiled = None
+
+# Prefix of the named group of every combined rule.
+_GROUP_PREFIX = "_flint_rule"
+
+# Backreferences to numbered or named groups, that point to other groups
+# within a combined regex. An even number of backslashes before is literal.
+_regex_backreference = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?P=)")
+
+
+class RuleSet(object):
+    """The user rules compiled per scope."""
+
+    def __init__(self, rules: tuple):
+        self.rules = rules
+        # Rules of a line are reported in the order of the configuration.
+        self.order = {rule: index for index, rule in enumerate(rules)}
+        # Scope to (combined regex or `None`, list of (rule, regex) of the
+        # combined rules, list of (rule, regex) of the rules matched on
+        # their own), only for the scopes with rules.
+        self.scopes = {}
+        for scope in SCOPES:
+            scoped = [(rule, re.compile(rule.pattern, re.IGNORECASE))
+                      for rule in rules if rule.scope == scope]
+            if scoped:
+                self.scopes[scope] = _combine(scoped)
+
+    def match(self, scope: str, text: str):
+        """
+        Return the list of rules of `scope`, that match `text`, in the
+        order of the configuration.
+        """
+        combined, grouped, separate = self.scopes[scope]
+        found = [rule for rule, regex in separate if regex.search(text)]
+
+        match = combined.search(text) if combined is not None else None
+        if match is not None:
+            # The group names the first matching rule, the others might
+            # match at later positions.
+            first = int(match.lastgroup[len(_GROUP_PREFIX):])
+            found.append(grouped[first][0])
+            found += [rule for index, (rule, regex) in enumerate(grouped)
+                      if index != first and regex.search(text)]
+
+        if len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+
+def _combine(scoped: list):
+    """
+    Combine the rules, that do not use backreferences or global inline
+    flags, into one regex with a named group per rule.
+
+    :scoped: list of (rule, regex)
+    :returns: tuple of the combined regex or `None`, the list of (rule,
+              regex) in the order of the groups and the list of (rule,
+              regex) of the rules, that must be matched on their own
+    """
+    grouped = []
+    separate = []
+    for rule, regex in scoped:
+        if _regex_backreference.search(rule.pattern):
+            separate.append((rule, regex))
+            continue
+        try:
+            re.compile("(?P<{}0>{})".format(_GROUP_PREFIX, rule.pattern),
+                       re.IGNORECASE)
+        except re.error:
+            separate.append((rule, regex))
+            continue
+        grouped.append((rule, regex))
+
+    if not grouped:
+        return None, [], separate
+    try:
+        combined = re.compile("|".join(
+            "(?P<{}{}>{})".format(_GROUP_PREFIX, index, rule.pattern)
+            for index, (rule, _) in enumerate(grouped)), re.IGNORECASE)
+    except re.error:
+        # E.g. two rules define a group with the same name.
+        return None, [], scoped
+    return combined, grouped, separate
+
+
+def compiled_rules():
+    """Return the `RuleSet` of the current user rules."""
+    global _compiled
+    rules = user_rules()
+    if _compiled is None or _compiled.rules != rules:
+        _compiled = RuleSet(rules)
+    return _compiled
+
+
+class CheckUserRules(AbstractCheck):
+    """Report the lines that match the rules of the user."""
+
+    def __init__(self, f_file: CodeFile):
+        super(CheckUserRules, self).__init__(f_file)
+
+        # List of (line number, rule) of all matches.
+        self._matches = []
+
+    @classmethod
+    def help(self):
+        return "Report lines matching the user defined rules of --rules."
+
+    def check(self):
+        """
+        Scan every line once for each scope and remember the rules that
+        match.
+        """
+        rule_set = compiled_rules()
+        scopes = rule_set.scopes
+        if not scopes:
+            return
+
+        lines = self._f_file.insensitive_lines()
+        tokens = self._f_file.tokens()
+        line_info = self._f_file.line_info()
+        in_unit = self._unit_lines() if "unit" in scopes else \
+            bytes(len(line_info))
+
+        for i, info in enumerate(line_info):
+            line = lines[i]
+            segments = tokens[i]
+            column = comment_start(segments)
+            found = []
+
+            if "line" in scopes:
+                found += rule_set.match("line", line)
+            if "comment" in scopes and column >= 0:
+                found += rule_set.match("comment", line[column:])
+            if info.kind == LINE_CODE and \
+                    ("code" in scopes or in_unit[i]):
+                code = mask_strings(line, segments)
+                if column >= 0:
+                    code = code[:column]
+                if "code" in scopes:
+                    found += rule_set.match("code", code)
+                if in_unit[i]:
+                    found += rule_set.match("unit", code)
+
+            if len(found) > 1:
+                found.sort(key=rule_set.order.__getitem__)
+            for rule in found:
+                if self._trace is not None:
+                    self._trace.event("match", line=i + 1,
+                                      user_rule=rule.name)
+                self._matches.append((i + 1, rule))
+
+    def _unit_lines(self):
+        """
+        Return a flag for every line index, that is set if the line is
+        within any program unit.
+        """
+        flags = bytearray(self._f_file.line_count())
+        for unit in self._f_file.scope_tree().children:
+            flags[unit.start - 1:unit.end] = b"\x01" * (unit.end -
+                                                        unit.start + 1)
+        return flags
+
+    def diagnostics(self):
+        for line, rule in self._matches:
+            yield create_diagnostic(self._f_file, line, rule.severity,
+                                    rule.message)
@@ -9,8 +9,9 @@ from os.path import dirname, join
 import re
 import unittest
 from file_io import CodeFile
+from check.abstract_check import run_checks
 from check.check_format_label import _match_format_label, _match_print_label,\
-                                     _match_write_label
+                                     _match_write_label, CheckFormatLabel
 
 # logging.basicConfig(level=logging.DEBUG)
 
@@ -74,3 +75,43 @@ class TestCheckFormatLabel(unittest.TestCase):
         self.assertFalse(_match_write_label(" \t write  (* , 123012   )"))
         self.assertFalse(_match_write_label("something unrelated, with write"))
 
+    def test_continued_statements(self):
+        free_form = CodeFile("labels.f90", b"""program p
+  write(*, &
+        ! the label follows
+        & 100) n
+  print &
+    200, n
+100 format('n = ', i8)
+200 format(i8)
+end program p
+""")
+        fixed_form = CodeFile("labels.f", b"""      program p
+c     write(*, 100) n
+      write(*,
+     +      100) n
+  100 format('n = ', i8)
+      end
+""")
+        self.assertListEqual(
+            [(7, "warning"), (2, "note"), (8, "warning"), (5, "note")],
+            [(d.line, d.category)
+             for d in run_checks(free_form, [CheckFormatLabel])])
+        self.assertListEqual(
+            [(5, "warning"), (3, "note")],
+            [(d.line, d.category)
+             for d in run_checks(fixed_form, [CheckFormatLabel])])
+
+    def test_undefined_label(self):
+        f_file = CodeFile("undefined.f90", b"""program p
+  write(6, &
+        100) 1
+  write(6, fmt) 2
+  print 200, 3
+end program p
+""")
+        self.assertListEqual([], list(run_checks(f_file, [CheckFormatLabel])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,6 +9,8 @@ from os.path import dirname, join
 import re
 import unittest
 from file_io import CodeFile
+from check.abstract_check import run_checks
+from check.check_format_label import CheckFormatLabel
 from check.check_implicit_none import _match_implicit, CheckImplicitNone
 
 # logging.basicConfig(level=logging.DEBUG)
@@ -56,6 +58,40 @@ class TestCheckImplicitNone(unittest.TestCase):
 
         self.assertListEqual([1, 4, 7], sorted(c._occurences))
 
+    def test_diagnostics(self):
+        f_file = CodeFile(
+            join(dirname(__file__), "../../test/check/implicit_none_edge.f90"))
+        diagnostics = list(run_checks(f_file, [CheckImplicitNone]))
+
+        self.assertListEqual([4, 7, 1], [d.line for d in diagnostics])
+        self.assertEqual("no 'implicit none' found", diagnostics[0].message)
+        self.assertEqual(f_file.path(), diagnostics[0].path)
+        self.assertIsNone(diagnostics[0].rule)
+
+        diagnostics = list(run_checks(f_file, [CheckImplicitNone],
+                                      names=["implicit-none"]))
+        self.assertListEqual(["implicit-none"] * 3,
+                             [d.rule for d in diagnostics])
+
+    def test_fixed_form_comments(self):
+        # Comment lines with `c`, `C` or `*` in the first column do not
+        # open or close program units.
+        f_file = CodeFile(
+            join(dirname(__file__), "../../test/check/fixed_form_comments.f"))
+        diagnostics = list(run_checks(f_file, [CheckImplicitNone,
+                                               CheckFormatLabel]))
+
+        self.assertListEqual(
+            [(17, "warning", "no 'implicit none' found"),
+             (9, "warning", "defined format label '100' here"),
+             (6, "note", "used this label here")],
+            [(d.line, d.category, d.message) for d in diagnostics])
+        self.assertListEqual(
+            [("subroutine", 2, 10), ("function", 12, 16),
+             ("program", 17, 20)],
+            [(unit.kind, unit.start, unit.end)
+             for unit in f_file.scope_tree().children])
+
     def test_real_world(self):
         f_file = CodeFile(
             join(dirname(__file__), "../../test/check/implicit_none_real.f90"))
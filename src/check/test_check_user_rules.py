@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test the check of the declarative user rules.
+"""
+
+import unittest
+from file_io import CodeFile
+from check.abstract_check import run_checks
+from check.check_user_rules import CheckUserRules, RuleSet
+from user_rules import parse_user_rules, set_user_rules
+
+SOURCE = b"""! stop here is fine
+use iso_fortran_env
+program p
+  implicit none
+  print *, 'stop'   ! stop in a comment
+  STOP 1
+  call exit(2)
+end program p
+"""
+
+
+class TestCheckUserRules(unittest.TestCase):
+    """Test the scopes of the rules and the combined matching."""
+
+    def tearDown(self):
+        set_user_rules(())
+
+    def _diagnostics(self, rules: list):
+        set_user_rules(parse_user_rules({"rules": rules}))
+        f_file = CodeFile("rules.f90", SOURCE)
+        return [(d.line, d.category, d.message)
+                for d in run_checks(f_file, [CheckUserRules])]
+
+    def test_scopes(self):
+        self.assertListEqual(
+            [(1, "warning", "comment"), (1, "note", "line"),
+             (5, "warning", "comment"), (5, "note", "line"),
+             (6, "error", "code"), (6, "warning", "unit"),
+             (6, "note", "line")],
+            self._diagnostics([
+                {"name": "code", "pattern": r"\bstop\b", "scope": "code",
+                 "severity": "error", "message": "code"},
+                {"name": "unit", "pattern": r"\bstop\b", "scope": "unit",
+                 "message": "unit"},
+                {"name": "comment", "pattern": r"stop", "scope": "comment",
+                 "message": "comment"},
+                {"name": "line", "pattern": r"stop", "scope": "line",
+                 "severity": "note", "message": "line"},
+            ]))
+
+    def test_unit_scope(self):
+        self.assertListEqual(
+            [(2, "warning", "line matches rule 'use'")],
+            self._diagnostics([
+                {"name": "use", "pattern": r"^\s*use\b", "scope": "code"},
+                {"name": "unit-use", "pattern": r"^\s*use\b",
+                 "scope": "unit"},
+            ]))
+
+    def test_no_rules(self):
+        self.assertListEqual([], self._diagnostics([]))
+
+    def test_combined(self):
+        rules = parse_user_rules({"rules": [
+            {"name": "stop", "pattern": r"\bstop\b"},
+            {"name": "exit", "pattern": r"call\s+exit"},
+            {"name": "flags", "pattern": r"(?x) e x i t"},
+        ]})
+        rule_set = RuleSet(rules)
+        self.assertListEqual(["exit", "flags"], [
+            rule.name for rule in rule_set.match("code", "call exit(2)")])
+        self.assertListEqual([], rule_set.match("code", "x = 1"))
+
+    def test_backreference(self):
+        rules = parse_user_rules({"rules": [
+            {"name": "call", "pattern": r"(call)"},
+            {"name": "repeated", "pattern": r"\b(\w+)\s+\1\b"},
+            {"name": "named", "pattern": r"(?P<word>\w+)=(?P=word)\b"},
+        ]})
+        rule_set = RuleSet(rules)
+        self.assertListEqual(["repeated"], [
+            rule.name for rule in rule_set.match("code", "x = x x")])
+        self.assertListEqual(["call", "repeated"], [
+            rule.name for rule in rule_set.match("code", "call call s")])
+        self.assertListEqual(["named"], [
+            rule.name for rule in rule_set.match("code", "a=a")])
+        self.assertListEqual([], rule_set.match("code", "x = y"))
+
+    def test_overlapping_rules(self):
+        rules = parse_user_rules({"rules": [
+            {"name": "later", "pattern": r"exit"},
+            {"name": "first", "pattern": r"call"},
+            {"name": "same", "pattern": r"call\s+ex"},
+        ]})
+        rule_set = RuleSet(rules)
+        self.assertListEqual(["first", "later", "same"], sorted(
+            rule.name for rule in rule_set.match("code", "call exit(2)")))
+
+
+if __name__ == "__main__":
+    unittest.main()
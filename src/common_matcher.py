@@ -6,6 +6,12 @@ This file consists of common line matchers that are useful in all modules.
 
 import re
 
+from matcher_engine import MatcherEngine
+
+# Engine with all line patterns that are matched while classifying a file.
+# Checks and formatters register their own patterns here as well.
+LINE_MATCHER = MatcherEngine()
+
 
 def match_line(regex, line):
     """
@@ -27,6 +33,10 @@ __regex_begin_block = re.compile(
 __regex_end_block = re.compile(
     r'^[^!]*end(\s+)(function|subroutine|program|module)(.*)$')
 
+__block_keywords = ("function", "subroutine", "program", "module")
+LINE_MATCHER.register("begin-block", __regex_begin_block, __block_keywords)
+LINE_MATCHER.register("end-block", __regex_end_block, __block_keywords)
+
 def match_begin_block(line):
     return match_line(__regex_begin_block, line)
 
@@ -37,6 +47,9 @@ def match_end_block(line):
 __regex_blank_line = re.compile(r'^(\s*)$')
 __regex_comment_line = re.compile(r'^(\s*)!(.*)$')
 
+LINE_MATCHER.register("blank-line", __regex_blank_line)
+LINE_MATCHER.register("comment-line", __regex_comment_line, ("!",))
+
 def match_blank_line(line):
     return match_line(__regex_blank_line, line)
 
@@ -48,6 +61,10 @@ __regex_begin_ignore = re.compile(r'^\s*(!&<).*$')
 __regex_end_ignore = re.compile(r'^\s*(!&>).*$')
 __regex_single_ignore = re.compile(r'^[^!]*!&[^<>]*$')
 
+LINE_MATCHER.register("ignore-single", __regex_single_ignore, ("!&",))
+LINE_MATCHER.register("ignore-start", __regex_begin_ignore, ("!&<",))
+LINE_MATCHER.register("ignore-end", __regex_end_ignore, ("!&>",))
+
 def match_ignore_single(line):
     return match_line(__regex_single_ignore, line)
 
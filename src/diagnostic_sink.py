@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Write `diagnostics.Diagnostic` records in bulk.
+
+A sink buffers the formatted diagnostics and writes them in large
+chunks. Besides the human readable text, diagnostics can be written as
+JSON Lines (one object per line) or as a SARIF log, that code scanning
+dashboards ingest directly.
+"""
+
+import json
+import sys
+
+from version import __version__
+
+# Number of buffered diagnostics that are written at once.
+FLUSH_SIZE = 4096
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+# SARIF levels of the diagnostic categories.
+SARIF_LEVELS = {"error": "error", "warning": "warning", "note": "note"}
+
+
+class DiagnosticSink(object):
+    """
+    Base class of all sinks. Subclasses implement `_format` for a single
+    diagnostic and may add a header and a footer.
+
+    Use it as context manager or call `close` to write everything that is
+    still buffered.
+    """
+
+    def __init__(self, stream, owns_stream: bool = False, rules: list = None):
+        """
+        :stream: text stream to write to
+        :owns_stream: close `stream` when the sink is closed
+        :rules: list of `(name, help text)` of the enabled checks, for
+                formats that describe them
+        """
+        self._stream = stream
+        self._owns_stream = owns_stream
+        self._rules = rules or []
+        self._buffer = []
+        # Number of diagnostics already written to the stream.
+        self._count = 0
+        self._write(self._header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def count(self):
+        """Return the number of diagnostics written so far."""
+        return self._count + len(self._buffer)
+
+    def write(self, diagnostic):
+        """Add a single diagnostic."""
+        self._buffer.append(self._format(diagnostic))
+        if len(self._buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def write_all(self, diagnostics):
+        """Add all diagnostics of an iterable."""
+        for diagnostic in diagnostics:
+            self.write(diagnostic)
+
+    def flush(self):
+        """Write all buffered diagnostics to the stream."""
+        if self._buffer:
+            separator = self._separator()
+            self._write((separator if self._count else "") +
+                        separator.join(self._buffer))
+            self._count += len(self._buffer)
+            self._buffer = []
+        self._stream.flush()
+
+    def close(self):
+        """Flush the buffer, write the footer and close an owned stream."""
+        if self._stream is None:
+            return
+        self.flush()
+        self._write(self._footer())
+        self._stream.flush()
+        if self._owns_stream:
+            self._stream.close()
+        self._stream = None
+
+    def _write(self, text: str):
+        if text:
+            self._stream.write(text)
+
+    def _header(self):
+        return ""
+
+    def _footer(self):
+        return ""
+
+    def _separator(self):
+        """Return the text between two formatted diagnostics."""
+        return ""
+
+    def _format(self, diagnostic):
+        raise NotImplementedError()
+
+
+class TextSink(DiagnosticSink):
+    """Write the human readable `path: line: category: message` lines."""
+
+    def _format(self, diagnostic):
+        return "{}: {}: {}: {}\n".format(diagnostic.path, diagnostic.line,
+                                         diagnostic.category,
+                                         diagnostic.message)
+
+
+class JsonLinesSink(DiagnosticSink):
+    """Write one JSON object per diagnostic and line."""
+
+    def _format(self, diagnostic):
+        return json.dumps({"path": diagnostic.path,
+                           "line": diagnostic.line,
+                           "category": diagnostic.category,
+                           "message": diagnostic.message,
+                           "rule": diagnostic.rule}) + "\n"
+
+
+class SarifSink(DiagnosticSink):
+    """
+    Write a SARIF log with a single run. The results are streamed into
+    the document, so the whole log is never kept in memory.
+
+    The enabled checks are the rules of the tool, results refer to them by
+    `ruleId` and `ruleIndex`.
+    """
+
+    def __init__(self, stream, owns_stream: bool = False, rules: list = None):
+        # Index of every rule in the list of rules of the tool.
+        self._rule_indices = {name: index for index, (name, _)
+                              in enumerate(rules or [])}
+        super(SarifSink, self).__init__(stream, owns_stream, rules)
+
+    def _header(self):
+        # Everything up to the list of results, the footer closes it.
+        document = json.dumps({
+            "$schema": SARIF_SCHEMA,
+            "version": SARIF_VERSION,
+            "runs": [{
+                "tool": {"driver": {
+                    "name": "flint",
+                    "version": __version__,
+                    "rules": [{"id": name,
+                               "shortDescription": {"text": help_text}}
+                              for name, help_text in self._rules],
+                }},
+                "results": [],
+            }],
+        }, indent=2)
+        return document[:document.rindex("[]") + 1] + "\n"
+
+    def _footer(self):
+        return "\n]}]}\n"
+
+    def _separator(self):
+        return ",\n"
+
+    def _format(self, diagnostic):
+        result = {
+            "level": SARIF_LEVELS.get(diagnostic.category, "none"),
+            "message": {"text": diagnostic.message},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": _file_uri(diagnostic.path)},
+                    "region": {"startLine": diagnostic.line},
+                },
+            }],
+        }
+        if diagnostic.rule is not None:
+            result["ruleId"] = diagnostic.rule
+            index = self._rule_indices.get(diagnostic.rule)
+            if index is not None:
+                result["ruleIndex"] = index
+        return json.dumps(result)
+
+
+def _file_uri(path: str):
+    """Return the `file://` URI of an absolute path."""
+    # Only SARIF reports need it, so it is not imported on startup.
+    import urllib.parse
+    return "file://" + urllib.parse.quote(path)
+
+
+# Available output formats by name.
+SINKS = {
+    "text": TextSink,
+    "jsonl": JsonLinesSink,
+    "sarif": SarifSink,
+}
+
+
+def create_sink(output_format: str, output: str = None, rules: list = None):
+    """
+    Create the sink of `output_format`.
+
+    :output: path of the file to write to. Text is written to stderr and
+             the machine readable formats to stdout if not given.
+    :rules: list of `(name, help text)` of the enabled checks
+    """
+    sink_class = SINKS[output_format]
+    if output is not None:
+        return sink_class(open(output, "w", encoding="utf-8"), True, rules)
+    if sink_class is TextSink:
+        return sink_class(sys.stderr, rules=rules)
+    return sink_class(sys.stdout, rules=rules)
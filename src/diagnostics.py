@@ -4,9 +4,25 @@
 Implement functions that are usable to emit warnings.
 """
 
+import collections
+import contextlib
 import sys
 import file_io
 
+# Compact record of one emitted diagnostic. It is cheap to pickle and is
+# used to send results from worker processes back to the main process.
+# The `rule` is the name of the check, that emitted the diagnostic. Checks
+# create their records without it, `run_checks` sets it.
+Diagnostic = collections.namedtuple(
+    "Diagnostic", ["path", "line", "category", "message", "rule"])
+Diagnostic.__new__.__defaults__ = (None,)
+
+# Categories of diagnostics from the least to the most severe one.
+SEVERITIES = ("note", "warning", "error")
+
+# If not `None`, diagnostics are appended to this list instead of printed.
+_collector = None
+
 
 def error(ffile: file_io.CodeFile, line: int, message: str):
     """Emit a warning for this file at a line.
@@ -15,8 +31,7 @@ def error(ffile: file_io.CodeFile, line: int, message: str):
     :line: int: line number of the warned construct
     :message: str: human readable warning message
     """
-    _check_location(ffile, line)
-    print(_create_message(ffile, line, "error", message), file=sys.stderr)
+    _emit(ffile, line, "error", message)
 
 
 def warning(ffile: file_io.CodeFile, line: int, message: str):
@@ -26,8 +41,7 @@ def warning(ffile: file_io.CodeFile, line: int, message: str):
     :line: int: line number of the warned construct
     :message: str: human readable warning message
     """
-    _check_location(ffile, line)
-    print(_create_message(ffile, line, "warning", message), file=sys.stderr)
+    _emit(ffile, line, "warning", message)
 
 
 def note(ffile: file_io.CodeFile, line: int, message: str):
@@ -37,15 +51,133 @@ def note(ffile: file_io.CodeFile, line: int, message: str):
     :line: int: line number of the warned construct
     :message: str: human readable warning message
     """
+    _emit(ffile, line, "note", message)
+
+
+@contextlib.contextmanager
+def collect_diagnostics():
+    """
+    Collect all diagnostics emitted within the `with` block into a list
+    of `Diagnostic` records instead of printing them.
+
+    :returns: list that is filled with the emitted `Diagnostic` records
+    """
+    global _collector
+    previous = _collector
+    _collector = []
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def print_diagnostic(diagnostic: Diagnostic):
+    """Print a `Diagnostic` record in the human readable format."""
+    print(_format_diagnostic(diagnostic), file=sys.stderr)
+
+
+def create_diagnostic(ffile: file_io.CodeFile, line: int, category: str,
+                      message: str):
+    """Return the `Diagnostic` record for this file at a line."""
     _check_location(ffile, line)
-    print(_create_message(ffile, line, "note", message), file=sys.stderr)
+    return Diagnostic(ffile.path(), line, category, message)
+
+
+def emit(diagnostic: Diagnostic):
+    """Collect or print a `Diagnostic` record."""
+    if _collector is not None:
+        _collector.append(diagnostic)
+    else:
+        print_diagnostic(diagnostic)
+
+
+def sort_diagnostics(diagnostics):
+    """
+    Return the diagnostics as list sorted by file and line. Diagnostics at
+    the same location keep their order.
+    """
+    return sorted(diagnostics, key=lambda d: (d.path, d.line))
+
+
+class DiagnosticLimit(object):
+    """
+    Filter a stream of diagnostics by severity, drop duplicates and stop
+    after a maximum number of diagnostics.
+
+    Duplicates can only occur within one file, so only the diagnostics
+    of the current file are remembered for the deduplication.
+    """
+
+    def __init__(self, min_severity: str = "note",
+                 max_diagnostics: int = None, fail_fast: bool = False):
+        """
+        :min_severity: drop all diagnostics of less severe categories
+        :max_diagnostics: stop after this many diagnostics, `None` for
+                          no limit
+        :fail_fast: stop after the first file with a diagnostic
+        """
+        self._min_rank = SEVERITIES.index(min_severity)
+        self._max_diagnostics = max_diagnostics
+        self._fail_fast = fail_fast
+        self._seen = set()
+        self._count = 0
+        self._stopped = False
+
+    def count(self):
+        """Return the number of accepted diagnostics."""
+        return self._count
+
+    def stopped(self):
+        """Return True if the limit ended the stream early."""
+        return self._stopped
+
+    def accept(self, diagnostic: Diagnostic):
+        """Return True if `diagnostic` passes the filter and count it."""
+        if SEVERITIES.index(diagnostic.category) < self._min_rank:
+            return False
+        if diagnostic in self._seen:
+            return False
+        self._seen.add(diagnostic)
+        self._count += 1
+        return True
+
+    def filter(self, diagnostics_per_file):
+        """
+        Yield the accepted diagnostics.
+
+        :diagnostics_per_file: iterable of the list of diagnostics of
+                               every file
+        """
+        for diagnostics in diagnostics_per_file:
+            self._seen.clear()
+            accepted = False
+            for diagnostic in diagnostics:
+                if self._max_diagnostics is not None and \
+                        self._count >= self._max_diagnostics:
+                    self._stopped = True
+                    return
+                if self.accept(diagnostic):
+                    accepted = True
+                    yield diagnostic
+            if self._fail_fast and accepted:
+                self._stopped = True
+                return
+
+
+def _emit(ffile: file_io.CodeFile, line: int, category: str, message: str):
+    emit(create_diagnostic(ffile, line, category, message))
+
+
+def _format_diagnostic(diagnostic: Diagnostic):
+    return "{}: {}: {}: {}".format(*diagnostic[:4])
 
 
 def _create_message(ffile: file_io.CodeFile, line: int, category: str,
                     message: str):
-    return "{}: {}: {}: {}".format(ffile.path(), line, category, message)
+    return _format_diagnostic(
+        Diagnostic(ffile.path(), line, category, message))
 
 
 def _check_location(ffile: file_io.CodeFile, line: int):
     assert line > 0, "Trying to emit a diagnostic for a negative line number"
-    assert line < len(ffile.original_lines()), "To big line number"
+    assert line <= ffile.line_count(), "To big line number"
@@ -7,6 +7,15 @@ This will overwrite the original file if necessary.
 
 import logging as log
 import os
+import shutil
+import tempfile
+
+from common_matcher import LINE_MATCHER
+from line_buffer import EncodedLineBuffer, LineBuffer
+from line_classification import classify_lines, reclassify_lines
+from logical_lines import build_fixed_form, build_free_form, is_fixed_form
+from scope import build_scope_tree
+from tokenizer import tokenize_lines, retokenize_lines
 
 
 class FortranCode(object):
@@ -16,40 +25,175 @@ class FortranCode(object):
     """
 
     def __init__(self, file_content: list = None):
-        # List of strings the file consists of. Read in lazyly.
-        # Both the original version and the case insenstive version.
-        self._original_file_content = file_content
-        self._insensitive_file_content = file_content
+        self._log = log.getLogger(__file__)
+
+        # `LineBuffer` with the text the file consists of. Read in lazyly.
+        # The case insensitive version is derived from it on demand.
+        self._buffer = None
+        # Segments and classification of every line, computed lazyly on
+        # first use.
+        self._tokens = None
+        self._open_quotes = None
+        self._line_info = None
+        # `LINE_MATCHER.generation` the classification was computed with.
+        self._matcher_generation = None
+        self._scope_tree = None
+        self._logical_lines = None
+
+        self._assign_lines(file_content or [])
 
     def original_lines(self):
         """
-        Return the original content as list of lines.
+        Return the original content as sequence of lines.
         :note: Use `insensitive_lines` for analysis.
         :note: The lines do include the \\n character.
         """
-        return self._original_file_content
+        return self._content().lines()
 
     def insensitive_lines(self):
         """
-        Return a list of lines that are not case sensitive and better to
-        work with while analyzing.
+        Return a sequence of lines that are not case sensitive and better
+        to work with while analyzing.
         The lines do include the \\n character.
         """
-        return self._insensitive_file_content
+        return self._content().lower_lines()
+
+    def line_count(self):
+        """Return the number of lines."""
+        return len(self._content())
+
+    def tokens(self):
+        """
+        Return the code, string and comment segments of every line as
+        list of tuples of `tokenizer.Segment`.
+        The columns refer to `insensitive_lines`. Comment lines of
+        fixed-form code are single comment segments.
+        """
+        if self._tokens is None:
+            self._open_quotes = []
+            self._tokens = tokenize_lines(self.insensitive_lines(),
+                                          self._open_quotes,
+                                          self.fixed_form())
+        return self._tokens
+
+    def line_info(self):
+        """
+        Return the classification of every line as list of
+        `line_classification.LineInfo`. It is computed once and shared
+        by all checks and formatters. Rules imported after the first
+        call register new patterns, the classification is computed again
+        for them.
+        """
+        self._drop_stale_classification()
+        if self._line_info is None:
+            self._matcher_generation = LINE_MATCHER.generation()
+            self._line_info = classify_lines(self.insensitive_lines(),
+                                             self.tokens())
+        return self._line_info
+
+    def scope_tree(self):
+        """
+        Return the root `scope.ProgramUnit` of the tree of all program
+        units. It is built once and shared by all checks.
+        """
+        if self._scope_tree is None:
+            self._scope_tree = build_scope_tree(self.insensitive_lines(),
+                                                self.line_info())
+        return self._scope_tree
+
+    def fixed_form(self):
+        """Return True if the code is in fixed-form, it is free-form."""
+        return False
+
+    def logical_lines(self):
+        """
+        Return the `logical_lines.LogicalLines` of the code, that join
+        continued lines into statements. It is built once on first use,
+        rules that analyse whole statements opt in by using it.
+        """
+        if self._logical_lines is None:
+            if self.fixed_form():
+                self._logical_lines = build_fixed_form(
+                    self.insensitive_lines())
+            else:
+                self._logical_lines = build_free_form(
+                    self.insensitive_lines(), self.tokens(), self.line_info())
+        return self._logical_lines
 
     def update_lines(self, lines: list):
         """Remove all current lines and overwrite them with `lines`."""
         self._assign_lines(lines)
 
+    def apply_edits(self, edits: dict):
+        """
+        Replace single lines and keep the number of lines.
+        Tokens and the classification are only computed again for the
+        changed lines. The scope tree is kept, if no block boundary
+        changed.
+
+        :edits: dict of line index to the new line, including the '\\n'
+        """
+        if not edits:
+            return
+
+        self._drop_stale_classification()
+        content = self._content()
+        tokens = self._tokens
+        open_quotes = self._open_quotes
+        line_info = self._line_info
+        scope_tree = self._scope_tree
+
+        self._set_buffer(LineBuffer.from_lines(
+            edits.get(i, line) for i, line in enumerate(content.lines())))
+        assert len(self._buffer) == len(content), \
+            "Edits must not change the number of lines"
+
+        if tokens is None:
+            return
+        lines = self.insensitive_lines()
+        changed = retokenize_lines(lines, tokens, open_quotes, edits.keys(),
+                                   self.fixed_form())
+        self._tokens = tokens
+        self._open_quotes = open_quotes
+
+        if line_info is None:
+            return
+        old_info = [line_info[i] for i in changed]
+        reclassify_lines(lines, tokens, line_info, changed)
+        self._line_info = line_info
+
+        if scope_tree is not None and not any(
+                info.begin_block or info.end_block
+                for info in old_info + [line_info[i] for i in changed]):
+            self._scope_tree = scope_tree
+
+    def _drop_stale_classification(self):
+        """
+        Drop the classification and everything derived from it, if
+        patterns were registered since it was computed.
+        """
+        if self._line_info is not None and \
+                self._matcher_generation != LINE_MATCHER.generation():
+            self._line_info = None
+            self._scope_tree = None
+            self._logical_lines = None
+
     def _assign_lines(self, iteratable):
         """Assign every line in `iterabtable` to the content."""
-        self._original_file_content = []
-        self._insensitive_file_content = []
+        self._set_buffer(LineBuffer.from_lines(iteratable))
 
-        for line in iteratable:
-            self._log.debug("assigning: %s" % line)
-            self._original_file_content.append(line)
-            self._insensitive_file_content.append(line.lower())
+    def _set_buffer(self, buffer: LineBuffer):
+        """Replace the content and drop everything derived from it."""
+        self._buffer = buffer
+        self._tokens = None
+        self._open_quotes = None
+        self._line_info = None
+        self._scope_tree = None
+        self._logical_lines = None
+
+    def _content(self):
+        """Return the `LineBuffer` of the content."""
+        return self._buffer
 
 
 class CodeFile(FortranCode):
@@ -58,57 +202,93 @@ class CodeFile(FortranCode):
     FIXITs.
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, content: bytes = None):
         """
         Initialize the code file.
 
         :file_path: Path of the fortran file.
         If the path is relative, the prefix of the execution
         directory is added.
+        :content: Raw content of the file, if it is already known. The file
+        is not read in that case.
         """
         super(CodeFile, self).__init__()
-        self._log = log.getLogger(__file__)
+        # The content is read on first use.
+        self._buffer = None
+        # Encoding of the file, known once the content was read.
+        self._encoding = "utf-8"
 
         self._log.debug("Set _file_path to %s" % os.path.abspath(file_path))
         self._file_path = os.path.abspath(file_path)
+        self._content_bytes = content
 
     def path(self):
         """Return the absolute path of the `CodeFile`."""
         return self._file_path
 
-    def original_lines(self):
+    def fixed_form(self):
         """
-        Return the original content as list of lines.
-        :note: Use `insensitive_lines` for analysis.
-        :note: The lines do include the \\n character.
+        Return True if the file is in fixed-form, decided by the
+        extension of its name.
         """
-        if self._original_file_content is None:
-            self.__read_file()
-        return self._original_file_content
+        return is_fixed_form(self._file_path)
 
-    def insensitive_lines(self):
+    def encoding(self):
         """
-        Return a list of lines that are not case sensitive and better to
-        work with while analyzing.
-        The lines do include the \\n character.
+        Return the encoding the file is read and written with, 'utf-8' or
+        'latin-1' for sources that are not valid UTF-8.
         """
-        if self._insensitive_file_content is None:
-            self.__read_file()
-        return self._insensitive_file_content
-
+        if isinstance(self._buffer, EncodedLineBuffer):
+            return self._buffer.encoding()
+        return self._encoding
 
     def write(self):
         """
-        Write the content of `_original_file_content` into the original file.
+        Write the content into the original file.
+
+        The content is written to a temporary file in the same directory
+        first, that replaces the original file afterwards. An interrupted
+        write never leaves a half written source behind. Symbolic links
+        are kept, their target is replaced.
         """
-        with open(self._file_path, 'w') as fortran_file:
-            fortran_file.writelines(self._original_file_content)
+        target = os.path.realpath(self._file_path)
+        directory, name = os.path.split(target)
+        handle, tmp_path = tempfile.mkstemp(
+            prefix="." + name + ".", suffix=".tmp", dir=directory)
+        try:
+            with open(handle, 'w', encoding=self.encoding()) as \
+                    fortran_file:
+                fortran_file.write(self._content().text())
+            # Keep the permissions of the original file.
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _set_buffer(self, buffer):
+        # Keep the encoding of the file when its content is replaced.
+        if isinstance(self._buffer, EncodedLineBuffer):
+            self._encoding = self._buffer.encoding()
+        super(CodeFile, self)._set_buffer(buffer)
+
+    def _content(self):
+        """Return the `LineBuffer` of the content, read it if necessary."""
+        if self._buffer is None:
+            self.__read_file()
+        return self._buffer
 
     def __read_file(self):
-        """Read the file content into memory."""
-        assert self._original_file_content is None, "Already read file"
-        assert self._insensitive_file_content is None, "Already read file"
+        """
+        Map the file content into memory. Lines are decoded when they are
+        used.
+        """
         self._log.debug("Reading the content of the file %s" % self._file_path)
 
-        with open(self._file_path) as fortran_file:
-            self._assign_lines(fortran_file)
+        if self._content_bytes is not None:
+            self._set_buffer(EncodedLineBuffer(self._content_bytes))
+            self._content_bytes = None
+            return
+
+        self._set_buffer(EncodedLineBuffer.map_file(self._file_path))
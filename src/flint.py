@@ -5,14 +5,183 @@ Executable that uses the implemented checks.
 """
 
 import argparse
+import collections
+import contextlib
+import json
 import logging
+import os
 import sys
 
-from check.check_implicit_none import CheckImplicitNone
-from check.check_format_label import CheckFormatLabel
-from format.format_align_colon import FormatAlignColon
-from format.format_trailing_comment import FormatAlignTrailingComment
 from file_io import CodeFile
+from check.abstract_check import run_checks
+from diagnostics import DiagnosticLimit, SEVERITIES, sort_diagnostics
+from diagnostic_sink import SINKS, create_sink
+from rule_registry import CHECKS_GROUP, FORMATTERS_GROUP, RuleRegistry,\
+                          RuleSpec
+from tracing import enable_tracing
+from user_rules import UserRuleError, load_user_rules, rules_digest,\
+                       set_user_rules
+from version import __version__
+
+# Modules, that only some subcommands use, are imported by their
+# `handle_*` function, so short runs start fast.
+
+# The rule modules are only imported when a rule is enabled, so the help
+# texts are repeated here. `test_rule_registry.test_builtin_manifest`
+# fails if they differ from the `help` of the classes.
+ALL_CHECKS = RuleRegistry(CHECKS_GROUP, collections.OrderedDict([
+    ("implicit-none", RuleSpec(
+        "check.check_implicit_none", "CheckImplicitNone",
+        "Warn if 'implicit none' is not used")),
+    ("format-label", RuleSpec(
+        "check.check_format_label", "CheckFormatLabel",
+        "Warn for all `FORMAT` labels and its usage.")),
+    ("user-rules", RuleSpec(
+        "check.check_user_rules", "CheckUserRules",
+        "Report lines matching the user defined rules of --rules.")),
+]))
+
+ALL_FORMATTERS = RuleRegistry(FORMATTERS_GROUP, collections.OrderedDict([
+    ("align-double-colon", RuleSpec(
+        "format.format_align_colon", "FormatAlignColon",
+        "Align the double colons of subsequent variable definitions.")),
+    ("align-trailing-comment", RuleSpec(
+        "format.format_trailing_comment", "FormatAlignTrailingComment",
+        "Align subsequent trailing comments. End with blank or non-comment "
+        "line")),
+]))
+
+
+def _positive_int(value):
+    """Argument type for options that require a number greater zero."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "'{}' is not a positive number".format(value))
+    return number
+
+
+def _init_process(traced: dict, user_rules: tuple):
+    """Set the process wide settings in the main and worker processes."""
+    enable_tracing(traced)
+    set_user_rules(user_rules)
+
+
+def _run_parallel(func, tasks: list, jobs: int, traced: dict = None,
+                  user_rules: tuple = ()):
+    """
+    Apply `func` to every task and yield the results in the order of
+    `tasks`, no matter which worker finishes first.
+
+    :func: module level function, it must be picklable
+    :tasks: list of arguments, each is passed to `func`
+    :jobs: int: number of worker processes, `1` runs everything inline
+    :traced: dict of the names and classes of the traced rules
+    :user_rules: tuple of the `UserRule`s of the `user-rules` check
+    """
+    _init_process(traced or {}, user_rules)
+    jobs = min(jobs, len(tasks))
+    if jobs <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    # Send several tasks at once to reduce the communication overhead,
+    # but keep enough chunks around to balance the load.
+    import multiprocessing
+
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with multiprocessing.Pool(jobs, _init_process,
+                              (traced or {}, user_rules)) as pool:
+        for result in pool.imap(func, tasks, chunksize):
+            yield result
+
+
+def _analyse_file(task):
+    """
+    Run the enabled checks for one file and return the emitted diagnostics
+    as list of compact `Diagnostic` records.
+
+    :task: tuple of the file path, the list of enabled check names,
+           the `ResultCache` or `None`, the content of the file or `None`
+           to read it, the changed line ranges or `None` to report
+           everything and True to profile the analysis
+    :returns: tuple of the diagnostics and the `FileProfile` or `None`
+    """
+    file, enabled_checks, cache, content, ranges, profiling = task
+    f_file = None
+    diagnostics = None
+    profile = None
+    if profiling:
+        from profiler import profile_preprocessing, start_profile
+        profile = start_profile(file)
+
+    if cache is not None:
+        if content is None:
+            with open(file, 'rb') as fortran_file:
+                content = fortran_file.read()
+        key = cache.key(content, enabled_checks, file)
+        diagnostics = cache.get(key, os.path.abspath(file))
+
+    if diagnostics is None:
+        # Loaded first, the checks add their line patterns.
+        checks = ALL_CHECKS.load(enabled_checks)
+        f_file = CodeFile(file, content)
+        if profile is not None:
+            profile_preprocessing(profile, f_file)
+        diagnostics = list(run_checks(f_file, checks, profile,
+                                      enabled_checks))
+
+        if cache is not None:
+            cache.put(key, diagnostics)
+
+    if ranges is not None:
+        from git_changes import filter_touched
+        if f_file is None:
+            f_file = CodeFile(file, content)
+        diagnostics = filter_touched(diagnostics, f_file.scope_tree(), ranges)
+
+    if profile is not None:
+        profile.finish()
+    return diagnostics, profile
+
+
+def _profiled(results, report):
+    """
+    Add the profiles of `results` to the `profiler.ProfileReport` and
+    yield the rest.
+    """
+    for result in results:
+        if result[-1] is not None:
+            report.add(result[-1])
+        yield result[:-1]
+
+
+def _changed_files(args):
+    """
+    Return the changed fortran files and their changed line ranges for
+    `--changed-since` and `--staged`. Explicitly given files limit the
+    result.
+
+    :returns: list of `(path, ranges)`
+    """
+    from git_changes import GitError, changed_ranges
+
+    try:
+        ranges = changed_ranges(args.changed_since, args.staged)
+    except GitError as error:
+        print("git failed: {}".format(error), file=sys.stderr)
+        sys.exit(1)
+
+    if not args.files:
+        return sorted(ranges.items())
+
+    changed = []
+    for file in args.files:
+        path = os.path.realpath(file)
+        if path in ranges:
+            changed.append((file, ranges[path]))
+    return changed
 
 
 def handle_analysis(args):
@@ -21,16 +190,11 @@ def handle_analysis(args):
 
     :args: Command line arguments passed to the command.
     """
-    all_checks = {
-        "implicit-none": CheckImplicitNone,
-        "format-label": CheckFormatLabel,
-    }
 
     # If listing is wanted, only that will be done.
-    if args.list_checks:
-        for name, class_ref in all_checks.items():
-            print("{}: {}".format(name, class_ref.help()))
-            return
+    if args.list_checks or args.list_plugins:
+        _list_rules(ALL_CHECKS, args.list_checks, args.list_plugins)
+        return
 
     # Reaching this point means, static analysis shall be done.
     # There is a default list of checks.
@@ -39,22 +203,125 @@ def handle_analysis(args):
     # Separate the list of checks and ensure they do exist.
     enabled_checks = args.checks.split(",")
     for check in enabled_checks:
-        if check not in all_checks:
+        if check not in ALL_CHECKS:
             print(
                 "Configured check '{}' does not exist!".format(check),
                 file=sys.stderr)
             sys.exit(1)
 
-    if not args.files:
+    user_rules = ()
+    if args.rules:
+        try:
+            user_rules = load_user_rules(args.rules)
+        except UserRuleError as error:
+            print("Invalid user rules: {}".format(error), file=sys.stderr)
+            sys.exit(1)
+        if "user-rules" not in enabled_checks:
+            enabled_checks.append("user-rules")
+
+    incremental = args.changed_since or args.staged
+    if not args.files and not incremental:
         print("Provide at least one file for analysis!", file=sys.stderr)
         sys.exit(1)
 
-    for file in args.files:
-        f_file = CodeFile(file)
-        for check in enabled_checks:
-            check_instance = all_checks[check](f_file)
-            check_instance.check()
-            check_instance.report()
+    profiling = args.profile or args.profile_json is not None
+    report = _profile_report(profiling)
+
+    cache = None
+    if args.cache_dir:
+        from result_cache import ResultCache, DEFAULT_MAX_SIZE
+        max_size = args.cache_size * 1024 * 1024 if args.cache_size \
+            else DEFAULT_MAX_SIZE
+        cache = ResultCache(args.cache_dir, max_size,
+                            ALL_CHECKS.identity(enabled_checks) + "\0" +
+                            rules_digest(user_rules))
+
+    if incremental:
+        changed = _changed_files(args)
+        if args.staged:
+            from git_changes import StagedBlobReader
+            # Analyse the staged content, not the work tree.
+            with StagedBlobReader() as reader:
+                tasks = [(file, enabled_checks, cache, reader.read(file),
+                          ranges, profiling) for file, ranges in changed]
+        else:
+            tasks = [(file, enabled_checks, cache, None, ranges, profiling)
+                     for file, ranges in changed]
+    else:
+        tasks = [(file, enabled_checks, cache, None, None, profiling)
+                 for file in args.files]
+
+    limit = DiagnosticLimit(args.severity, args.max_diagnostics,
+                            args.fail_fast)
+    rules = [(name, ALL_CHECKS.help(name)) for name in enabled_checks]
+    with create_sink(args.output_format, args.output, rules) as sink, \
+            contextlib.closing(_run_parallel(
+                _analyse_file, tasks, args.jobs,
+                _traced_rules(args.trace, ALL_CHECKS),
+                user_rules)) as results:
+        accepted = limit.filter(
+            diagnostics for (diagnostics,) in _profiled(results, report))
+        if args.sort:
+            accepted = sort_diagnostics(accepted)
+        sink.write_all(accepted)
+
+    if cache is not None:
+        cache.evict()
+
+    if profiling:
+        report.write(sys.stderr, args.profile_json, _profile_top(args))
+
+    if limit.stopped():
+        print("Stopped after {} diagnostics.".format(limit.count()),
+              file=sys.stderr)
+        if args.fail_fast:
+            sys.exit(1)
+
+
+def _format_file(task):
+    """
+    Apply the enabled formatters in order to one file and write it back,
+    if anything changed.
+
+    :task: tuple of the file path, the list of enabled formatter names,
+           True if the file is only checked and must not be written,
+           True to build the unified diff of a checked file and True to
+           profile the formatting
+    :returns: tuple of the path, True if the formatting changed the file,
+              the unified diff of the change (empty if not requested) and
+              the `FileProfile` or `None`
+    """
+    from format.utility import run_formatters
+
+    file, enabled_formatters, check_only, with_diff, profiling = task
+    profile = None
+    if profiling:
+        from profiler import profile_preprocessing, start_profile
+        profile = start_profile(file)
+    # Loaded first, the formatters add their line patterns.
+    formatters = ALL_FORMATTERS.load(enabled_formatters)
+    f_file = CodeFile(file)
+    if profile is not None:
+        profile_preprocessing(profile, f_file)
+    # The view stays valid on the unformatted content.
+    original_lines = f_file.original_lines() if with_diff else None
+    edits = run_formatters(f_file, formatters, profile)
+    diff = ""
+    if edits and not check_only:
+        if profile is None:
+            f_file.write()
+        else:
+            with profile.time("write"):
+                f_file.write()
+    elif edits and with_diff:
+        import difflib
+        diff = "".join(difflib.unified_diff(
+            list(original_lines), list(f_file.original_lines()),
+            fromfile=file, tofile=file))
+
+    if profile is not None:
+        profile.finish()
+    return f_file.path(), bool(edits), diff, profile
 
 
 def handle_formatting(args):
@@ -63,16 +330,11 @@ def handle_formatting(args):
 
     :args: Command line arguments passed to the command.
     """
-    all_formatters = {
-        "align-double-colon": FormatAlignColon,
-        "align-trailing-comment": FormatAlignTrailingComment,
-    }
 
     # If listing is wanted, only that will be done.
-    if args.list_formatters:
-        for name, class_ref in all_formatters.items():
-            print("{}: {}".format(name, class_ref.help()))
-            return
+    if args.list_formatters or args.list_plugins:
+        _list_rules(ALL_FORMATTERS, args.list_formatters, args.list_plugins)
+        return
 
     # Reaching this point means, static analysis shall be done.
     # There is a default list of checks.
@@ -81,7 +343,7 @@ def handle_formatting(args):
     # Separate the list of checks and ensure they do exist.
     enabled_formatters = args.formatters.split(",")
     for formatter in enabled_formatters:
-        if formatter not in all_formatters:
+        if formatter not in ALL_FORMATTERS:
             print(
                 "Configured formatter '{}' does not exist!".format(formatter),
                 file=sys.stderr)
@@ -91,15 +353,287 @@ def handle_formatting(args):
         print("Provide at least one file for analysis!", file=sys.stderr)
         sys.exit(1)
 
-    for file in args.files:
-        f_file = CodeFile(file)
-        for formatter in enabled_formatters:
-            format_instance = all_formatters[formatter](f_file)
-            formatted_lines = format_instance.format()
+    check_only = args.check or args.diff
+    profiling = args.profile or args.profile_json is not None
+    report = _profile_report(profiling)
+    tasks = [(file, enabled_formatters, check_only, args.diff, profiling)
+             for file in args.files]
+    unformatted = 0
+    for path, changed, diff in _profiled(
+            _run_parallel(_format_file, tasks, args.jobs,
+                          _traced_rules(args.trace, ALL_FORMATTERS)),
+            report):
+        if not changed:
+            continue
+        unformatted += 1
+        if args.diff:
+            sys.stdout.write(diff)
+        elif args.check:
+            print("Would reformat {}".format(path))
+
+    if profiling:
+        report.write(sys.stderr, args.profile_json, _profile_top(args))
+
+    if args.check and unformatted:
+        sys.exit(1)
+
+
+def handle_dependencies(args):
+    """
+    Print the module dependency graph of the files or the dependents of
+    a module.
+
+    :args: Command line arguments passed to the command.
+    """
+    from module_graph import ModuleGraph, scan_file
+
+    if not args.files:
+        print("Provide at least one file for analysis!", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        graph = ModuleGraph(list(_run_parallel(scan_file, args.files,
+                                               args.jobs)))
+    except OSError as error:
+        print("Could not read the files: {}".format(error), file=sys.stderr)
+        sys.exit(1)
+
+    if args.dependents:
+        module = args.dependents.lower()
+        if module not in graph.edges:
+            print("Module '{}' is not used or defined!".format(module),
+                  file=sys.stderr)
+            sys.exit(1)
+        output = "".join(
+            "{}\n".format(node) if node == graph.paths[node] else
+            "{} ({})\n".format(node, graph.paths[node])
+            for node in sorted(graph.dependents(module)))
+    elif args.output_format == "dot":
+        output = graph.to_dot()
+    elif args.output_format == "json":
+        output = json.dumps(graph.to_json(), indent=2) + "\n"
+    else:
+        output = graph.to_text()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+    else:
+        sys.stdout.write(output)
+
+
+def _index_file(task):
+    """
+    Extract the symbols of one file, if its content changed.
+
+    :task: tuple of the absolute file path and its indexed hash or `None`
+    :returns: the `FileSymbols` or `None` if the file did not change
+    """
+    from symbol_index import extract_symbols, file_digest
+
+    path, digest = task
+    with open(path, "rb") as fortran_file:
+        content = fortran_file.read()
+    if file_digest(content) == digest:
+        return None
+    return extract_symbols(path, content)
+
+
+def handle_index(args):
+    """
+    Update the symbol index with the changed files.
+
+    :args: Command line arguments passed to the command.
+    """
+    import sqlite3
+    from symbol_index import SymbolIndex
+
+    updated = 0
+    removed = 0
+    try:
+        with SymbolIndex(_index_path(args)) as index:
+            known = index.digests()
+            tasks = [(path, known.get(path)) for path
+                     in sorted(set(os.path.abspath(file)
+                                   for file in args.files))]
+            for symbols in _run_parallel(_index_file, tasks, args.jobs):
+                if symbols is not None:
+                    index.update(symbols)
+                    updated += 1
+
+            # Deleted files are dropped, other files stay indexed.
+            for path in known:
+                if not os.path.exists(path):
+                    index.remove(path)
+                    removed += 1
+    except (OSError, sqlite3.Error) as error:
+        print("Could not update the index: {}".format(error),
+              file=sys.stderr)
+        sys.exit(1)
+
+    print("Indexed {} changed of {} files, removed {} files.".format(
+        updated, len(tasks), removed), file=sys.stderr)
+
 
-            f_file.update_lines(formatted_lines)
+def handle_query(args):
+    """
+    Answer a query from the symbol index without reading the sources.
+
+    :args: Command line arguments passed to the command.
+    """
+    from symbol_index import SymbolIndex
+
+    path = _index_path(args)
+    if not os.path.exists(path):
+        print("No index at '{}', create it with 'index' first!".format(
+            path), file=sys.stderr)
+        sys.exit(1)
+
+    with SymbolIndex(path) as index:
+        if args.missing_implicit_none:
+            lines = ["{}: {}-{}: {} {} has no 'implicit none'".format(*row)
+                     for row in index.missing_implicit_none(args.kind)]
+        elif args.label is not None:
+            lines = ["{}: {}: {} of label {} in {}".format(
+                path, line, usage, args.label, unit)
+                     for path, line, usage, unit in index.labels(args.label)]
+        elif args.declaration:
+            lines = ["{}: {}: {} :: {} in {}".format(
+                path, line, type_spec, args.declaration.lower(), unit)
+                     for path, line, type_spec, unit
+                     in index.declarations(args.declaration)]
+        else:
+            lines = ["{}: {}-{}: {} {}".format(*row)
+                     for row in index.units(args.unit, args.kind)]
+
+    for line in lines:
+        print(line)
+
+
+def handle_serve(args):
+    """
+    Run the resident daemon until it is shut down.
+
+    :args: Command line arguments passed to the command.
+    """
+    from flint_client import default_socket_path
+    from server import serve, DEFAULT_MAX_FILES
+
+    # Cached files keep their classification, so every rule is loaded
+    # before the first request.
+    ALL_CHECKS.load(list(ALL_CHECKS))
+    ALL_FORMATTERS.load(list(ALL_FORMATTERS))
+    try:
+        serve(args.socket or default_socket_path(), ALL_CHECKS,
+              ALL_FORMATTERS, args.max_files or DEFAULT_MAX_FILES)
+    except OSError as error:
+        print("Could not start the daemon: {}".format(error), file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def handle_lsp(args):
+    """
+    Run the language server on stdin and stdout until the client exits.
+
+    :args: Command line arguments passed to the command.
+    """
+    from lsp_server import LanguageServer
+
+    checks = args.checks.split(",")
+    formatters = args.formatters.split(",")
+    for check in checks:
+        if check not in ALL_CHECKS:
+            print("Configured check '{}' does not exist!".format(check),
+                  file=sys.stderr)
+            sys.exit(1)
+    for formatter in formatters:
+        if formatter not in ALL_FORMATTERS:
+            print("Configured formatter '{}' does not exist!".format(formatter),
+                  file=sys.stderr)
+            sys.exit(1)
+
+    ALL_CHECKS.load(checks)
+    ALL_FORMATTERS.load(formatters)
+    server = LanguageServer(ALL_CHECKS, ALL_FORMATTERS, checks, formatters)
+    sys.exit(server.run())
+
+
+def _list_rules(rules: RuleRegistry, builtin: bool, plugins: bool):
+    """
+    Print the names and help texts of the built-in rules and the rules of
+    the installed plugins. Only listing plugins searches for them.
+    """
+    names = []
+    if builtin:
+        names += rules.builtin_names()
+    if plugins:
+        names += rules.plugin_names()
+    for name in names:
+        print("{}: {}".format(name, rules.help(name)))
+
+
+def _profile_report(profiling: bool):
+    """Return a new `profiler.ProfileReport` if profiling, else `None`."""
+    if not profiling:
+        return None
+    from profiler import ProfileReport
+    return ProfileReport()
+
+
+def _profile_top(args):
+    """Return the number of slowest files in the profile."""
+    from profiler import DEFAULT_TOP
+    return args.profile_top or DEFAULT_TOP
+
+
+def _index_path(args):
+    """Return the path of the symbol index database."""
+    from symbol_index import DEFAULT_INDEX
+    return args.index or DEFAULT_INDEX
 
-        f_file.write()
+
+def _traced_rules(names: list, rules: dict):
+    """
+    Return the dict of the traced rule names and their classes.
+
+    :names: names given with `--trace` or `None`
+    :rules: all rules of the subcommand
+    """
+    traced = {}
+    for name in names or ():
+        if name not in rules:
+            print("Traced rule '{}' does not exist!".format(name),
+                  file=sys.stderr)
+            sys.exit(1)
+        traced[name] = rules[name]
+    return traced
+
+
+def _add_profile_arguments(parser):
+    """Add the profiling options to the `parser` of a subcommand."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time of every phase, the slowest files and the "
+        "statistics of the line patterns to stderr.")
+    parser.add_argument(
+        "--profile-json",
+        type=str,
+        metavar="FILE",
+        help="Profile and write the report as JSON to FILE.")
+    parser.add_argument(
+        "--profile-top",
+        type=_positive_int,
+        help="Number of slowest files in the profile.")
+    parser.add_argument(
+        "--trace",
+        type=str,
+        action="append",
+        metavar="RULE",
+        help="Write the decisions of the rule for every line as JSON "
+        "lines to stderr. Can be given several times.")
 
 
 def main():
@@ -107,6 +641,8 @@ def main():
     Run the configured static analysis over a specified list of files.
     """
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--version", action="version", version="%(prog)s " + __version__)
     subparser = parser.add_subparsers()
 
     parse_check = subparser.add_parser("check", help="do static analysis")
@@ -119,7 +655,74 @@ def main():
     parse_check.add_argument(
         "--list-checks",
         action="store_true",
-        help="List all available checks.")
+        help="List all built-in checks.")
+    parse_check.add_argument(
+        "--list-plugins",
+        action="store_true",
+        help="List the checks of the installed plugins.")
+    parse_check.add_argument(
+        "--rules",
+        type=str,
+        metavar="FILE",
+        help="JSON file of user defined line rules, enables the check "
+        "'user-rules'.")
+    parse_check.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of files to analyse in parallel. "
+        "Defaults to the number of CPUs.")
+    parse_check.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory to cache the diagnostics of unchanged files in.")
+    parse_check.add_argument(
+        "--cache-size",
+        type=_positive_int,
+        help="Size limit of the cache directory in MB.")
+    incremental = parse_check.add_mutually_exclusive_group()
+    incremental.add_argument(
+        "--changed-since",
+        type=str,
+        metavar="REV",
+        help="Analyse only fortran files changed since the git revision "
+        "and report only diagnostics in changed program units.")
+    incremental.add_argument(
+        "--staged",
+        action="store_true",
+        help="Analyse the staged content of changed fortran files and "
+        "report only diagnostics in changed program units.")
+    parse_check.add_argument(
+        "--severity",
+        choices=SEVERITIES,
+        default=SEVERITIES[0],
+        help="Report only diagnostics of this or a more severe category.")
+    parse_check.add_argument(
+        "--max-diagnostics",
+        type=_positive_int,
+        help="Stop after this number of diagnostics.")
+    parse_check.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop after the first file with a diagnostic and exit with 1.")
+    parse_check.add_argument(
+        "--sort",
+        action="store_true",
+        help="Sort all diagnostics by file and line, instead of reporting "
+        "them as soon as a file is analysed.")
+    parse_check.add_argument(
+        "--output-format",
+        choices=sorted(SINKS),
+        default="text",
+        help="Format of the diagnostics, 'jsonl' writes one JSON object "
+        "per line.")
+    parse_check.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="File to write the diagnostics to. Defaults to stderr for "
+        "text and stdout for the other formats.")
     parse_check.add_argument(
         "files", nargs="*", help="List of fortran files to analyse")
     parse_check.set_defaults(func=handle_analysis)
@@ -128,17 +731,149 @@ def main():
     parse_format.add_argument(
         "--list-formatters",
         action="store_true",
-        help="List all available formatters.")
+        help="List all built-in formatters.")
+    parse_format.add_argument(
+        "--list-plugins",
+        action="store_true",
+        help="List the formatters of the installed plugins.")
     parse_format.add_argument(
         "-f",
         "--formatters",
         type=str,
         default="align-double-colon,align-trailing-comment",
         help="Comma separated list of formatters to apply in the given order.")
+    parse_format.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of files to format in parallel. "
+        "Defaults to the number of CPUs.")
+    parse_format.add_argument(
+        "--check",
+        action="store_true",
+        help="Do not write the files, exit with 1 if any file would be "
+        "reformatted.")
+    parse_format.add_argument(
+        "--diff",
+        action="store_true",
+        help="Do not write the files, print a unified diff of the changes.")
     parse_format.add_argument(
         "files", nargs="*", help="List of fortran files to analyse")
     parse_format.set_defaults(func=handle_formatting)
 
+    parse_deps = subparser.add_parser(
+        "deps", help="Print the module dependency graph")
+    parse_deps.add_argument(
+        "--output-format",
+        choices=["dot", "json", "text"],
+        default="text",
+        help="Format of the graph, 'json' includes the cycles and the "
+        "files in dependency order.")
+    parse_deps.add_argument(
+        "--dependents",
+        type=str,
+        metavar="MODULE",
+        help="Only print the modules and files, that use MODULE directly "
+        "or indirectly.")
+    parse_deps.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of files to scan in parallel. "
+        "Defaults to the number of CPUs.")
+    parse_deps.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="File to write the graph to instead of stdout.")
+    parse_deps.add_argument(
+        "files", nargs="*", help="List of fortran files to scan")
+    parse_deps.set_defaults(func=handle_dependencies)
+
+    parse_index = subparser.add_parser(
+        "index", help="Update the symbol index of the files")
+    parse_index.add_argument(
+        "--index",
+        type=str,
+        help="Path of the index database.")
+    parse_index.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of files to index in parallel. "
+        "Defaults to the number of CPUs.")
+    parse_index.add_argument(
+        "files", nargs="*", help="List of fortran files to index")
+    parse_index.set_defaults(func=handle_index)
+
+    parse_query = subparser.add_parser(
+        "query", help="Query the symbol index")
+    parse_query.add_argument(
+        "--index",
+        type=str,
+        help="Path of the index database.")
+    query = parse_query.add_mutually_exclusive_group()
+    query.add_argument(
+        "--unit",
+        type=str,
+        metavar="NAME",
+        help="Print the program units with this name. Without a query "
+        "all units are printed.")
+    query.add_argument(
+        "--missing-implicit-none",
+        action="store_true",
+        help="Print the program units without 'implicit none'.")
+    query.add_argument(
+        "--label",
+        type=int,
+        help="Print the definitions and uses of the statement label.")
+    query.add_argument(
+        "--declaration",
+        type=str,
+        metavar="NAME",
+        help="Print the declarations of the variable.")
+    parse_query.add_argument(
+        "--kind",
+        choices=["function", "module", "program", "subroutine"],
+        help="Only print program units of this kind, for --unit and "
+        "--missing-implicit-none.")
+    parse_query.set_defaults(func=handle_query)
+
+    parse_serve = subparser.add_parser(
+        "serve", help="Run a daemon that answers requests of flint_client.py")
+    parse_serve.add_argument(
+        "-s",
+        "--socket",
+        type=str,
+        help="Path of the unix socket to listen on.")
+    parse_serve.add_argument(
+        "--max-files",
+        type=_positive_int,
+        help="Number of files kept in memory.")
+    parse_serve.set_defaults(func=handle_serve)
+
+    parse_lsp = subparser.add_parser(
+        "lsp", help="Run a language server on stdin and stdout")
+    parse_lsp.add_argument(
+        "-c",
+        "--checks",
+        type=str,
+        default="implicit-none,format-label",
+        help="Comma separated list of checks to enable.")
+    parse_lsp.add_argument(
+        "-f",
+        "--formatters",
+        type=str,
+        default="align-double-colon,align-trailing-comment",
+        help="Comma separated list of formatters to apply in the given order.")
+    parse_lsp.set_defaults(func=handle_lsp)
+
+    for subcommand in (parse_check, parse_format):
+        _add_profile_arguments(subcommand)
+
     args = parser.parse_args()
 
     if vars(args):
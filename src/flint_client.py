@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Thin client for the resident `flint.py serve` daemon.
+
+It only imports the standard library modules that are necessary to talk
+to the daemon, so that editor and pre-commit calls start fast.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+def default_socket_path():
+    """Return the per user default path of the daemon socket."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "flint.sock")
+    return os.path.join("/tmp", "flint-{}.sock".format(os.getuid()))
+
+
+def request(socket_path: str, message: dict):
+    """
+    Send one request to the daemon and return its response. A missing or
+    invalid response is returned as error.
+
+    :message: dict: request, it is sent as one line of JSON
+    :returns: dict: response of the daemon
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        connection.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    reply = b"".join(chunks)
+    if not reply.strip():
+        return {"error": "The flint daemon closed the connection without "
+                         "a response"}
+    try:
+        response = json.loads(reply.decode())
+    except ValueError as error:
+        return {"error": "Invalid response of the flint daemon: {}".format(
+            error)}
+    if not isinstance(response, dict):
+        return {"error": "Invalid response of the flint daemon: {!r}".format(
+            response)}
+    return response
+
+
+def main():
+    """Forward the command line to the daemon and print its answer."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=str,
+        default=default_socket_path(),
+        help="Socket of the running daemon.")
+    subparser = parser.add_subparsers(dest="command")
+
+    parse_check = subparser.add_parser("check", help="do static analysis")
+    parse_check.add_argument(
+        "-c",
+        "--checks",
+        type=str,
+        default="implicit-none,format-label",
+        help="Comma separated list of checks to enable.")
+    parse_check.add_argument(
+        "files", nargs="+", help="List of fortran files to analyse")
+
+    parse_format = subparser.add_parser("format", help="Format Code")
+    parse_format.add_argument(
+        "-f",
+        "--formatters",
+        type=str,
+        default="align-double-colon,align-trailing-comment",
+        help="Comma separated list of formatters to apply in the given order.")
+    parse_format.add_argument(
+        "files", nargs="+", help="List of fortran files to format")
+
+    subparser.add_parser("shutdown", help="Stop the daemon")
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_usage()
+        sys.exit(1)
+
+    message = {"command": args.command}
+    if args.command == "check":
+        message["checks"] = args.checks.split(",")
+    if args.command == "format":
+        message["formatters"] = args.formatters.split(",")
+    if args.command in ("check", "format"):
+        # The daemon runs in another working directory.
+        message["files"] = [os.path.abspath(file) for file in args.files]
+
+    try:
+        response = request(args.socket, message)
+    except OSError as error:
+        print("Could not reach the flint daemon at '{}': {}".format(
+            args.socket, error), file=sys.stderr)
+        sys.exit(1)
+
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+        sys.exit(1)
+
+    for diagnostic in response.get("diagnostics", []):
+        print("{}: {}: {}: {}".format(*diagnostic[:4]), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
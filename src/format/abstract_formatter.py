@@ -5,8 +5,9 @@ Define the abstract interface of formatters.
 """
 
 import abc
-import copy
 from file_io import FortranCode
+from format.utility import LineEdits, run_block_formatters
+from tracing import tracer, trace_block_formatter
 
 
 class AbstractFormatter(object):
@@ -16,9 +17,18 @@ class AbstractFormatter(object):
 
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self, f_file: FortranCode):
+    def __init__(self, f_file: FortranCode, lines: LineEdits = None):
+        """
+        :lines: view of the lines to format, shared with other formatters
+                running before and after this one. A new view of the
+                lines of `f_file` is created if not given.
+        """
         self._f_file = f_file
-        self._formatted_lines = copy.deepcopy(self._f_file.original_lines())
+        if lines is None:
+            lines = LineEdits(f_file.original_lines())
+        self._formatted_lines = lines
+        # `tracing.Tracer` if the formatter is traced, otherwise `None`.
+        self._trace = tracer(self, f_file)
 
     @classmethod
     def help(self):
@@ -26,7 +36,78 @@ class AbstractFormatter(object):
 
     @abc.abstractmethod
     def format(self):
+        """Format the lines and return the dict of changed lines."""
         pass
 
     def formatted_lines(self):
-        return self._formatted_lines
+        return list(self._formatted_lines)
+
+    def edits(self):
+        """Return the dict of line index to changed line."""
+        return self._formatted_lines.edits()
+
+
+class BlockFormatter(AbstractFormatter):
+    """
+    Interface for formatters that only change lines within blocks of
+    subsequent lines, like aligned declarations.
+
+    The lines are scanned for blocks with `scan_line`, every closed block
+    is formatted with `align_block`. Block formatters that run after each
+    other are fused: the file is traversed once for all of them, see
+    `format.utility.run_block_formatters`.
+    """
+
+    block_local = True
+
+    def __init__(self, f_file: FortranCode, lines: LineEdits = None):
+        super(BlockFormatter, self).__init__(f_file, lines)
+        self._block_start = -1
+        self._block_end = -1
+        if self._trace is not None:
+            trace_block_formatter(self, self._trace)
+
+    def format(self):
+        run_block_formatters([self], self._f_file.line_info())
+        return self.edits()
+
+    @abc.abstractmethod
+    def scan_line(self, i: int, info):
+        """
+        Advance the block detection by line `i` with the `LineInfo` `info`.
+
+        :returns: `(start, end)` of the block closed by this line or `None`
+        """
+        pass
+
+    @abc.abstractmethod
+    def align_block(self, start: int, end: int):
+        """Format the lines `[start, end)` of a closed block."""
+        pass
+
+    def finish(self, line_info: list):
+        """Called once all lines are scanned and all blocks are aligned."""
+        pass
+
+    def open_block_start(self):
+        """Return the first line of the currently open block or `None`."""
+        return self._block_start if self._block_start >= 0 else None
+
+    def _start_or_advance_block(self, i: int):
+        """Start a block at line `i` or advance the open one to it."""
+        if self._block_start < 0:
+            self._block_start = i
+        self._block_end = i + 1
+
+    def _close_block(self):
+        """End the open block and return its `(start, end)`."""
+        assert self._block_start >= 0
+        assert self._block_end > 0
+        block = (self._block_start, self._block_end)
+        self._reset_block()
+        return block
+
+    def _reset_block(self):
+        """Drop the open block without formatting it."""
+        self._block_start = -1
+        self._block_end = -1
@@ -16,18 +16,18 @@ real(8)    :: some_real
 ```
 """
 
-import logging
 import re
 
-from common_matcher import match_line, match_blank_line, match_commented_line
-from common_matcher import match_ignore_single, match_ignore_start,\
-                           match_ignore_end
+from common_matcher import match_line, match_commented_line,\
+                           match_ignore_single, LINE_MATCHER
 from file_io import CodeFile
-from format.abstract_formatter import AbstractFormatter
+from format.abstract_formatter import BlockFormatter
 from format.align import insert_whitespace, find_anchor
-from format.utility import overwrite_lines
+from format.utility import overwrite_lines, LineEdits
+from line_classification import LINE_COMMENT
 
 __regex_variable_colon = re.compile(r'[^!]+::(.*)$')
+LINE_MATCHER.register("variable-colon", __regex_variable_colon, ("::",))
 
 
 def _match_variable_colon(line):
@@ -71,7 +71,7 @@ def _align_colons(lines: list):
     return formatted_lines
 
 
-class FormatAlignColon(AbstractFormatter):
+class FormatAlignColon(BlockFormatter):
     """
     ```fortran
     integer(8) :: some_int
@@ -93,79 +93,36 @@ class FormatAlignColon(AbstractFormatter):
     Formatting will ignore lines that start with a comment.
     """
 
-    def __init__(self, f_file: CodeFile):
-        AbstractFormatter.__init__(self, f_file)
-
-        self._log = logging.getLogger(__file__ + "::align_colon")
+    def __init__(self, f_file: CodeFile, lines: LineEdits = None):
+        BlockFormatter.__init__(self, f_file, lines)
 
     @classmethod
     def help(self):
         return "Align the double colons of subsequent variable definitions."
 
-    def format(self):
-        in_decl_list = False
-        in_ignore = False
-        decl_start = -1
-        decl_end = -1
-
-        for (i, line) in enumerate(self._formatted_lines):
-            self._log.debug("Line: {}".format(line))
-
-            # Check if the deactivation mechanism matches
-            if match_ignore_start(line):
-                self._log.debug("start block ignore")
-                in_ignore = True
-
-                in_decl_list = False
-                decl_start = -1
-                decl_end = -1
-                continue
-
-            if in_ignore:
-                if match_ignore_end(line):
-                    self._log.debug("end block ignore")
-                    in_ignore = False
-                continue
-
-            # Start a declaration section if necessary.
-            # If already in a declaration section, continue.
-            if _match_variable_colon(line):
-                self._log.debug("Found variable declaration with double colon")
-
-                # Either start a declaration section...
-                if not in_decl_list:
-                    self._log.debug("Starting new decl section at line %d" % i)
-                    decl_start = i
-                    decl_end = i + 1
-                    in_decl_list = True
-                # ... or advance its end.
-                else:
-                    self._log.debug("advancing decl section to line %d" %
-                                    (i + 1))
-                    decl_end = i + 1
-                continue
-
-            # Comments in declaration sections are ignored.
-            if match_commented_line(line):
-                if in_decl_list:
-                    self._log.debug(
-                        "skipping comment/blank line in decl section")
-                    continue
-
-            # Reaching this line means we are within a declaration section
-            # but found neither a declaration line nor a blank/comment line.
-            # This means regular code has been reached.
-            if in_decl_list:
-                self._log.debug("ending declaration section")
-                in_decl_list = False
-                assert decl_start > 0
-                assert decl_end > 0
-                new = _align_colons(self._formatted_lines[decl_start:decl_end])
-
-                overwrite_lines(self._formatted_lines, new, decl_start,
-                                decl_end)
-
-                decl_start = -1
-                decl_end = -1
-
-        return self.formatted_lines()
+    def scan_line(self, i: int, info):
+        # Check if the deactivation mechanism matches
+        if info.ignored:
+            self._reset_block()
+            return None
+
+        # Start a declaration section if necessary.
+        # If already in a declaration section, advance its end.
+        if "variable-colon" in info.matches:
+            self._start_or_advance_block(i)
+            return None
+
+        # Comments in declaration sections are ignored.
+        if info.kind == LINE_COMMENT:
+            return None
+
+        # Reaching this line means we are within a declaration section
+        # but found neither a declaration line nor a blank/comment line.
+        # This means regular code has been reached.
+        if self.open_block_start() is not None:
+            return self._close_block()
+        return None
+
+    def align_block(self, start: int, end: int):
+        new = _align_colons(self._formatted_lines[start:end])
+        overwrite_lines(self._formatted_lines, new, start, end)
@@ -25,15 +25,14 @@ real(8) :: some_real       ! alskdj
 
 import logging
 import re
-from common_matcher import match_line, match_blank_line, match_commented_line
-from common_matcher import match_ignore_start, match_ignore_end
+from common_matcher import match_line
 from file_io import CodeFile
-from format.abstract_formatter import AbstractFormatter
-from format.align import insert_whitespace, find_anchor
-from format.utility import overwrite_lines
+from format.abstract_formatter import BlockFormatter
+from format.align import insert_whitespace
+from format.utility import overwrite_lines, LineEdits
+from line_classification import LINE_COMMENT, unterminated_ignore
+from tokenizer import tokenize_line, comment_start, has_trailing_comment
 
-REGEX_TRAILING_COMMENT = re.compile(r'^(.*)([^\\]|\s+)!(.*)$')
-REGEX_EXCLAMATION_IN_STRING = re.compile(r'^.*((".*!.*")|(\'.*!.*\')).*$')
 REGEX_OMP_DIRECTIVE = re.compile(r'^!\$OMP(.*)$')
 
 
@@ -42,9 +41,8 @@ def _match_trailing_comment(line):
     Match if a line contains a comment, but not only whitespace
     if front of the comment.
     """
-    res = not match_commented_line(line) and \
-          match_line(REGEX_TRAILING_COMMENT, line)
-    return res
+    segments, _ = tokenize_line(line)
+    return has_trailing_comment(line, segments)
 
 
 def _match_omp_directive(line):
@@ -55,19 +53,23 @@ def _match_omp_directive(line):
     return match_line(REGEX_OMP_DIRECTIVE, line)
 
 
-def _align_comments(lines: list):
+def _align_comments(lines: list, comment_columns: list = None):
     """
     Algorithm to align the trailing comments of ssubsequent lines is same
     as for `_align_colons`.
     Ignore OMP directives while aligning
+
+    :comment_columns: list of the column each comment starts at, the
+                      lines are tokenized if not given
     """
     if len(lines) == 0:
         return []
 
-    comment_posi = find_anchor(
-        lines,
-        "!",
-        skip_func=_match_omp_directive)
+    if comment_columns is None:
+        comment_columns = [comment_start(tokenize_line(line)[0])
+                           for line in lines]
+    comment_posi = [-1 if _match_omp_directive(line) else column
+                    for line, column in zip(lines, comment_columns)]
     (max_comment, max_line) = max((v, i) for i, v in enumerate(comment_posi))
 
     formatted_lines = []
@@ -80,7 +82,7 @@ def _align_comments(lines: list):
     return formatted_lines
 
 
-class FormatAlignTrailingComment(AbstractFormatter):
+class FormatAlignTrailingComment(BlockFormatter):
     """
     Example:
 
@@ -100,79 +102,70 @@ class FormatAlignTrailingComment(AbstractFormatter):
     ! not in sequence
     ```
 
-    Limitation:
-    The formatting will fail if the line contains a string containing a '!'
-    and a trailing comment. This might result in a mess but should be uncommon.
+    Comment lines of fixed-form sources are never aligned.
+    A '!' within a string literal does not start a comment.
     """
 
-    def __init__(self, f_file: CodeFile):
-        super(FormatAlignTrailingComment, self).__init__(f_file)
+    def __init__(self, f_file: CodeFile, lines: LineEdits = None):
+        super(FormatAlignTrailingComment, self).__init__(f_file, lines)
         self._log = logging.getLogger(__file__ + "::align_trailing_comment")
+        # Full-line comments of fixed-form sources start in the first
+        # column, indented they would become code.
+        self._fixed_form = f_file.fixed_form()
 
     @classmethod
     def help(self):
         return "Align subsequent trailing comments. End with blank or non-comment line"
 
-    def format(self):
-        in_sequence = False
-        in_ignore = False
-        seq_start = -1
-        seq_end = -1
-
-        for (i, line) in enumerate(self._formatted_lines):
-            if match_ignore_start(line):
-                in_ignore = True
-
-                in_sequence = False
-                seq_start = -1
-                seq_end = -1
-                continue
-
-            if in_ignore:
-                if match_ignore_end(line):
-                    in_ignore = False
-                continue
-
-            # Start a sequence if there is a trailing comment.
-            if not in_sequence and _match_trailing_comment(line):
-                self._log.debug("starting sequence at %d" % i)
-                seq_start = i
-                seq_end = i + 1
-                in_sequence = True
-                continue
-
-            # Advance sequence for a following trailing comment.
-            elif in_sequence and _match_trailing_comment(line):
-                self._log.debug("advancing sequence to %d" % (i + 1))
-                seq_end = i + 1
-                continue
-
-            # Maybe there is a continuation comment, align that, too.
-            elif in_sequence and match_commented_line(line):
-                self._log.debug("advancing sequence to %d" % (i + 1))
-                seq_end = i + 1
-                continue
-
-            # End the sequence for every other line.
-            elif in_sequence:
-                self._log.debug("ending sequence at %d" % i)
-                assert seq_start > 0
-                assert seq_end > 0
-                # Align all trailing comments
-                new = _align_comments(self._formatted_lines[seq_start:seq_end])
-
-                overwrite_lines(self._formatted_lines, new, seq_start, seq_end)
-
-                # End sequence
-                in_sequence = False
-                seq_start = -1
-                seq_end = -1
-                continue
-
-            # Ignore the rest of possible lines
-            continue
-
-        if in_ignore:
+    def _comment_columns(self, tokens: list, start: int, end: int):
+        """
+        Return the comment columns of the lines `[start, end)` from the
+        cached tokens. Lines that were edited by previous formatters or
+        changed their length by lowercasing are tokenized again, because
+        the cached columns do not fit.
+        """
+        columns = []
+        insensitive = self._f_file.insensitive_lines()
+        for i in range(start, end):
+            line = self._formatted_lines[i]
+            if not self._formatted_lines.is_edited(i) and \
+                    len(line) == len(insensitive[i]):
+                columns.append(comment_start(tokens[i]))
+            else:
+                columns.append(comment_start(tokenize_line(line)[0]))
+        return columns
+
+    def scan_line(self, i: int, info):
+        if info.ignored:
+            self._reset_block()
+            return None
+
+        # Start or advance a sequence if there is a trailing comment.
+        if info.trailing_comment:
+            self._start_or_advance_block(i)
+            return None
+
+        in_sequence = self.open_block_start() is not None
+        # Maybe there is a continuation comment, align that, too.
+        if in_sequence and info.kind == LINE_COMMENT and \
+                not self._fixed_form:
+            self._start_or_advance_block(i)
+            return None
+
+        # End the sequence for every other line.
+        if in_sequence:
+            return self._close_block()
+
+        # Ignore the rest of possible lines
+        return None
+
+    def align_block(self, start: int, end: int):
+        # Align all trailing comments
+        new = _align_comments(
+            self._formatted_lines[start:end],
+            self._comment_columns(self._f_file.tokens(), start, end))
+        overwrite_lines(self._formatted_lines, new, start, end)
+
+    def finish(self, line_info: list):
+        if unterminated_ignore(line_info):
             self._log.warn("Missing end of ignore sequence!")
-
-        return self.formatted_lines()
@@ -4,8 +4,9 @@
 Implement unit tests for the formatter to align trailing comments.
 """
 
+from os.path import dirname, join
 import unittest
-from file_io import FortranCode
+from file_io import CodeFile, FortranCode
 from format_trailing_comment import _match_trailing_comment,\
                                     _match_omp_directive, _align_comments
 from format_trailing_comment import FormatAlignTrailingComment
@@ -18,9 +19,8 @@ class TestFormatTrailingComment(unittest.TestCase):
         self.assertTrue(_match_trailing_comment(" alskdjlk!ljasd "))
         self.assertTrue(_match_trailing_comment(" \"alskdjlk\" !ljasd "))
         self.assertTrue(_match_trailing_comment(" 'alskdjlk' !ljasd "))
-        # Its all just for fun...
-        # self.assertTrue(_match_trailing_comment(" \"alskdjlk ! \" !ljasd "))
-        # self.assertTrue(_match_trailing_comment(" 'alskdjlk ! ' !ljasd "))
+        self.assertTrue(_match_trailing_comment(" \"alskdjlk ! \" !ljasd "))
+        self.assertTrue(_match_trailing_comment(" 'alskdjlk ! ' !ljasd "))
         self.assertTrue(_match_trailing_comment(" \"\" !ljasd "))
         self.assertTrue(_match_trailing_comment(" '' !ljasd "))
 
@@ -29,8 +29,8 @@ class TestFormatTrailingComment(unittest.TestCase):
         self.assertFalse(_match_trailing_comment("  !alksjlkd"))
         self.assertFalse(_match_trailing_comment("  \\!alksjlkd"))
         self.assertFalse(_match_trailing_comment("  \\!"))
-        # self.assertFalse(_match_trailing_comment("  \" asdlkj!\""))
-        # self.assertFalse(_match_trailing_comment("  ' asdlkj!' asd"))
+        self.assertFalse(_match_trailing_comment("  \" asdlkj!\""))
+        self.assertFalse(_match_trailing_comment("  ' asdlkj!' asd"))
         self.assertFalse(_match_trailing_comment("  \"\""))
         self.assertFalse(_match_trailing_comment("  ''"))
 
@@ -85,3 +85,21 @@ class TestFormatTrailingComment(unittest.TestCase):
             "   integer(2)     :: flag3  ! and have some weird code\n",
         ]
         self.assertListEqual(expec, _align_comments(lines))
+
+    def test_fixed_form_comment_lines(self):
+        f_file = CodeFile(
+            join(dirname(__file__), "../../test/format/format_fixed_form.f"))
+        f = FormatAlignTrailingComment(f_file)
+        f.format()
+
+        expected = [
+            "      subroutine comp(x)\n",
+            "      implicit none\n",
+            "      real x        ! the value\n",
+            "      integer n     ! the count\n",
+            "C     a comment line\n",
+            "*     another comment line\n",
+            "      x = 1.0\n",
+            "      end subroutine comp\n",
+        ]
+        self.assertListEqual(expected, list(f.formatted_lines()))
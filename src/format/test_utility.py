@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the shared formatting utilities.
+"""
+
+import unittest
+from file_io import FortranCode
+from format.utility import LineEdits, run_formatters
+from format.format_align_colon import FormatAlignColon
+from format.format_trailing_comment import FormatAlignTrailingComment
+
+
+class TestLineEdits(unittest.TestCase):
+    def test_copy_on_write(self):
+        original = ["a\n", "b\n", "c\n"]
+        lines = LineEdits(original)
+        lines[1] = "B\n"
+        lines[2] = "c\n"
+
+        self.assertEqual(["a\n", "B\n", "c\n"], list(lines))
+        self.assertEqual(["B\n", "c\n"], lines[1:])
+        self.assertDictEqual({1: "B\n"}, lines.edits())
+        self.assertEqual(["a\n", "b\n", "c\n"], original)
+
+        lines[1] = "b\n"
+        self.assertFalse(lines.is_edited(1))
+
+
+class TestRunFormatters(unittest.TestCase):
+    def test_chain(self):
+        code = FortranCode([
+            "integer(8) :: a ! first\n",
+            "real :: b ! second\n",
+            "b = 1.0\n",
+        ])
+        edits = run_formatters(
+            code, [FormatAlignColon, FormatAlignTrailingComment])
+
+        expec = [
+            "integer(8) :: a ! first\n",
+            "real       :: b ! second\n",
+            "b = 1.0\n",
+        ]
+        self.assertListEqual(expec, list(code.original_lines()))
+        self.assertListEqual([1], list(edits))
+
+    def test_fused_as_sequential(self):
+        lines = [
+            "integer :: a ! first\n",
+            "real(8) :: b ! second\n",
+            "real(8), dimension(3) :: c\n",
+            "! comment\n",
+            "integer :: d ! third\n",
+            "d = 1\n",
+            "integer(8) :: e ! open at the end\n",
+        ]
+        sequential = FortranCode(lines)
+        for formatter in [FormatAlignColon, FormatAlignTrailingComment]:
+            edits = formatter(sequential).format()
+            sequential.apply_edits(edits)
+
+        fused = FortranCode(lines)
+        run_formatters(fused, [FormatAlignColon, FormatAlignTrailingComment])
+
+        self.assertListEqual(list(sequential.original_lines()),
+                             list(fused.original_lines()))
+        self.assertEqual("integer(8) :: e ! open at the end\n",
+                         fused.original_lines()[6])
+
+
+if __name__ == "__main__":
+    unittest.main()
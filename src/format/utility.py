@@ -4,8 +4,156 @@
 Utility functions that are necessary for formatting.
 """
 
+import collections
+import collections.abc
+
 
 def overwrite_lines(overwritee: list, overwriter: list, start: int, end: int):
     # Overwrite for formatting.
     for new_line_idx, old_line_idx in enumerate(range(start, end)):
         overwritee[old_line_idx] = overwriter[new_line_idx]
+
+
+class LineEdits(collections.abc.Sequence):
+    """
+    Copy on write view of lines. Reading returns the edited line or the
+    original one, writing only records the changed line.
+    All formatters of a run share one view, the edits are applied to the
+    code once at the end.
+    """
+
+    def __init__(self, lines):
+        """:lines: sequence of the original lines, it is not modified."""
+        self._lines = lines
+        self._edits = {}
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        line = self._edits.get(index)
+        return self._lines[index] if line is None else line
+
+    def __setitem__(self, index: int, line: str):
+        if index < 0:
+            index += len(self)
+        if line == self._lines[index]:
+            self._edits.pop(index, None)
+        else:
+            self._edits[index] = line
+
+    def __iter__(self):
+        edits = self._edits
+        for i, line in enumerate(self._lines):
+            yield edits.get(i, line)
+
+    def __eq__(self, other):
+        if isinstance(other, (LineEdits, list, tuple)):
+            return len(self) == len(other) and \
+                   all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def is_edited(self, index: int):
+        """Return True if the line with `index` was changed."""
+        return index in self._edits
+
+    def edits(self):
+        """Return the dict of line index to changed line."""
+        return self._edits
+
+
+def run_formatters(code, formatter_classes: list, profile=None):
+    """
+    Run the formatters in order over one shared `LineEdits` view of `code`
+    and apply all edits to it at the end. Subsequent block local
+    formatters are fused into one traversal of the lines.
+
+    With a `profiler.FileProfile` every formatter is timed on its own, so
+    they are not fused. The result is the same.
+
+    Formatters only align code with whitespace, that keeps the
+    classification of all lines. So every formatter can work with the
+    tokens and classification of the original code.
+
+    :code: `file_io.FortranCode` to format
+    :formatter_classes: list of `AbstractFormatter` subclasses
+    :returns: dict of line index to changed line
+    """
+    lines = LineEdits(code.original_lines())
+    if profile is not None:
+        for formatter_class in formatter_classes:
+            with profile.time("format " + formatter_class.__name__):
+                formatter_class(code, lines).format()
+        with profile.time("apply edits"):
+            code.apply_edits(lines.edits())
+        return lines.edits()
+
+    fused = []
+    for formatter_class in formatter_classes:
+        formatter = formatter_class(code, lines)
+        if getattr(formatter, "block_local", False):
+            fused.append(formatter)
+            continue
+        if fused:
+            run_block_formatters(fused, code.line_info())
+            fused = []
+        formatter.format()
+    if fused:
+        run_block_formatters(fused, code.line_info())
+
+    edits = lines.edits()
+    code.apply_edits(edits)
+    return edits
+
+
+def run_block_formatters(formatters: list, line_info: list):
+    """
+    Run block local formatters with one traversal of the lines.
+
+    Every line is passed to the block detection of all formatters. A
+    closed block is aligned as soon as no block of a formatter earlier in
+    the list, that overlaps it, is pending or still open. The result is
+    the same as running the formatters after each other.
+    Blocks that are still open at the end of the file are not aligned.
+
+    :formatters: list of `BlockFormatter` instances in configured order
+    :line_info: classification of every line
+    """
+    pending = [collections.deque() for _ in formatters]
+
+    for i, info in enumerate(line_info):
+        for formatter, blocks in zip(formatters, pending):
+            block = formatter.scan_line(i, info)
+            if block is not None:
+                blocks.append(block)
+        _align_ready_blocks(formatters, pending, False)
+
+    _align_ready_blocks(formatters, pending, True)
+    for formatter in formatters:
+        formatter.finish(line_info)
+
+
+def _align_ready_blocks(formatters: list, pending: list, at_end: bool):
+    """
+    Align all pending blocks, that do not wait for an overlapping block
+    of an earlier formatter.
+
+    :at_end: all lines are scanned, open blocks are never closed
+    """
+    for k, (formatter, blocks) in enumerate(zip(formatters, pending)):
+        while blocks:
+            start, end = blocks[0]
+            if any(pending[j] and pending[j][0][0] < end
+                   for j in range(k)):
+                break
+            if not at_end and any(
+                    formatters[j].open_block_start() is not None and
+                    formatters[j].open_block_start() < end
+                    for j in range(k)):
+                break
+            blocks.popleft()
+            formatter.align_block(start, end)
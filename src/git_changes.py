@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query the local git repository for changed fortran files and the changed
+line ranges within them.
+"""
+
+import os
+import re
+import subprocess
+
+# Extensions of fortran sources, compared lowercase.
+FORTRAN_EXTENSIONS = (".f90", ".f95", ".f03", ".f08", ".f", ".for", ".f77")
+
+__regex_file_header = re.compile(r'^\+\+\+ (b/.*|"b/.*")$')
+__regex_hunk_header = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+__regex_escape = re.compile(r'\\([0-7]{3}|.)')
+
+# Single character escapes of quoted paths in the output of git.
+_ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r",
+            "t": "\t", "v": "\v"}
+
+
+class GitError(Exception):
+    """Raised if a git command fails."""
+    pass
+
+
+def _git(args: list, cwd: str = None):
+    """
+    Run git with `args` and return its standard output. Paths with
+    non-ASCII characters are not quoted in the output.
+
+    The output is decoded as UTF-8, bytes of other encodings like latin-1
+    in changed lines are kept as surrogates instead of failing.
+    """
+    try:
+        result = subprocess.run(["git", "-c", "core.quotePath=false"] + args,
+                                cwd=cwd,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as error:
+        raise GitError("Could not run git: {}".format(error))
+
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode("utf-8", "replace").strip())
+    return result.stdout.decode("utf-8", "surrogateescape")
+
+
+def repository_root(cwd: str = None):
+    """Return the absolute path of the top level directory of the work tree."""
+    return _git(["rev-parse", "--show-toplevel"], cwd).strip()
+
+
+def is_fortran_file(path: str):
+    """Return True if the extension of `path` is a fortran extension."""
+    return os.path.splitext(path)[1].lower() in FORTRAN_EXTENSIONS
+
+
+def changed_ranges(revision: str = None, staged: bool = False,
+                   cwd: str = None):
+    """
+    Return the changed line ranges of all changed fortran files.
+
+    :revision: compare the work tree with this revision
+    :staged: compare the index with `HEAD` instead
+    :returns: dict of the absolute file path to a list of inclusive
+              `(first, last)` line ranges in the new file
+    """
+    root = repository_root(cwd)
+    args = ["diff", "-U0", "--no-color", "--no-ext-diff", "--no-renames",
+            "--diff-filter=ACMR"]
+    if staged:
+        args.append("--cached")
+    elif revision:
+        args.append(revision)
+
+    return parse_diff(_git(args, root), root)
+
+
+def unquote_path(path: str):
+    """
+    Return the path of the diff header `path`. Git puts paths with special
+    characters in double quotes and escapes them like C strings, bytes
+    of non-ASCII characters as octal numbers.
+    """
+    if not (len(path) > 1 and path.startswith('"') and path.endswith('"')):
+        return path
+
+    # The octal escapes are bytes of the UTF-8 encoding, collect all bytes
+    # and decode them at once.
+    content = bytearray()
+    position = 1
+    for match in __regex_escape.finditer(path, 1, len(path) - 1):
+        content += path[position:match.start()].encode("utf-8",
+                                                        "surrogateescape")
+        code = match.group(1)
+        if len(code) == 3:
+            content.append(int(code, 8))
+        else:
+            content += _ESCAPES.get(code, code).encode("utf-8")
+        position = match.end()
+    content += path[position:-1].encode("utf-8", "surrogateescape")
+    return content.decode("utf-8", "surrogateescape")
+
+
+def parse_diff(diff: str, root: str):
+    """
+    Parse the output of `git diff -U0` into changed line ranges, see
+    `changed_ranges`. Files that are not fortran sources are skipped.
+    """
+    ranges = {}
+    current = None
+
+    for line in diff.splitlines():
+        match = __regex_file_header.match(line)
+        if match:
+            # Strip the "b/" prefix of the new file.
+            path = unquote_path(match.group(1))[2:]
+            current = None
+            if is_fortran_file(path):
+                current = ranges.setdefault(os.path.join(root, path), [])
+            continue
+
+        match = __regex_hunk_header.match(line)
+        if match and current is not None:
+            first = int(match.group(1))
+            count = 1 if match.group(2) is None else int(match.group(2))
+            if count == 0:
+                # Pure deletion after line `first`, touch that line.
+                current.append((max(first, 1), max(first, 1)))
+            else:
+                current.append((first, first + count - 1))
+
+    return ranges
+
+
+def filter_touched(diagnostics: list, scope_tree, ranges: list):
+    """
+    Keep only the diagnostics within program units, that contain a changed
+    line. Nested units are not touched by changes of their parent.
+
+    :diagnostics: list of `diagnostics.Diagnostic`
+    :scope_tree: root `scope.ProgramUnit` of the file
+    :ranges: list of inclusive `(first, last)` changed line ranges
+    """
+    touched = set()
+    for first, last in ranges:
+        for line in range(first, last + 1):
+            touched.add(id(scope_tree.unit_at(line)))
+
+    return [d for d in diagnostics
+            if id(scope_tree.unit_at(d.line)) in touched]
+
+
+class StagedBlobReader(object):
+    """
+    Read the staged content of files through one long running
+    `git cat-file --batch` process.
+
+    Use it as context manager, the process is stopped on exit.
+    """
+
+    def __init__(self, cwd: str = None):
+        self._root = repository_root(cwd)
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=self._root,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the git process."""
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+        self._process.stdout.close()
+
+    def read(self, path: str):
+        """
+        Return the staged content of the file as bytes or `None` if the
+        file is not staged.
+
+        :path: absolute path or path relative to the repository root
+        """
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.realpath(path),
+                                   os.path.realpath(self._root))
+        request = ":{}\n".format(path.replace(os.sep, "/"))
+        self._process.stdin.write(request.encode("utf-8", "surrogateescape"))
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline().split()
+        if len(header) != 3 or header[1] != b"blob":
+            return None
+
+        content = self._process.stdout.read(int(header[2]))
+        # Every object is followed by a newline.
+        self._process.stdout.read(1)
+        return content
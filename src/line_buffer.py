@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact storage of the lines of a file.
+
+The whole text is kept in one string together with an array of the
+offsets every line starts at. Lines are sliced out on demand. The case
+insensitive version of the text is computed lazyly. For ASCII text the
+whole buffer is lowercased at once and shares the offset table, other
+text is lowercased line by line.
+
+`EncodedLineBuffer` does the same for undecoded bytes, for example a
+memory mapped file. Line boundaries are found in the bytes and only the
+lines that are requested get decoded.
+"""
+
+from array import array
+import codecs
+import collections.abc
+import mmap
+import os
+
+# Size of the pieces a buffer is validated in.
+_CHUNK_SIZE = 1 << 20
+
+# Files smaller than this number of bytes are read into memory instead of
+# being mapped. Reading them is as fast, and it avoids a SIGBUS when another
+# process truncates a mapped file while it is read. Empty files can not be
+# mapped at all.
+MMAP_MIN_SIZE = 8 << 20
+
+
+def _is_ascii(text: str):
+    """Return True if `text` only contains ASCII characters."""
+    try:
+        text.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class LineView(collections.abc.Sequence):
+    """Read only sequence of the lines of a `LineBuffer`."""
+
+    __slots__ = ("_get", "_count")
+
+    def __init__(self, get, count: int):
+        self._get = get
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("line index out of range")
+        return self._get(index)
+
+    def __iter__(self):
+        get = self._get
+        for i in range(self._count):
+            yield get(i)
+
+    def __eq__(self, other):
+        if isinstance(other, (LineView, list, tuple)):
+            return len(self) == len(other) and \
+                   all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return "LineView({!r})".format(list(self))
+
+
+class LineBuffer(object):
+    """
+    Text of a file with a line offset table. Lines include their newline
+    character, like lines read from a file.
+    """
+
+    __slots__ = ("_text", "_offsets", "_lower_text", "_lower_lines")
+
+    def __init__(self, text: str):
+        self._text = text
+        self._offsets = _line_offsets(text)
+        self._lower_text = None
+        self._lower_lines = None
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Create a buffer from an iterable of lines."""
+        return cls("".join(lines))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def text(self):
+        """Return the whole text."""
+        return self._text
+
+    def line(self, index: int):
+        """Return the line with the (zero based) `index`."""
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def lower_line(self, index: int):
+        """Return the lowercase version of the line with `index`."""
+        if self._lower_text is None and self._lower_lines is None:
+            if _is_ascii(self._text):
+                # Lowercasing ASCII keeps all offsets.
+                self._lower_text = self._text.lower()
+            else:
+                self._lower_lines = [None] * len(self)
+
+        if self._lower_text is not None:
+            return self._lower_text[self._offsets[index]:
+                                    self._offsets[index + 1]]
+
+        lower = self._lower_lines[index]
+        if lower is None:
+            lower = self.line(index).lower()
+            self._lower_lines[index] = lower
+        return lower
+
+    def lines(self):
+        """Return a `LineView` of all lines."""
+        return LineView(self.line, len(self))
+
+    def lower_lines(self):
+        """Return a `LineView` of all lowercase lines."""
+        return LineView(self.lower_line, len(self))
+
+
+class EncodedLineBuffer(object):
+    """
+    Encoded text of a file with a line offset table in bytes. Lines are
+    decoded when they are requested for the first time.
+
+    The text is decoded as UTF-8. Sources that are not valid UTF-8 are
+    decoded as latin-1, which is common for comments of legacy code.
+    The encoding is only determined once the first line with non ASCII
+    bytes is requested, pure ASCII files never get validated.
+    Windows line endings are converted to '\\n', like reading in text mode
+    does.
+    """
+
+    __slots__ = ("_data", "_offsets", "_encoding", "_lines", "_lower_lines",
+                 "_undecoded")
+
+    def __init__(self, data):
+        """
+        :data: `bytes` or any other object supporting `find` and slicing
+        into bytes, like `mmap.mmap`.
+        """
+        self._data = data
+        self._offsets = _line_offsets(data)
+        self._encoding = None
+        self._lines = [None] * len(self)
+        self._lower_lines = [None] * len(self)
+        # Number of lines not decoded yet, the data is released at zero.
+        self._undecoded = len(self)
+
+    @classmethod
+    def map_file(cls, path: str):
+        """
+        Create a buffer of the file at `path`. Large files are memory
+        mapped, the mapping is closed once all lines are decoded.
+        """
+        with open(path, "rb") as fortran_file:
+            if os.fstat(fortran_file.fileno()).st_size < MMAP_MIN_SIZE:
+                return cls(fortran_file.read())
+            return cls(mmap.mmap(fortran_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def encoding(self):
+        """Return the encoding of the buffer, validate it if necessary."""
+        if self._encoding is None:
+            self._encoding = "utf-8" if _is_utf8(self._data) else "latin-1"
+        return self._encoding
+
+    def text(self):
+        """Return the whole decoded text."""
+        return "".join(self.lines())
+
+    def line(self, index: int):
+        """Return the decoded line with the (zero based) `index`."""
+        line = self._lines[index]
+        if line is None:
+            raw = self._data[self._offsets[index]:self._offsets[index + 1]]
+            if raw.endswith(b"\r\n"):
+                raw = raw[:-2] + b"\n"
+            try:
+                line = raw.decode("ascii")
+            except UnicodeDecodeError:
+                line = raw.decode(self.encoding())
+            self._lines[index] = line
+            self._undecoded -= 1
+            if self._undecoded == 0:
+                self.close()
+        return line
+
+    def close(self):
+        """
+        Release the undecoded data and close a memory mapping. Lines, that
+        were not decoded before, can not be requested anymore.
+        """
+        if self._data is None:
+            return
+        if self._encoding is None and self._undecoded == 0:
+            # All lines were decoded as ASCII.
+            self._encoding = "utf-8"
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = None
+
+    def lower_line(self, index: int):
+        """Return the lowercase version of the line with `index`."""
+        lower = self._lower_lines[index]
+        if lower is None:
+            lower = self.line(index).lower()
+            self._lower_lines[index] = lower
+        return lower
+
+    def lines(self):
+        """Return a `LineView` of all lines."""
+        return LineView(self.line, len(self))
+
+    def lower_lines(self):
+        """Return a `LineView` of all lowercase lines."""
+        return LineView(self.lower_line, len(self))
+
+
+def _is_utf8(data):
+    """Return True if the bytes of `data` are valid UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for start in range(0, len(data), _CHUNK_SIZE):
+            decoder.decode(data[start:start + _CHUNK_SIZE])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _line_offsets(text):
+    """
+    Return the array of offsets every line starts at. The last entry is
+    the length of the text. `text` may be a `str` or bytes.
+    """
+    newline = "\n" if isinstance(text, str) else b"\n"
+    offsets = array("Q", [0])
+    find = text.find
+    position = find(newline)
+    while position != -1:
+        offsets.append(position + 1)
+        position = find(newline, position + 1)
+
+    if offsets[-1] != len(text):
+        offsets.append(len(text))
+    return offsets
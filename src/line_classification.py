@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classify every line of a fortran file once, so that checks and formatters
+do not need to run the common matchers on every line again.
+"""
+
+from common_matcher import LINE_MATCHER
+from tokenizer import SEGMENT_CODE, SEGMENT_COMMENT, tokenize_lines,\
+                      has_trailing_comment, mask_strings
+
+LINE_BLANK = "blank"
+LINE_COMMENT = "comment"
+LINE_CODE = "code"
+
+
+class LineInfo(object):
+    """
+    Classification of a single line.
+
+    :kind: one of `LINE_BLANK`, `LINE_COMMENT` or `LINE_CODE`
+    :begin_block: the line opens a function, subroutine, program or module
+    :end_block: the line closes a function, subroutine, program or module
+    :ignore_start: the line starts an ignore region with `!&<`
+    :ignore_end: the line ends an ignore region with `!&>`
+    :ignore_single: the line is excluded from formatting with `!&`
+    :ignored: the line is part of an ignore region, including its markers
+    :trailing_comment: the line contains code followed by a comment
+    :matches: frozenset of the names of all `LINE_MATCHER` patterns that
+              match the line, rules check their own patterns with it.
+              Text within string literals is not matched.
+    """
+
+    __slots__ = ("kind", "begin_block", "end_block", "ignore_start",
+                 "ignore_end", "ignore_single", "ignored", "trailing_comment",
+                 "matches")
+
+    def __init__(self, line: str, segments: tuple):
+        text = mask_strings(line, segments)
+        if segments:
+            first = segments[0]
+            if first.kind == SEGMENT_COMMENT and text[0] != "!":
+                # Fixed-form comment lines start with 'c' or '*', they are
+                # matched like comment lines starting with '!'.
+                text = "!" + text[1:]
+            elif first.kind == SEGMENT_CODE and "!" in text[:first.end]:
+                # Outside of comments a '!' is the continuation mark of a
+                # fixed-form line, it must not match as comment.
+                text = text[:first.end].replace("!", "&") + text[first.end:]
+        matches = LINE_MATCHER.match(text)
+        self.matches = matches
+
+        if "blank-line" in matches:
+            self.kind = LINE_BLANK
+        elif "comment-line" in matches:
+            self.kind = LINE_COMMENT
+        else:
+            self.kind = LINE_CODE
+
+        is_code = self.kind == LINE_CODE
+        # The begin matcher would trigger on 'end function' as well.
+        self.end_block = is_code and "end-block" in matches
+        self.begin_block = is_code and not self.end_block and \
+                           "begin-block" in matches
+
+        self.ignore_start = "ignore-start" in matches
+        self.ignore_end = "ignore-end" in matches
+        self.ignore_single = "ignore-single" in matches
+        self.ignored = False
+        self.trailing_comment = is_code and has_trailing_comment(
+            line, segments)
+
+
+def classify_lines(lines, tokens: list = None):
+    """
+    Classify every line in `lines` in one pass.
+
+    :lines: list of (case insensitive) lines
+    :tokens: segments of every line, see `tokenizer.tokenize_lines`.
+             The lines are tokenized if not given.
+    :returns: list of `LineInfo`, one for every line
+    """
+    if tokens is None:
+        tokens = tokenize_lines(lines)
+
+    infos = [LineInfo(line, segments)
+             for line, segments in zip(lines, tokens)]
+    _mark_ignored(infos)
+    return infos
+
+
+def reclassify_lines(lines, tokens: list, infos: list, changed):
+    """
+    Classify only the `changed` lines again and update `infos` in place.
+
+    :changed: indices of the lines to classify
+    """
+    for i in changed:
+        infos[i] = LineInfo(lines[i], tokens[i])
+    _mark_ignored(infos)
+
+
+def _mark_ignored(infos: list):
+    """Set the `ignored` flag of every line within an ignore region."""
+    in_ignore = False
+
+    for info in infos:
+        # Ignore regions are marked with `!&<` and `!&>`. Both markers
+        # belong to the region.
+        if info.ignore_start:
+            in_ignore = True
+            info.ignored = True
+        elif in_ignore:
+            info.ignored = True
+            if info.ignore_end:
+                in_ignore = False
+        else:
+            info.ignored = False
+
+
+def unterminated_ignore(infos: list):
+    """Return True if the last ignore region in `infos` is never closed."""
+    return bool(infos) and infos[-1].ignored and not infos[-1].ignore_end
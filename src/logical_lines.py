@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Join continued physical lines into logical lines (statements).
+
+Free-form lines are continued by a trailing `&`, an optional `&` starts
+the continuation line. In fixed-form sources a character other than a
+blank or `0` in column 6 marks a continuation line, lines starting with
+`c`, `*` or `!` are comments and code ends at column 72.
+
+The text of a logical line is case insensitive, without comments and the
+content of string literals is masked like `tokenizer.mask_strings` does,
+so the same patterns as for single lines can be used. Every logical line
+maps the columns of its text back to the physical lines.
+"""
+
+import bisect
+
+from line_classification import LINE_CODE
+from tokenizer import FIXED_FORM_MARGIN, comment_start,\
+                      is_fixed_continuation, mask_strings, tokenize_line
+
+# File name extensions of fixed-form sources, compared in lower case.
+FIXED_FORM_EXTENSIONS = (".f", ".for", ".f77", ".ftn")
+
+# Last column of code in fixed-form sources.
+FIXED_FORM_WIDTH = 72
+
+
+class LogicalLine(object):
+    """
+    One statement, that might span several physical lines.
+
+    :text: joined code of all lines without the newline
+    :start: line number (from 1) of the first physical line
+    :end: line number of the last physical line, comment lines between
+          the continued lines are included
+    """
+
+    __slots__ = ("text", "start", "end", "_column", "_parts")
+
+    def __init__(self, parts: list):
+        """
+        :parts: list of `(line number, column, code)` of every physical
+                line, the code starts at the column of the line
+        """
+        self.start = parts[0][0]
+        self.end = parts[-1][0]
+        self._column = parts[0][1]
+        if len(parts) == 1:
+            # Most statements are single lines, they keep no part list.
+            self.text = parts[0][2]
+            self._parts = None
+            return
+
+        self.text = "".join(code for _, _, code in parts)
+        # Offset of every part in the text, its line number and column.
+        self._parts = ([], [])
+        offset = 0
+        for number, column, code in parts:
+            self._parts[0].append(offset)
+            self._parts[1].append((number, column))
+            offset += len(code)
+
+    def __repr__(self):
+        return "LogicalLine({!r}, {}, {})".format(self.text, self.start,
+                                                  self.end)
+
+    def position(self, offset: int):
+        """
+        Return the physical `(line number, column)` of the character at
+        `offset` in the text.
+        """
+        if self._parts is None:
+            return self.start, self._column + offset
+        offsets, positions = self._parts
+        part = bisect.bisect_right(offsets, offset) - 1
+        number, column = positions[part]
+        return number, column + offset - offsets[part]
+
+
+class LogicalLines(object):
+    """All logical lines of a file, in order."""
+
+    def __init__(self, logical_lines: list, line_count: int):
+        self._lines = logical_lines
+        # Logical line index for every line number it starts at.
+        self._starting = [None] * (line_count + 1)
+        for index, logical in enumerate(logical_lines):
+            self._starting[logical.start] = index
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, index: int):
+        return self._lines[index]
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def starting_at(self, line: int):
+        """
+        Return the `LogicalLine` that starts at the line number, `None` for
+        comments, blank lines and continuation lines.
+        """
+        index = self._starting[line]
+        return None if index is None else self._lines[index]
+
+
+def is_fixed_form(path: str):
+    """Return True if the file name has a fixed-form extension."""
+    return path.lower().endswith(FIXED_FORM_EXTENSIONS)
+
+
+def build_free_form(lines, tokens: list, line_info: list):
+    """
+    Return the `LogicalLines` of free-form `lines` in one pass.
+
+    :lines: case insensitive lines
+    :tokens: segments of every line, see `tokenizer.tokenize_lines`
+    :line_info: classification of every line
+    """
+    logical_lines = []
+    parts = []
+    for i, info in enumerate(line_info):
+        if info.kind != LINE_CODE:
+            # Comments and blank lines within a continued statement are
+            # allowed and skipped.
+            continue
+
+        segments = tokens[i]
+        code = mask_strings(lines[i], segments)
+        column = comment_start(segments)
+        code = code[:column] if column >= 0 else code.rstrip("\r\n")
+
+        # Without a leading '&' the continuation starts at the first
+        # column, including its blanks.
+        start = 0
+        if parts:
+            stripped = code.lstrip()
+            if stripped.startswith("&"):
+                start = len(code) - len(stripped) + 1
+
+        code = code[start:].rstrip()
+        continued = code.endswith("&")
+        if continued:
+            code = code[:-1]
+        parts.append((i + 1, start, code))
+
+        if not continued:
+            logical_lines.append(LogicalLine(parts))
+            parts = []
+
+    if parts:
+        # The last line must not be continued, keep the statement anyway.
+        logical_lines.append(LogicalLine(parts))
+    return LogicalLines(logical_lines, len(line_info))
+
+
+def _is_fixed_comment(line: str):
+    return not line.strip() or line[0] in "c*!" or line.lstrip()[0] == "!"
+
+
+def build_fixed_form(lines):
+    """
+    Return the `LogicalLines` of fixed-form `lines` in one pass. Strings
+    that are open at the end of a line continue on the next continuation
+    line, comment lines in between are skipped.
+
+    :lines: case insensitive lines
+    """
+    logical_lines = []
+    parts = []
+    open_quote = None
+    for i, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+        # A '!' in column 6 is a continuation mark, not a comment.
+        continuation = is_fixed_continuation(line)
+        if not continuation and _is_fixed_comment(line):
+            continue
+
+        line = line[:FIXED_FORM_WIDTH]
+        segments, open_quote = tokenize_line(
+            line, open_quote if continuation else None, True)
+        start = FIXED_FORM_MARGIN if continuation else 0
+        column = comment_start(segments)
+        code = mask_strings(line, segments)
+        code = code[start:column] if column >= 0 else code[start:]
+
+        if not continuation and parts:
+            logical_lines.append(LogicalLine(parts))
+            parts = []
+        parts.append((i + 1, start, code.rstrip()))
+
+    if parts:
+        logical_lines.append(LogicalLine(parts))
+    return LogicalLines(logical_lines, len(lines))
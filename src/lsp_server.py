@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Language Server Protocol frontend over stdio.
+
+Open documents are kept in memory and updated with incremental text
+edits. Diagnostics are cached per top level program unit and the checks
+only run again for units whose text changed. Range formatting formats
+the whole document and returns the edits of the selected lines.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+
+from check.abstract_check import run_checks
+from file_io import FortranCode
+from format.utility import run_formatters
+from logical_lines import is_fixed_form
+
+# Values of `TextDocumentSyncKind` and `DiagnosticSeverity`.
+SYNC_INCREMENTAL = 2
+SEVERITIES = {"error": 1, "warning": 2, "note": 3}
+
+# JSON-RPC error codes.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+
+class _UnitCode(FortranCode):
+    """
+    Lines of a document or of one of its program units, diagnostics are
+    emitted for the `uri`. The extension of the `uri` decides the source
+    form, like the file name of a `CodeFile` does.
+    """
+
+    def __init__(self, uri: str, lines: list):
+        super(_UnitCode, self).__init__(lines)
+        self._uri = uri
+        self._fixed_form = is_fixed_form(uri)
+
+    def path(self):
+        return self._uri
+
+    def fixed_form(self):
+        return self._fixed_form
+
+
+class Document(object):
+    """
+    Text of an open document with the diagnostics of its program units.
+
+    The `FortranCode` of the text is kept between changes. Changes, that
+    keep the number of lines, only tokenize and classify the changed lines
+    again and keep the scope tree if no block boundary changed.
+
+    :uri: str: document identifier of the client
+    :text: str: full text of the document
+    """
+
+    def __init__(self, uri: str, text: str):
+        self.uri = uri
+        self.lines = text.splitlines(True)
+        # `FortranCode` of `lines`, built again on demand if a change
+        # added or removed lines.
+        self._code = None
+        # Hash of the unit text and the checks to the diagnostics of the
+        # unit, with line numbers relative to the start of the unit.
+        self.unit_results = {}
+
+    def code(self):
+        """Return the `FortranCode` of the current text."""
+        if self._code is None:
+            self._code = _UnitCode(self.uri, self.lines)
+        return self._code
+
+    def apply_change(self, change: dict, utf16: bool = True):
+        """
+        Apply one `TextDocumentContentChangeEvent`. Changes without a
+        range replace the whole text.
+        """
+        if "range" not in change:
+            self.lines = change["text"].splitlines(True)
+            self._code = None
+            return
+
+        start = change["range"]["start"]
+        end = change["range"]["end"]
+        first = self._line(start["line"])
+        last = self._line(end["line"])
+
+        prefix = first[:_column(first, start["character"], utf16)]
+        suffix = last[_column(last, end["character"], utf16):]
+        replaced = (prefix + change["text"] + suffix).splitlines(True)
+        old_lines = self.lines[start["line"]:end["line"] + 1]
+        self.lines[start["line"]:end["line"] + 1] = replaced
+
+        if self._code is None:
+            return
+        if len(replaced) != len(old_lines):
+            self._code = None
+            return
+        self._code.apply_edits({
+            start["line"] + i: line
+            for i, (old, line) in enumerate(zip(old_lines, replaced))
+            if old != line})
+
+    def diagnostics(self, checks: list, all_checks: dict):
+        """
+        Return the `diagnostics.Diagnostic` records of all checks. Only
+        program units that changed since the last call are analysed. The
+        lines outside of all units are analysed together, with the lines
+        of the units left blank.
+        """
+        units = self.code().scope_tree().children
+        results = {}
+        records = []
+
+        parts = [(unit.start - 1, self.lines[unit.start - 1:unit.end])
+                 for unit in units]
+        outside = list(self.lines)
+        for unit in units:
+            outside[unit.start - 1:unit.end] = \
+                ["\n"] * (unit.end - unit.start + 1)
+        if any(line.strip() for line in outside):
+            parts.append((0, outside))
+
+        for offset, part_lines in parts:
+            digest = hashlib.sha256()
+            digest.update(",".join(checks).encode())
+            digest.update(b"\0")
+            digest.update("".join(part_lines).encode())
+            key = digest.hexdigest()
+
+            part_records = self.unit_results.get(key)
+            if part_records is None:
+                part_records = _run_checks(_UnitCode(self.uri, part_lines),
+                                           checks, all_checks)
+            results[key] = part_records
+
+            records.extend(r._replace(line=r.line + offset)
+                           for r in part_records)
+
+        # Forget units that do not exist anymore.
+        self.unit_results = results
+        records.sort(key=lambda record: record.line)
+        return records
+
+    def _line(self, number: int):
+        if number < len(self.lines):
+            return self.lines[number]
+        return ""
+
+
+def _column(line: str, character: int, utf16: bool):
+    """
+    Convert a LSP character offset into an index into `line`. Offsets
+    beyond the end of the line refer to the end, before the line break.
+    """
+    length = len(line.rstrip("\r\n"))
+    if not utf16:
+        return min(character, length)
+
+    units = 0
+    for index, char in enumerate(line[:length]):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return length
+
+
+def _character(line: str, column: int, utf16: bool):
+    """Convert an index into `line` into a LSP character offset."""
+    if not utf16:
+        return column
+    return column + sum(1 for char in line[:column] if ord(char) > 0xFFFF)
+
+
+def _run_checks(f_code: FortranCode, checks: list, all_checks: dict):
+    return list(run_checks(
+        f_code, [all_checks[check] for check in checks], names=checks))
+
+
+def format_document(uri: str, lines: list, formatters: list,
+                    all_formatters: dict):
+    """
+    Apply the formatters in order to all `lines` of the document `uri`.
+
+    :returns: dict of line index to the formatted line of changed lines
+    """
+    code = _UnitCode(uri, list(lines))
+    return run_formatters(code, [all_formatters[formatter]
+                                 for formatter in formatters])
+
+
+class LanguageServer(object):
+    """
+    Answer LSP messages read from `reader` and write the responses and
+    notifications to `writer`.
+
+    :checks: list of enabled check names
+    :formatters: list of enabled formatter names in order
+    """
+
+    def __init__(self, all_checks: dict, all_formatters: dict, checks: list,
+                 formatters: list, reader=None, writer=None):
+        self._all_checks = all_checks
+        self._all_formatters = all_formatters
+        self._checks = checks
+        self._formatters = formatters
+        self._reader = reader or sys.stdin.buffer
+        self._writer = writer or sys.stdout.buffer
+        self._documents = {}
+        self._utf16 = True
+        self._shutdown = False
+        self._log = logging.getLogger(__file__)
+
+    def run(self):
+        """
+        Serve until the client sends `exit`.
+
+        :returns: int: exit code, 0 if `shutdown` was received before
+        """
+        while True:
+            try:
+                message = self._read_message()
+            except ValueError as error:
+                # A malformed message must not stop the server, the id of
+                # the request is unknown.
+                self._log.warning("Could not parse a message: %s" % error)
+                self._send({"jsonrpc": "2.0", "id": None,
+                            "error": {"code": PARSE_ERROR,
+                                      "message": str(error)}})
+                continue
+            if message is None:
+                return 0 if self._shutdown else 1
+            if not isinstance(message, dict):
+                self._send({"jsonrpc": "2.0", "id": None,
+                            "error": {"code": INVALID_REQUEST,
+                                      "message": "Not a JSON object"}})
+                continue
+            if message.get("method") == "exit":
+                return 0 if self._shutdown else 1
+            self.handle(message)
+
+    def handle(self, message: dict):
+        """Handle one request or notification."""
+        method = message.get("method")
+        handler = getattr(self, "_on_" + str(method).replace("/", "_"), None)
+        is_request = "id" in message
+
+        if handler is None:
+            if is_request:
+                self._send({"jsonrpc": "2.0", "id": message["id"],
+                            "error": {"code": METHOD_NOT_FOUND,
+                                      "message": "Unknown method"}})
+            return
+
+        try:
+            result = handler(message.get("params") or {})
+        except Exception as error:
+            # A failing rule must not stop the server.
+            self._log.exception("Handling '%s' failed" % method)
+            if is_request:
+                self._send({"jsonrpc": "2.0", "id": message["id"],
+                            "error": {"code": INTERNAL_ERROR,
+                                      "message": str(error)}})
+            return
+
+        if is_request:
+            self._send({"jsonrpc": "2.0", "id": message["id"],
+                        "result": result})
+
+    def _on_initialize(self, params: dict):
+        general = params.get("capabilities", {}).get("general", {})
+        encoding = "utf-16"
+        if "utf-32" in general.get("positionEncodings", []):
+            encoding = "utf-32"
+            self._utf16 = False
+
+        return {
+            "capabilities": {
+                "positionEncoding": encoding,
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": SYNC_INCREMENTAL,
+                },
+                "documentFormattingProvider": True,
+                "documentRangeFormattingProvider": True,
+            },
+            "serverInfo": {"name": "flint"},
+        }
+
+    def _on_shutdown(self, params: dict):
+        self._shutdown = True
+        return None
+
+    def _on_textDocument_didOpen(self, params: dict):
+        document = params["textDocument"]
+        self._documents[document["uri"]] = Document(document["uri"],
+                                                    document["text"])
+        self._publish(document["uri"])
+
+    def _on_textDocument_didChange(self, params: dict):
+        document = self._documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return
+        for change in params["contentChanges"]:
+            document.apply_change(change, self._utf16)
+        self._publish(document.uri)
+
+    def _on_textDocument_didClose(self, params: dict):
+        uri = params["textDocument"]["uri"]
+        self._documents.pop(uri, None)
+        self._send_notification("textDocument/publishDiagnostics",
+                                {"uri": uri, "diagnostics": []})
+
+    def _on_textDocument_formatting(self, params: dict):
+        document = self._documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return []
+        return self._format_range(document, 0, len(document.lines))
+
+    def _on_textDocument_rangeFormatting(self, params: dict):
+        document = self._documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return []
+
+        start = params["range"]["start"]["line"]
+        end = params["range"]["end"]
+        # A range ending at the start of a line does not include it.
+        last = end["line"] if end["character"] > 0 or \
+            end["line"] == start else end["line"] - 1
+        return self._format_range(document, start,
+                                  min(last + 1, len(document.lines)))
+
+    def _format_range(self, document: Document, start: int, end: int):
+        """
+        Return the `TextEdit`s for the formatted lines `[start, end)`. The
+        whole document is formatted, so aligned blocks and regions without
+        formatting, that reach beyond the range, are treated like in the
+        formatting of the whole document.
+        """
+        edits = format_document(document.uri, document.lines,
+                                self._formatters, self._all_formatters)
+
+        text_edits = []
+        for number in sorted(edits):
+            if start <= number < end:
+                text_edits.append({
+                    "range": {
+                        "start": {"line": number, "character": 0},
+                        "end": {"line": number + 1, "character": 0},
+                    },
+                    "newText": edits[number],
+                })
+        return text_edits
+
+    def _publish(self, uri: str):
+        document = self._documents[uri]
+        records = document.diagnostics(self._checks, self._all_checks)
+
+        diagnostics = []
+        for record in records:
+            line = record.line - 1
+            text = document.lines[line]
+            diagnostics.append({
+                "range": {
+                    "start": {"line": line, "character": 0},
+                    "end": {"line": line,
+                            "character": _character(
+                                text, len(text.rstrip()), self._utf16)},
+                },
+                "severity": SEVERITIES[record.category],
+                "source": "flint",
+                "code": record.rule,
+                "message": record.message,
+            })
+
+        self._send_notification("textDocument/publishDiagnostics",
+                                {"uri": uri, "diagnostics": diagnostics})
+
+    def _send_notification(self, method: str, params: dict):
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _send(self, message: dict):
+        body = json.dumps(message).encode()
+        self._writer.write(
+            "Content-Length: {}\r\n\r\n".format(len(body)).encode() + body)
+        self._writer.flush()
+
+    def _read_message(self):
+        """
+        Read one message, `None` at the end of the input. Raise a
+        `ValueError` for a malformed header or body.
+        """
+        length = None
+        while True:
+            header = self._reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+                if length < 0:
+                    raise ValueError("Negative Content-Length")
+
+        if length is None:
+            return {}
+        return json.loads(self._reader.read(length).decode())
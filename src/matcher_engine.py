@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Engine that matches many line patterns at once.
+
+Every pattern is registered with a name and a list of keywords. A single
+prefilter scan finds all keywords in a line and only the patterns whose
+keywords occur are tried. Most lines contain none of the keywords and
+are scanned only once.
+"""
+
+import collections
+import re
+
+
+class MatcherEngine(object):
+    """
+    Collection of named line patterns, that are matched together.
+
+    Patterns are registered at import time. Rules might be imported after
+    lines were matched, `generation` tells users to match them again.
+    """
+
+    def __init__(self):
+        # Ordered list of (name, compiled regex, keywords).
+        self._patterns = []
+        # Counts the registrations, see `generation`.
+        self._generation = 0
+        # Compiled lazyly on the first match.
+        self._prefilter = None
+        self._keyword_names = None
+        # Maps the set of found keywords to the patterns that are tried.
+        self._candidates = None
+        # Identical results are shared to keep the memory small.
+        self._interned = {}
+        # Number of lines every pattern was tried on and matched, only
+        # counted while statistics are enabled.
+        self._tried = None
+        self._matched = None
+
+    def register(self, name: str, regex, keywords=()):
+        """
+        Register a pattern. Registering a name again replaces the pattern.
+
+        :name: str: unique name, reported if the pattern matches
+        :regex: compiled regular expression, applied with `match`
+        :keywords: literal strings, at least one of them must occur in a
+                   line for the regex to match. Without keywords the regex
+                   is tried on every line.
+        """
+        self._patterns = [p for p in self._patterns if p[0] != name]
+        self._patterns.append((name, regex, tuple(keywords)))
+        self._prefilter = None
+        self._generation += 1
+
+    def generation(self):
+        """
+        Return a number, that changes whenever a pattern is registered.
+        Matches of an older generation might lack the new pattern.
+        """
+        return self._generation
+
+    def names(self):
+        """Return the names of all registered patterns in order."""
+        return [name for name, _, _ in self._patterns]
+
+    def match(self, line: str):
+        """
+        Return the names of all patterns that match `line` as frozenset.
+        """
+        if self._prefilter is None:
+            self._compile()
+
+        found = frozenset(self._prefilter.findall(line))
+        candidates = self._candidates.get(found)
+        if candidates is None:
+            candidates = self._select(found)
+
+        matched = frozenset(
+            name for name, regex in candidates if regex.match(line))
+        return self._interned.setdefault(matched, matched)
+
+    def enable_statistics(self):
+        """
+        Count how often every pattern is tried and matches. Matching
+        without statistics is not slowed down, the counting `match` only
+        replaces it while enabled.
+        """
+        if self._tried is None:
+            self._tried = collections.Counter()
+            self._matched = collections.Counter()
+            self.match = self._match_counting
+
+    def disable_statistics(self):
+        """Stop counting and drop the statistics."""
+        if self._tried is not None:
+            del self.match
+            self._tried = None
+            self._matched = None
+
+    def take_statistics(self):
+        """
+        Return the statistics counted since the last call and reset them.
+
+        :returns: dict of the pattern name to `(tried, matched)`
+        """
+        if self._tried is None:
+            return {}
+        statistics = {name: (self._tried[name], self._matched[name])
+                      for name in self._tried}
+        self._tried.clear()
+        self._matched.clear()
+        return statistics
+
+    def _match_counting(self, line: str):
+        """`match` that counts the tried and matched patterns."""
+        if self._prefilter is None:
+            self._compile()
+
+        found = frozenset(self._prefilter.findall(line))
+        candidates = self._candidates.get(found)
+        if candidates is None:
+            candidates = self._select(found)
+
+        self._tried.update(name for name, _ in candidates)
+        matched = frozenset(
+            name for name, regex in candidates if regex.match(line))
+        self._matched.update(matched)
+        return self._interned.setdefault(matched, matched)
+
+    def _select(self, found: frozenset):
+        """Return the ordered patterns to try for the `found` keywords."""
+        names = set()
+        for keyword in found:
+            names.update(self._keyword_names[keyword])
+
+        candidates = [(name, regex) for name, regex, keywords
+                      in self._patterns if not keywords or name in names]
+        self._candidates[found] = candidates
+        return candidates
+
+    def _compile(self):
+        """Build the prefilter for all keywords of the registered patterns."""
+        keywords = set()
+        for _, _, pattern_keywords in self._patterns:
+            keywords.update(pattern_keywords)
+
+        # A keyword found in the line implies all keywords it contains,
+        # because the scan reports only the longest keyword per position.
+        self._keyword_names = {}
+        for keyword in keywords:
+            self._keyword_names[keyword] = frozenset(
+                name for name, _, pattern_keywords in self._patterns
+                if any(k in keyword for k in pattern_keywords))
+
+        self._candidates = {}
+
+        alternatives = sorted(keywords, key=len, reverse=True)
+        if alternatives:
+            # The lookahead finds keywords at every position, even if they
+            # overlap.
+            self._prefilter = re.compile("(?=({}))".format("|".join(
+                re.escape(k) for k in alternatives)))
+        else:
+            self._prefilter = re.compile("(?!)")
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build the graph of the `module` definitions and `use` statements of many
+fortran files.
+
+Every file is scanned with a single regular expression over its whole
+content, without the tokenizer and the line classification, so the graph
+of a large project is built in a fast pre-pass.
+
+The nodes of the graph are the modules and the files, that use modules
+outside of any module (programs and external procedures). An edge points
+from the using node to the used module. Modules that no file defines,
+like `iso_fortran_env`, are external nodes without a path.
+"""
+
+import collections
+import json
+import re
+
+# Scanned statements of one file.
+#
+# :path: path of the file
+# :modules: list of `(name, line, parent)` of the defined modules, the
+#           parent module of a submodule or `None`
+# :uses: list of `(user, module, line)`, the user is the name of the
+#        enclosing module or `None` outside of modules
+ModuleStatements = collections.namedtuple("ModuleStatements",
+                                          ["path", "modules", "uses"])
+
+# Lines are matched in the lowercased content, so the pattern is case
+# insensitive. Comment lines do not match, because they do not start with
+# one of the keywords.
+_regex_statement = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<end>end[ \t]*(?:sub)?module\b)"
+    r"|module[ \t]+(?!procedure\b)(?P<module>\w+)[ \t\r]*(?:!.*)?$"
+    r"|submodule[ \t]*\([ \t]*(?P<parent>\w+)(?:[ \t]*:[ \t]*\w+)?[ \t]*\)"
+    r"[ \t]*(?P<submodule>\w+)"
+    r"|use\b(?:[ \t]*,[ \t]*(?:non_)?intrinsic)?(?:[ \t]*::)?[ \t]*"
+    r"(?P<use>[a-z]\w*)"
+    r")", re.MULTILINE)
+
+
+def scan_content(path: str, content: str):
+    """
+    Return the `ModuleStatements` of the fortran source `content`.
+    """
+    content = content.lower()
+    modules = []
+    uses = []
+    current = None
+    line = 1
+    position = 0
+    for match in _regex_statement.finditer(content):
+        line += content.count("\n", position, match.start())
+        position = match.start()
+
+        if match.group("end") is not None:
+            current = None
+        elif match.group("module") is not None:
+            current = match.group("module")
+            modules.append((current, line, None))
+        elif match.group("submodule") is not None:
+            current = match.group("submodule")
+            modules.append((current, line, match.group("parent")))
+        else:
+            uses.append((current, match.group("use"), line))
+    return ModuleStatements(path, modules, uses)
+
+
+def scan_file(path: str):
+    """
+    Return the `ModuleStatements` of the fortran file at `path`. Module
+    names are ASCII, so the encoding of the file does not matter.
+    """
+    with open(path, "rb") as fortran_file:
+        content = fortran_file.read().decode("latin-1")
+    return scan_content(path, content)
+
+
+class ModuleGraph(object):
+    """Dependency graph of the modules of many files."""
+
+    def __init__(self, scanned: list):
+        """
+        :scanned: list of `ModuleStatements`, one per file
+        """
+        # Module name to the list of (path, line) of its definitions,
+        # more than one is an error in the project.
+        self.definitions = collections.OrderedDict()
+        # Node to the set of used modules.
+        self.edges = collections.OrderedDict()
+        # Node to the path of its file, `None` for external modules.
+        self.paths = {}
+        # All scanned paths in order.
+        self.files = []
+
+        for statements in scanned:
+            self.files.append(statements.path)
+            for name, line, parent in statements.modules:
+                self.definitions.setdefault(name, []).append(
+                    (statements.path, line))
+                self.paths.setdefault(name, statements.path)
+                used = self.edges.setdefault(name, set())
+                if parent is not None:
+                    used.add(parent)
+            for user, module, _ in statements.uses:
+                if user is None:
+                    user = statements.path
+                    self.paths[user] = statements.path
+                self.edges.setdefault(user, set()).add(module)
+
+        for used in list(self.edges.values()):
+            for module in used:
+                if module not in self.edges:
+                    self.edges[module] = set()
+                    self.paths.setdefault(module, None)
+
+    def is_external(self, node: str):
+        """Return True if no scanned file defines the module `node`."""
+        return self.paths[node] is None
+
+    def dependents(self, module: str):
+        """
+        Return the set of all nodes, that use `module` directly or
+        indirectly.
+        """
+        users = collections.defaultdict(set)
+        for node, used in self.edges.items():
+            for used_module in used:
+                users[used_module].add(node)
+
+        found = set()
+        pending = [module]
+        while pending:
+            for user in users[pending.pop()]:
+                if user not in found:
+                    found.add(user)
+                    pending.append(user)
+        found.discard(module)
+        return found
+
+    def cycles(self):
+        """
+        Return the modules that depend on each other as list of sorted
+        lists, one per cycle.
+        """
+        cycles = []
+        for component in _strongly_connected(self.edges):
+            node = component[0]
+            if len(component) > 1 or node in self.edges[node]:
+                cycles.append(sorted(component))
+        return sorted(cycles)
+
+    def waves(self):
+        """
+        Return the files in topological waves: every file only depends on
+        modules defined in earlier waves or in itself. Files of a cycle
+        share a wave. All files of a wave can be processed in parallel.
+
+        :returns: list of sorted lists of paths
+        """
+        file_edges = collections.OrderedDict(
+            (path, set()) for path in self.files)
+        for node, used in self.edges.items():
+            path = self.paths[node]
+            if path is None:
+                continue
+            depends = file_edges.setdefault(path, set())
+            depends.update(self.paths[module] for module in used
+                           if self.paths[module] not in (None, path))
+
+        # Tarjan yields every component after all components it depends
+        # on, so the wave of a component follows from the ones before.
+        wave_of = {}
+        waves = []
+        for component in _strongly_connected(file_edges):
+            members = set(component)
+            wave = 0
+            for path in component:
+                for depend in file_edges[path]:
+                    if depend not in members:
+                        wave = max(wave, wave_of[depend] + 1)
+            for path in component:
+                wave_of[path] = wave
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].extend(component)
+        return [sorted(wave) for wave in waves]
+
+    def to_json(self):
+        """Return the graph as dict, that can be dumped as JSON."""
+        return {
+            "nodes": [{"name": node, "path": self.paths[node],
+                       "kind": _node_kind(self, node)}
+                      for node in sorted(self.edges)],
+            "edges": [{"from": node, "to": module}
+                      for node in sorted(self.edges)
+                      for module in sorted(self.edges[node])],
+            "cycles": self.cycles(),
+            "waves": self.waves(),
+        }
+
+    def to_dot(self):
+        """Return the graph in the DOT language of graphviz."""
+        # Node to the index of its cycle.
+        in_cycle = {}
+        for index, cycle in enumerate(self.cycles()):
+            in_cycle.update((node, index) for node in cycle)
+
+        lines = ["digraph modules {"]
+        for node in sorted(self.edges):
+            kind = _node_kind(self, node)
+            style = {"external": "dashed", "file": "dotted"}.get(kind, "solid")
+            lines.append("  {} [style={}];".format(json.dumps(node), style))
+        for node in sorted(self.edges):
+            for module in sorted(self.edges[node]):
+                color = ' [color="red"]' if node in in_cycle and \
+                    in_cycle[node] == in_cycle.get(module) else ""
+                lines.append("  {} -> {}{};".format(
+                    json.dumps(node), json.dumps(module), color))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def to_text(self):
+        """Return the graph as human readable text."""
+        lines = []
+        for node in sorted(self.edges):
+            if self.is_external(node):
+                continue
+            name = node if _node_kind(self, node) == "file" else \
+                "{} ({})".format(node, self.paths[node])
+            used = ", ".join(sorted(self.edges[node]))
+            lines.append("{}: {}".format(name, used) if used else name)
+        for name, defined in self.definitions.items():
+            if len(defined) > 1:
+                lines.append("module '{}' is defined {} times: {}".format(
+                    name, len(defined), ", ".join(
+                        "{}:{}".format(path, line) for path, line in defined)))
+        for cycle in self.cycles():
+            lines.append("cycle: {}".format(" -> ".join(cycle + cycle[:1])))
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _node_kind(graph: ModuleGraph, node: str):
+    if graph.is_external(node):
+        return "external"
+    if node not in graph.definitions:
+        return "file"
+    return "module"
+
+
+def _strongly_connected(edges: dict):
+    """
+    Return the strongly connected components of the graph with Tarjan's
+    algorithm, without recursion for deep graphs. A component is returned
+    after all components it has edges to.
+
+    :edges: dict of every node to the nodes it has edges to
+    :returns: list of lists of nodes
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in edges:
+        if root in index:
+            continue
+        work = [(root, iter(sorted(edges[root])))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(sorted(edges[successor]))))
+                    descended = True
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
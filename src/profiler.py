@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure where the time of a run goes.
+
+A `FileProfile` records the wall time of every phase (reading, the shared
+preprocessing and every check or formatter) for one file together with
+the statistics of the line matcher. Profiles are small and picklable,
+worker processes send them back to the main process, where a
+`ProfileReport` sums them up.
+
+Nothing is measured unless a profile is passed in, the line matcher only
+counts while its statistics are enabled.
+"""
+
+import collections
+import contextlib
+import json
+import time
+
+from common_matcher import LINE_MATCHER
+
+# Default number of slowest files in the report.
+DEFAULT_TOP = 10
+
+
+class FileProfile(object):
+    """Wall time of every phase for a single file."""
+
+    __slots__ = ("path", "timings", "matcher")
+
+    def __init__(self, path: str):
+        self.path = path
+        # List of (phase, seconds) in the order of the phases.
+        self.timings = []
+        # Pattern name to (tried, matched), see `finish`.
+        self.matcher = {}
+
+    @contextlib.contextmanager
+    def time(self, phase: str):
+        """Add the wall time of the `with` block as `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((phase, time.perf_counter() - start))
+
+    def total(self):
+        """Return the sum of all timed phases in seconds."""
+        return sum(seconds for _, seconds in self.timings)
+
+    def finish(self):
+        """Take the statistics of the line matcher for this file."""
+        self.matcher = LINE_MATCHER.take_statistics()
+
+
+def start_profile(path: str):
+    """Return a new `FileProfile` and count the matcher statistics."""
+    LINE_MATCHER.enable_statistics()
+    return FileProfile(path)
+
+
+def profile_preprocessing(profile: FileProfile, code):
+    """
+    Read `code` and build the shared preprocessing, every step timed on
+    its own. Rules running afterwards only measure their own work.
+    """
+    with profile.time("read"):
+        code.line_count()
+    with profile.time("tokenize"):
+        code.tokens()
+    with profile.time("classify"):
+        code.line_info()
+    with profile.time("scope"):
+        code.scope_tree()
+
+
+class ProfileReport(object):
+    """Sum of the `FileProfile`s of a run."""
+
+    def __init__(self):
+        self._files = []
+        self._phases = collections.OrderedDict()
+        self._matcher = collections.OrderedDict()
+
+    def add(self, profile: FileProfile):
+        """Add the profile of one file."""
+        self._files.append((profile.total(), profile.path))
+        for phase, seconds in profile.timings:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+        for name, (tried, matched) in profile.matcher.items():
+            previous = self._matcher.get(name, (0, 0))
+            self._matcher[name] = (previous[0] + tried, previous[1] + matched)
+
+    def slowest(self, top: int = DEFAULT_TOP):
+        """Return the `top` slowest files as list of (seconds, path)."""
+        return sorted(self._files, key=lambda f: f[0], reverse=True)[:top]
+
+    def to_json(self, top: int = DEFAULT_TOP):
+        """Return the report as dict, that can be dumped as JSON."""
+        return {
+            "files": len(self._files),
+            "total_seconds": sum(seconds for seconds, _ in self._files),
+            "phases": [{"phase": phase, "seconds": seconds}
+                       for phase, seconds in self._phases.items()],
+            "slowest_files": [{"path": path, "seconds": seconds}
+                              for seconds, path in self.slowest(top)],
+            "matcher": [{"pattern": name, "tried": tried, "matched": matched}
+                        for name, (tried, matched)
+                        in self._matcher.items()],
+        }
+
+    def table(self, top: int = DEFAULT_TOP):
+        """Return the report as human readable table."""
+        total = sum(seconds for seconds, _ in self._files) or 1.0
+        lines = ["{:<36} {:>10} {:>7}".format("phase", "seconds", "%")]
+        for phase, seconds in self._phases.items():
+            lines.append("{:<36} {:>10.4f} {:>6.1f}%".format(
+                phase, seconds, 100.0 * seconds / total))
+
+        lines.append("")
+        lines.append("{:<36} {:>10}".format("slowest files", "seconds"))
+        for seconds, path in self.slowest(top):
+            lines.append("{:<36} {:>10.4f}".format(path, seconds))
+
+        if self._matcher:
+            lines.append("")
+            lines.append("{:<36} {:>10} {:>10}".format(
+                "pattern", "tried", "matched"))
+            for name, (tried, matched) in self._matcher.items():
+                lines.append("{:<36} {:>10} {:>10}".format(
+                    name, tried, matched))
+        return "\n".join(lines) + "\n"
+
+    def write(self, stream, json_path: str = None, top: int = DEFAULT_TOP):
+        """Write the table to `stream` and the JSON to `json_path`."""
+        stream.write(self.table(top))
+        if json_path is not None:
+            with open(json_path, "w") as json_file:
+                json.dump(self.to_json(top), json_file, indent=2)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk cache for the diagnostics of a file.
+
+Every entry is keyed by the hash of the file content, the source form of
+the file, the enabled checks, their configuration and the flint version.
+Entries are written atomically, so several runs can share one cache
+directory. Least recently used entries are evicted once the cache grows
+beyond its size limit. The directory is scanned once per interval or as
+soon as the entries written since the last scan exceed the limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from diagnostics import Diagnostic
+from logical_lines import is_fixed_form
+from version import __version__
+
+# Default size limit of the cache directory in bytes.
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+# Default seconds between two scans of the cache size.
+DEFAULT_EVICT_INTERVAL = 60 * 60
+
+# Temporary files younger than this number of seconds might still be
+# written by another run and are never evicted.
+TMP_MAX_AGE = 60 * 60
+
+# File in the cache directory, whose modification time is the last scan.
+# It contains the size of the cache after that scan.
+_EVICT_STAMP = "evict.stamp"
+
+# File in the cache directory, every written entry appends its size. All
+# runs and processes sharing the directory count their writes in it.
+_WRITTEN_LOG = "written.log"
+
+
+class ResultCache(object):
+    """Map file contents to the diagnostics of the enabled checks."""
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE,
+                 configuration: str = "",
+                 evict_interval: float = DEFAULT_EVICT_INTERVAL):
+        """
+        :directory: str: cache directory, it is created if necessary
+        :max_size: int: size limit of all entries in bytes
+        :configuration: str: further settings and the identity of the
+                        checks, that change their results
+        :evict_interval: float: minimal seconds between two evictions
+        """
+        self._directory = os.path.abspath(directory)
+        self._max_size = max_size
+        self._configuration = configuration
+        self._evict_interval = evict_interval
+        self._log = logging.getLogger(__file__)
+
+    def key(self, content: bytes, checks: list, path: str = ""):
+        """
+        Return the key for the file `content` analysed with `checks`. The
+        `path` decides the source form, identical content in fixed-form
+        and free-form files has different results.
+        """
+        digest = hashlib.sha256()
+        digest.update(__version__.encode())
+        digest.update(b"\0")
+        digest.update(b"fixed" if is_fixed_form(path) else b"free")
+        digest.update(b"\0")
+        digest.update(",".join(checks).encode())
+        digest.update(b"\0")
+        digest.update(self._configuration.encode())
+        digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def get(self, key: str, path: str):
+        """
+        Return the cached diagnostics as list of `Diagnostic` for the file
+        at `path`, or `None` if the key is not cached.
+        """
+        entry = self._entry_path(key)
+        try:
+            with open(entry) as cached:
+                records = json.load(cached)
+            # Mark the entry as recently used.
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+
+        return [Diagnostic(path, *record) for record in records]
+
+    def put(self, key: str, diagnostics: list):
+        """Store the diagnostics of a file under `key`."""
+        entry = self._entry_path(key)
+        records = [[d.line, d.category, d.message, d.rule]
+                   for d in diagnostics]
+
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(
+                suffix=".tmp", dir=os.path.dirname(entry))
+        except OSError as error:
+            # A cache that can not be written is not fatal.
+            self._log.warning("Could not write cache entry: %s" % error)
+            return
+
+        try:
+            with open(handle, 'w') as cached:
+                json.dump(records, cached)
+                size = cached.tell()
+            os.replace(tmp_path, entry)
+        except BaseException as error:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if not isinstance(error, OSError):
+                raise
+            self._log.warning("Could not write cache entry: %s" % error)
+            return
+
+        try:
+            # Short appends are atomic, concurrent writers do not mix
+            # their lines.
+            with open(os.path.join(self._directory, _WRITTEN_LOG),
+                      'a') as written:
+                written.write("{}\n".format(size))
+        except OSError as error:
+            self._log.warning("Could not count cache entry: %s" % error)
+
+    def evict(self):
+        """
+        Remove the least recently used entries beyond the size limit. The
+        cache directory is only scanned, if the last scan is longer ago
+        than the evict interval or the entries written since then might
+        exceed the size limit. Temporary files of running writes are
+        kept.
+        """
+        if not os.path.isdir(self._directory):
+            return
+        now = time.time()
+        stamp = os.path.join(self._directory, _EVICT_STAMP)
+        written_log = os.path.join(self._directory, _WRITTEN_LOG)
+        if now - self._last_scan(stamp) < self._evict_interval and \
+                self._estimated_size(stamp, written_log) <= self._max_size:
+            return
+
+        # Entries written during the scan are counted twice at worst,
+        # that only makes the next scan come earlier.
+        try:
+            os.unlink(written_log)
+        except OSError:
+            pass
+
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self._directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if path in (stamp, written_log):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                if name.endswith(".tmp") and \
+                        now - stat.st_mtime < TMP_MAX_AGE:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Another run might have removed it already.
+                pass
+            total -= size
+
+        try:
+            with open(stamp, 'w') as stamp_file:
+                stamp_file.write(str(total))
+        except OSError as error:
+            self._log.warning("Could not write the evict stamp: %s" % error)
+
+    @staticmethod
+    def _last_scan(stamp: str):
+        """Return the time of the last scan, 0 if there was none."""
+        try:
+            return os.stat(stamp).st_mtime
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _estimated_size(stamp: str, written_log: str):
+        """
+        Return the size of the cache after the last scan plus the size of
+        all entries written since, without scanning the cache. Replaced
+        entries are counted twice.
+        """
+        try:
+            with open(stamp) as stamp_file:
+                size = int(stamp_file.read())
+        except (OSError, ValueError):
+            # Never scanned or by an older version, scan the cache.
+            return float("inf")
+
+        try:
+            with open(written_log) as written:
+                size += sum(int(line) for line in written if line.strip())
+        except FileNotFoundError:
+            # Nothing was written since the last scan.
+            pass
+        except (OSError, ValueError):
+            return float("inf")
+        return size
+
+    def _entry_path(self, key: str):
+        return os.path.join(self._directory, key[:2], key + ".json")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry of the checks and formatters, that imports a rule only when it
+is used.
+
+The built-in rules are described by a manifest of their module, class and
+help text, so listing them imports nothing. Third-party packages add
+rules through the entry point groups `flint.checks` and
+`flint.formatters`, e.g. in their `setup.py`:
+
+    entry_points={"flint.checks": ["my-check = my_package.rules:MyCheck"]}
+
+Importing a rule module registers its patterns with `LINE_MATCHER`. Code
+classified before is classified again on its next use, so all enabled
+rules should be loaded with `RuleRegistry.load` before the first file is
+classified.
+"""
+
+import collections
+import collections.abc
+import importlib
+
+from version import source_digest
+
+# Location and help text of a built-in rule.
+RuleSpec = collections.namedtuple("RuleSpec", ["module", "class_name", "help"])
+
+CHECKS_GROUP = "flint.checks"
+FORMATTERS_GROUP = "flint.formatters"
+
+
+def _entry_points(group: str):
+    """
+    Return the entry points of `group` as dict of name to entry point.
+    Python versions without `importlib.metadata` have no plugins.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        return {}
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        found = entry_points.select(group=group)
+    else:
+        found = entry_points.get(group, ())
+    return {entry_point.name: entry_point for entry_point in found}
+
+
+class RuleRegistry(collections.abc.Mapping):
+    """
+    Mapping of the rule names to their classes, that imports the module
+    of a rule on the first lookup.
+
+    The built-in rules come first and can not be replaced by plugins.
+    Searching the installed plugins is slow, so it is only done if a name
+    is not built in, all rules are iterated or the plugins are listed.
+    """
+
+    def __init__(self, group: str, manifest: dict):
+        """
+        :group: entry point group of the plugins or `None` for no plugins
+        :manifest: ordered dict of the built-in rule names to `RuleSpec`
+        """
+        self._group = group
+        self._manifest = manifest
+        self._plugins = None
+        self._loaded = {}
+
+    def _plugin_entry_points(self):
+        if self._plugins is None:
+            self._plugins = {} if self._group is None else {
+                name: entry_point for name, entry_point
+                in _entry_points(self._group).items()
+                if name not in self._manifest}
+        return self._plugins
+
+    def __getitem__(self, name: str):
+        rule_class = self._loaded.get(name)
+        if rule_class is not None:
+            return rule_class
+
+        spec = self._manifest.get(name)
+        if spec is not None:
+            module = importlib.import_module(spec.module)
+            rule_class = getattr(module, spec.class_name)
+        elif name in self._plugin_entry_points():
+            rule_class = self._plugins[name].load()
+        else:
+            raise KeyError(name)
+
+        self._loaded[name] = rule_class
+        return rule_class
+
+    def __contains__(self, name):
+        return name in self._manifest or name in self._plugin_entry_points()
+
+    def __iter__(self):
+        yield from self._manifest
+        yield from sorted(self._plugin_entry_points())
+
+    def __len__(self):
+        return len(self._manifest) + len(self._plugin_entry_points())
+
+    def builtin_names(self):
+        """Return the names of the built-in rules, without any search."""
+        return list(self._manifest)
+
+    def plugin_names(self):
+        """Return the sorted names of the rules of installed plugins."""
+        return sorted(self._plugin_entry_points())
+
+    def help(self, name: str):
+        """
+        Return the help text of a rule. Built-in rules are not imported
+        for it.
+        """
+        spec = self._manifest.get(name)
+        if spec is not None:
+            return spec.help
+        return self[name].help()
+
+    def identity(self, names: list):
+        """
+        Return a string, that changes if the implementation of any of the
+        rules `names` might change. Built-in rules change with the hash of
+        the flint sources, plugins are identified by their entry point and
+        the version of their distribution.
+        """
+        parts = []
+        for name in names:
+            spec = self._manifest.get(name)
+            if spec is not None:
+                parts.append("{}={}:{}".format(name, spec.module,
+                                               spec.class_name))
+                continue
+            entry_point = self._plugin_entry_points()[name]
+            distribution = getattr(entry_point, "dist", None)
+            parts.append("{}={}@{}".format(
+                name, getattr(entry_point, "value", ""),
+                getattr(distribution, "version", "")))
+        if any(name in self._manifest for name in names):
+            # Built-in rules depend on the shared code of flint as well.
+            parts.append("flint@" + source_digest())
+        return ";".join(parts)
+
+    def load(self, names: list):
+        """
+        Import the rules `names` and return their classes in order. Rules
+        should be loaded before the first file is classified, because their
+        modules register line patterns.
+        """
+        return [self[name] for name in names]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build the tree of program units (module, program, function, subroutine)
+of a fortran file in one pass.
+"""
+
+import re
+
+__regex_unit = re.compile(r'\b(function|subroutine|program|module)\s+(\w*)')
+
+
+class ProgramUnit(object):
+    """
+    Node of the scope tree. The root node has the kind "file" and spans
+    the whole file.
+
+    :kind: "file", "module", "program", "function" or "subroutine"
+    :name: name of the unit, `None` for the root
+    :start: line number (from 1) of the line that opens the unit
+    :end: line number of the line that closes the unit
+    :parent: enclosing unit, `None` for the root
+    :children: list of directly nested units in order
+    """
+
+    __slots__ = ("kind", "name", "start", "end", "parent", "children")
+
+    def __init__(self, kind: str, name: str, start: int, parent=None):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end = -1
+        self.parent = parent
+        self.children = []
+
+    def __repr__(self):
+        return "ProgramUnit({!r}, {!r}, {}, {})".format(
+            self.kind, self.name, self.start, self.end)
+
+    def contains(self, line: int):
+        """Return True if the line number is within this unit."""
+        return self.start <= line <= self.end
+
+    def own_lines(self):
+        """
+        Yield the line numbers of this unit, that are not part of a nested
+        unit.
+        """
+        line = self.start
+        for child in self.children:
+            for own in range(line, child.start):
+                yield own
+            line = child.end + 1
+        for own in range(line, self.end + 1):
+            yield own
+
+    def walk(self):
+        """Yield this unit and all nested units, parents first."""
+        yield self
+        for child in self.children:
+            for unit in child.walk():
+                yield unit
+
+    def walk_post_order(self):
+        """Yield all nested units and this unit, children first."""
+        for child in self.children:
+            for unit in child.walk_post_order():
+                yield unit
+        yield self
+
+    def unit_at(self, line: int):
+        """Return the innermost unit that contains the line number."""
+        unit = self
+        descended = True
+        while descended:
+            descended = False
+            for child in unit.children:
+                if child.contains(line):
+                    unit = child
+                    descended = True
+                    break
+        return unit
+
+
+def build_scope_tree(lines: list, line_info: list):
+    """
+    Build the scope tree from the (case insensitive) lines and their
+    classification.
+
+    Units that are never closed end at the last line. Closing lines
+    without an open unit are ignored.
+
+    :returns: the root `ProgramUnit` of kind "file"
+    """
+    root = ProgramUnit("file", None, 1)
+    root.end = len(lines)
+    current = root
+
+    for (i, (line, info)) in enumerate(zip(lines, line_info), 1):
+        if info.end_block:
+            if current is not root:
+                current.end = i
+                current = current.parent
+            continue
+
+        if info.begin_block:
+            match = __regex_unit.search(line)
+            unit = ProgramUnit(match.group(1), match.group(2), i, current)
+            current.children.append(unit)
+            current = unit
+
+    while current is not root:
+        current.end = root.end
+        current = current.parent
+
+    return root
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident daemon that answers check and format requests on a local unix
+socket.
+
+The daemon keeps `CodeFile` objects with their derived analysis and the
+diagnostics of every set of checks in a bounded LRU cache. Entries are
+validated with the modification time and size of the file and, if those
+changed, the hash of its content.
+
+Protocol: every connection sends one request as a line of JSON and
+receives one response as a line of JSON.
+
+- `{"command": "check", "files": [...], "checks": [...]}` answers with
+  `{"diagnostics": [[path, line, category, message, rule], ...]}`
+- `{"command": "format", "files": [...], "formatters": [...]}` answers
+  with `{"formatted": [path, ...]}`
+- `{"command": "ping"}` and `{"command": "shutdown"}`
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+
+from check.abstract_check import run_checks
+from file_io import CodeFile
+from format.utility import run_formatters
+
+# Default number of files kept in memory.
+DEFAULT_MAX_FILES = 256
+
+
+class _CacheEntry(object):
+    """A cached file with the diagnostics per tuple of enabled checks."""
+
+    __slots__ = ("stat", "digest", "f_file", "results")
+
+    def __init__(self, stat: tuple, digest: str, f_file: CodeFile):
+        self.stat = stat
+        self.digest = digest
+        self.f_file = f_file
+        self.results = {}
+
+
+class FileCache(object):
+    """Bounded LRU cache of `CodeFile` objects and their results."""
+
+    def __init__(self, max_files: int = DEFAULT_MAX_FILES):
+        self._max_files = max_files
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entry(self, path: str):
+        """
+        Return the up to date cache entry for the file at `path`. The file
+        is only read if it is not cached or its stat changed.
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(path)
+
+        if entry is not None and entry.stat == key:
+            self._entries.move_to_end(path)
+            return entry
+
+        with open(path, 'rb') as fortran_file:
+            content = fortran_file.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        if entry is not None and entry.digest == digest:
+            # Touched, but not changed.
+            entry.stat = key
+        else:
+            entry = _CacheEntry(key, digest, CodeFile(path, content))
+
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_files:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, path: str):
+        """Drop the entry of `path`, if it is cached."""
+        self._entries.pop(path, None)
+
+
+class FlintServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server for check and format requests.
+
+    :socket_path: path of the socket to listen on
+    :all_checks: dict of all check names to their classes
+    :all_formatters: dict of all formatter names to their classes
+    :max_files: number of files kept in memory
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, all_checks: dict,
+                 all_formatters: dict, max_files: int = DEFAULT_MAX_FILES):
+        _remove_stale_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+        self.all_checks = all_checks
+        self.all_formatters = all_formatters
+        self.cache = FileCache(max_files)
+        self.stop_requested = False
+        # The cache and the files are not thread safe.
+        self.lock = threading.Lock()
+        self._log = logging.getLogger(__file__)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+    def handle_message(self, message: dict):
+        """Answer one request, see the module documentation."""
+        command = message.get("command")
+        if command == "ping":
+            return {"files": len(self.cache)}
+        if command == "shutdown":
+            # The server stops after the response is sent.
+            self.stop_requested = True
+            return {}
+        if command == "check":
+            return self._check(message.get("files", []),
+                               message.get("checks", []))
+        if command == "format":
+            return self._format(message.get("files", []),
+                                message.get("formatters", []))
+        return {"error": "Unknown command '{}'".format(command)}
+
+    def _check(self, files: list, checks: list):
+        for check in checks:
+            if check not in self.all_checks:
+                return {"error": "Configured check '{}' does not exist!"
+                                 .format(check)}
+
+        records = []
+        with self.lock:
+            for path in files:
+                entry = self.cache.entry(path)
+                key = tuple(checks)
+                if key not in entry.results:
+                    entry.results[key] = self._run_checks(entry.f_file,
+                                                          checks)
+                records.extend(entry.results[key])
+
+        return {"diagnostics": [list(record) for record in records]}
+
+    def _run_checks(self, f_file: CodeFile, checks: list):
+        return list(run_checks(
+            f_file, [self.all_checks[check] for check in checks],
+            names=checks))
+
+    def _format(self, files: list, formatters: list):
+        for formatter in formatters:
+            if formatter not in self.all_formatters:
+                return {"error": "Configured formatter '{}' does not exist!"
+                                 .format(formatter)}
+
+        formatted = []
+        with self.lock:
+            for path in files:
+                f_file = self.cache.entry(path).f_file
+                # Formatting changes the file, it is read again on the
+                # next request.
+                self.cache.invalidate(path)
+                if run_formatters(f_file, [self.all_formatters[formatter]
+                                           for formatter in formatters]):
+                    f_file.write()
+                    formatted.append(path)
+
+        return {"formatted": formatted}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Read one JSON request line and write one JSON response line."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line.strip():
+            # Probing connections do not send a request.
+            return
+
+        try:
+            message = json.loads(line.decode())
+            response = self.server.handle_message(message)
+        except (ValueError, AttributeError) as error:
+            response = {"error": "Invalid request: {}".format(error)}
+        except OSError as error:
+            response = {"error": str(error)}
+        except Exception as error:
+            # A failing rule must not stop the daemon or leave the client
+            # without an answer.
+            self.server._log.exception("Handling the request failed")
+            response = {"error": "Internal error: {!r}".format(error)}
+
+        try:
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+        except OSError:
+            # The client went away.
+            pass
+
+        if self.server.stop_requested:
+            # `shutdown` blocks until `serve_forever` returns.
+            threading.Thread(target=self.server.shutdown).start()
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove a socket file, that no running daemon listens on."""
+    if not os.path.exists(socket_path):
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+
+    raise OSError("A daemon is already listening on '{}'".format(socket_path))
+
+
+def serve(socket_path: str, all_checks: dict, all_formatters: dict,
+          max_files: int = DEFAULT_MAX_FILES):
+    """Run the daemon until it receives a shutdown request."""
+    with FlintServer(socket_path, all_checks, all_formatters,
+                     max_files) as server:
+        server.serve_forever()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent SQLite index of the program units, declarations and statement
+labels of many fortran files.
+
+Every file is stored with the hash of its content. Updating the index
+only analyses files whose hash changed, queries never read the sources.
+"""
+
+import collections
+import hashlib
+import re
+import sqlite3
+
+from file_io import CodeFile
+from line_classification import LINE_CODE
+from tokenizer import comment_start, mask_strings
+from version import __version__
+
+# Symbols of one file, picklable to send them from worker processes.
+#
+# :path: path of the file
+# :digest: hash of the content and the flint version
+# :units: list of `(index, parent index, kind, name, start, end,
+#         implicit none)`, the parent index is `None` for top level units
+# :declarations: list of `(unit index, name, type, line)`
+# :labels: list of `(unit index, label, line, usage)`, the usage is
+#          "definition" or "use"
+FileSymbols = collections.namedtuple(
+    "FileSymbols", ["path", "digest", "units", "declarations", "labels"])
+
+# Default path of the index database.
+DEFAULT_INDEX = ".flint_index.sqlite"
+
+_regex_implicit_none = re.compile(r"\bimplicit\s+none\b")
+_regex_declaration = re.compile(
+    r"^\s*(integer|real|double\s*precision|complex|character|logical|"
+    r"type\s*\(|class\s*\(|procedure\s*\()")
+_regex_name = re.compile(r"\s*(\w+)")
+_regex_label_definition = re.compile(r"^\s*(\d{1,5})\s+[a-z]")
+# Statements that refer to labels, the used label is the last group. The
+# common word boundary comes first, so most positions fail fast.
+_regex_label_use = re.compile(
+    r"\b(?:go\s*to\s*(\d{1,5})\b"
+    r"|do\s+(\d{1,5})\b"
+    r"|(?:err|end|eor|fmt)\s*=\s*(\d{1,5})\b"
+    r"|(?:write|read)\s*\([^,()]*,\s*(\d{1,5})\s*(?=[,)])"
+    r"|(?:print|read)\s+(\d{1,5})\b)")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    digest TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    file INTEGER NOT NULL,
+    parent INTEGER,
+    kind TEXT NOT NULL,
+    name TEXT,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    implicit_none INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS declarations (
+    file INTEGER NOT NULL,
+    unit INTEGER,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    line INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (
+    file INTEGER NOT NULL,
+    unit INTEGER,
+    label INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    usage TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS units_by_file ON units (file);
+CREATE INDEX IF NOT EXISTS units_by_name ON units (name);
+CREATE INDEX IF NOT EXISTS declarations_by_file ON declarations (file);
+CREATE INDEX IF NOT EXISTS declarations_by_name ON declarations (name);
+CREATE INDEX IF NOT EXISTS labels_by_file ON labels (file);
+CREATE INDEX IF NOT EXISTS labels_by_label ON labels (label);
+"""
+
+
+def file_digest(content: bytes):
+    """
+    Return the hash of the file `content`. It changes with the flint
+    version as well, because the extracted symbols might change.
+    """
+    digest = hashlib.sha256()
+    digest.update(__version__.encode())
+    digest.update(b"\0")
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def _split_names(text: str):
+    """
+    Yield the declared names of the entity list after the double colon.
+    Commas within parentheses belong to shapes or initializers.
+    """
+    if "(" not in text and "[" not in text:
+        yield from text.split(",")
+        return
+
+    depth = 0
+    start = 0
+    for column, char in enumerate(text):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            yield text[start:column]
+            start = column + 1
+    yield text[start:]
+
+
+def extract_symbols(path: str, content: bytes):
+    """Return the `FileSymbols` of the fortran file `content`."""
+    code = CodeFile(path, content)
+    lines = code.insensitive_lines()
+    tokens = code.tokens()
+    line_info = code.line_info()
+
+    # Index of the innermost unit for every line number, `None` outside
+    # of all units.
+    unit_of_line = [None] * (len(line_info) + 1)
+    units = []
+    indices = {}
+    for unit in code.scope_tree().walk():
+        if unit.parent is None:
+            continue
+        index = len(units)
+        indices[id(unit)] = index
+        unit_of_line[unit.start:unit.end + 1] = \
+            [index] * (unit.end + 1 - unit.start)
+        units.append([index, indices.get(id(unit.parent)), unit.kind,
+                      unit.name, unit.start, unit.end, False])
+
+    declarations = []
+    labels = []
+    for i, info in enumerate(line_info):
+        if info.kind != LINE_CODE:
+            continue
+        line_number = i + 1
+        unit = unit_of_line[line_number]
+        code_part = mask_strings(lines[i], tokens[i])
+        column = comment_start(tokens[i])
+        if column >= 0:
+            code_part = code_part[:column]
+
+        if unit is not None and _regex_implicit_none.search(code_part):
+            units[unit][6] = True
+
+        definition = _regex_label_definition.match(code_part)
+        if definition:
+            labels.append((unit, int(definition.group(1)), line_number,
+                           "definition"))
+        for use in _regex_label_use.finditer(code_part):
+            labels.append((unit, int(use.group(use.lastindex)), line_number,
+                           "use"))
+
+        if "::" in code_part:
+            type_spec, entities = code_part.split("::", 1)
+            if _regex_declaration.match(type_spec):
+                type_spec = " ".join(type_spec.split())
+                for entity in _split_names(entities):
+                    name = _regex_name.match(entity)
+                    if name:
+                        declarations.append((unit, name.group(1), type_spec,
+                                             line_number))
+
+    return FileSymbols(path, file_digest(content),
+                       [tuple(unit) for unit in units], declarations, labels)
+
+
+class SymbolIndex(object):
+    """The index database, used as context manager."""
+
+    def __init__(self, database: str):
+        """
+        :database: path of the SQLite file, it is created if necessary
+        """
+        self._connection = sqlite3.connect(database)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Commit all changes and close the database."""
+        self._connection.commit()
+        self._connection.close()
+
+    def digests(self):
+        """Return a dict of every indexed path to its hash."""
+        return dict(self._connection.execute(
+            "SELECT path, digest FROM files"))
+
+    def update(self, symbols: FileSymbols):
+        """Replace everything indexed for the file of `symbols`."""
+        cursor = self._connection.cursor()
+        self._delete(cursor, symbols.path)
+        cursor.execute("INSERT INTO files (path, digest) VALUES (?, ?)",
+                       (symbols.path, symbols.digest))
+        file_id = cursor.lastrowid
+
+        # Map the unit indices of the file to the row ids, parents are
+        # listed before their children.
+        unit_ids = {}
+        for index, parent, kind, name, start, end, implicit_none \
+                in symbols.units:
+            cursor.execute(
+                "INSERT INTO units (file, parent, kind, name, start_line, "
+                "end_line, implicit_none) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_id, unit_ids.get(parent), kind, name, start, end,
+                 int(implicit_none)))
+            unit_ids[index] = cursor.lastrowid
+
+        cursor.executemany(
+            "INSERT INTO declarations VALUES (?, ?, ?, ?, ?)",
+            [(file_id, unit_ids.get(unit), name, type_spec, line)
+             for unit, name, type_spec, line in symbols.declarations])
+        cursor.executemany(
+            "INSERT INTO labels VALUES (?, ?, ?, ?, ?)",
+            [(file_id, unit_ids.get(unit), label, line, usage)
+             for unit, label, line, usage in symbols.labels])
+
+    def remove(self, path: str):
+        """Remove everything indexed for the file at `path`."""
+        self._delete(self._connection.cursor(), path)
+
+    def _delete(self, cursor, path: str):
+        row = cursor.execute("SELECT id FROM files WHERE path = ?",
+                             (path,)).fetchone()
+        if row is None:
+            return
+        for table in ("units", "declarations", "labels"):
+            cursor.execute("DELETE FROM {} WHERE file = ?".format(table), row)
+        cursor.execute("DELETE FROM files WHERE id = ?", row)
+
+    def units(self, name: str = None, kind: str = None):
+        """
+        Return the program units as list of `(path, start, end, kind,
+        name)`, optionally only those with the `name` or `kind`.
+        """
+        conditions, parameters = _conditions(
+            [("units.name = ?", name and name.lower()), ("kind = ?", kind)])
+        return self._connection.execute(
+            "SELECT path, start_line, end_line, kind, name FROM units "
+            "JOIN files ON files.id = units.file" + conditions +
+            " ORDER BY path, start_line", parameters).fetchall()
+
+    def missing_implicit_none(self, kind: str = None):
+        """
+        Return the units without `implicit none` as list of `(path,
+        start, end, kind, name)`, optionally only those of the `kind`.
+        """
+        conditions, parameters = _conditions(
+            [("implicit_none = ?", 0), ("kind = ?", kind)])
+        return self._connection.execute(
+            "SELECT path, start_line, end_line, kind, name FROM units "
+            "JOIN files ON files.id = units.file" + conditions +
+            " ORDER BY path, start_line", parameters).fetchall()
+
+    def declarations(self, name: str):
+        """
+        Return the declarations of `name` as list of `(path, line, type,
+        unit name)`.
+        """
+        return self._connection.execute(
+            "SELECT path, line, type, units.name FROM declarations "
+            "JOIN files ON files.id = declarations.file "
+            "LEFT JOIN units ON units.id = declarations.unit "
+            "WHERE declarations.name = ? ORDER BY path, line",
+            (name.lower(),)).fetchall()
+
+    def labels(self, label: int):
+        """
+        Return the definitions and uses of the statement `label` as list
+        of `(path, line, usage, unit name)`.
+        """
+        return self._connection.execute(
+            "SELECT path, line, usage, units.name FROM labels "
+            "JOIN files ON files.id = labels.file "
+            "LEFT JOIN units ON units.id = labels.unit "
+            "WHERE label = ? ORDER BY path, line", (label,)).fetchall()
+
+
+def _conditions(pairs: list):
+    """
+    Return the WHERE clause and its parameters for the `(condition,
+    value)` pairs, whose value is not `None`.
+    """
+    used = [(condition, value) for condition, value in pairs
+            if value is not None]
+    if not used:
+        return "", ()
+    return (" WHERE " + " AND ".join(condition for condition, _ in used),
+            tuple(value for _, value in used))
@@ -4,7 +4,9 @@
 Unit tests for `CodeFile`
 """
 
+import os
 from os.path import dirname, join
+import tempfile
 import unittest
 from file_io import CodeFile
 
@@ -31,8 +33,61 @@ class TestCodeFile(unittest.TestCase):
             "end program test_program\n",
         ]
 
-        self.assertListEqual(original_content, f_file.original_lines())
-        self.assertListEqual(insensitive_content, f_file.insensitive_lines())
+        self.assertListEqual(original_content, list(f_file.original_lines()))
+        self.assertListEqual(insensitive_content, list(f_file.insensitive_lines()))
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = join(directory, "written.f90")
+            with open(path, "w") as fortran_file:
+                fortran_file.write("program p\nend program p\n")
+            os.chmod(path, 0o640)
+
+            f_file = CodeFile(path)
+            f_file.update_lines(["PROGRAM p\n", "END PROGRAM p\n"])
+            f_file.write()
+
+            self.assertListEqual(["written.f90"], os.listdir(directory))
+            self.assertEqual(0o640, os.stat(path).st_mode & 0o777)
+            with open(path) as fortran_file:
+                self.assertEqual("PROGRAM p\nEND PROGRAM p\n",
+                                 fortran_file.read())
+
+    def test_write_symlink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(join(directory, "sources"))
+            target = join(directory, "sources", "target.f90")
+            with open(target, "w") as fortran_file:
+                fortran_file.write("program p\nend program p\n")
+            link = join(directory, "link.f90")
+            os.symlink(target, link)
+
+            f_file = CodeFile(link)
+            f_file.update_lines(["PROGRAM p\n", "END PROGRAM p\n"])
+            f_file.write()
+
+            self.assertTrue(os.path.islink(link))
+            self.assertListEqual(["target.f90"],
+                                 os.listdir(join(directory, "sources")))
+            with open(target) as fortran_file:
+                self.assertEqual("PROGRAM p\nEND PROGRAM p\n",
+                                 fortran_file.read())
+
+    def test_write_latin1(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = join(directory, "legacy.f90")
+            with open(path, "wb") as fortran_file:
+                fortran_file.write("x = 1 ! Größe\n".encode("latin-1"))
+
+            f_file = CodeFile(path)
+            self.assertEqual("x = 1 ! größe\n", f_file.insensitive_lines()[0])
+            f_file.update_lines(["x = 1  ! Größe\n"])
+            f_file.write()
+
+            self.assertEqual("latin-1", f_file.encoding())
+            with open(path, "rb") as fortran_file:
+                self.assertEqual("x = 1  ! Größe\n".encode("latin-1"),
+                                 fortran_file.read())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the buffered diagnostic sinks.
+"""
+
+import io
+import json
+import unittest
+
+import diagnostic_sink
+from diagnostic_sink import JsonLinesSink, SarifSink, TextSink
+from diagnostics import Diagnostic
+
+DIAGNOSTICS = [
+    Diagnostic("/src/a.f90", 3, "warning", "no 'implicit none' found",
+               "implicit-none"),
+    Diagnostic("/src/b c.f90", 7, "note", "label used here"),
+]
+RULES = [("format-label", "Warn for all `FORMAT` labels and its usage."),
+         ("implicit-none", "Warn if 'implicit none' is not used")]
+
+
+class TestDiagnosticSink(unittest.TestCase):
+    """Test the output of every sink."""
+
+    def test_text(self):
+        stream = io.StringIO()
+        with TextSink(stream) as sink:
+            sink.write_all(DIAGNOSTICS)
+            self.assertEqual("", stream.getvalue())
+            self.assertEqual(2, sink.count())
+
+        self.assertEqual(
+            "/src/a.f90: 3: warning: no 'implicit none' found\n"
+            "/src/b c.f90: 7: note: label used here\n", stream.getvalue())
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        with JsonLinesSink(stream) as sink:
+            sink.write_all(DIAGNOSTICS)
+
+        records = [json.loads(line)
+                   for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            {"path": "/src/a.f90", "line": 3, "category": "warning",
+             "message": "no 'implicit none' found", "rule": "implicit-none"},
+            records[0])
+        self.assertEqual(2, len(records))
+
+    def test_sarif(self):
+        for diagnostics in ([], DIAGNOSTICS):
+            stream = io.StringIO()
+            with SarifSink(stream) as sink:
+                sink.write_all(diagnostics)
+
+            log = json.loads(stream.getvalue())
+            self.assertEqual("2.1.0", log["version"])
+            results = log["runs"][0]["results"]
+            self.assertEqual(len(diagnostics), len(results))
+
+        location = results[1]["locations"][0]["physicalLocation"]
+        self.assertEqual("file:///src/b%20c.f90",
+                         location["artifactLocation"]["uri"])
+        self.assertEqual(7, location["region"]["startLine"])
+        self.assertEqual("note", results[1]["level"])
+        self.assertNotIn("ruleId", results[1])
+
+    def test_sarif_rules(self):
+        stream = io.StringIO()
+        with SarifSink(stream, rules=RULES) as sink:
+            sink.write_all(DIAGNOSTICS)
+
+        run = json.loads(stream.getvalue())["runs"][0]
+        self.assertListEqual(
+            [{"id": "format-label", "shortDescription": {
+                "text": "Warn for all `FORMAT` labels and its usage."}},
+             {"id": "implicit-none", "shortDescription": {
+                 "text": "Warn if 'implicit none' is not used"}}],
+            run["tool"]["driver"]["rules"])
+        self.assertEqual("implicit-none", run["results"][0]["ruleId"])
+        self.assertEqual(1, run["results"][0]["ruleIndex"])
+
+    def test_flush_in_chunks(self):
+        flush_size = diagnostic_sink.FLUSH_SIZE
+        diagnostic_sink.FLUSH_SIZE = 1
+        try:
+            stream = io.StringIO()
+            with SarifSink(stream) as sink:
+                sink.write_all(DIAGNOSTICS * 3)
+            results = json.loads(stream.getvalue())["runs"][0]["results"]
+            self.assertEqual(6, len(results))
+        finally:
+            diagnostic_sink.FLUSH_SIZE = flush_size
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,9 @@ Unittests for the diagnostic engine.
 from os.path import dirname, join
 import unittest
 from file_io import CodeFile
-from diagnostics import _check_location, _create_message
+from diagnostics import _check_location, _create_message, \
+                        collect_diagnostics, warning, Diagnostic, \
+                        DiagnosticLimit, sort_diagnostics
 
 
 class TestWarnings(unittest.TestCase):
@@ -27,6 +29,56 @@ class TestWarnings(unittest.TestCase):
                          _create_message(self.f_file, 2, "note",
                                          "defining variable here"))
 
+    def test_collect_diagnostics(self):
+        with collect_diagnostics() as diagnostics:
+            warning(self.f_file, 2, "defining variable here")
+
+        self.assertListEqual([
+            Diagnostic(self.f_file.path(), 2, "warning",
+                       "defining variable here")
+        ], diagnostics)
+
+
+class TestDiagnosticLimit(unittest.TestCase):
+    """Test filtering, deduplication and limits of diagnostics."""
+
+    def setUp(self):
+        self.per_file = [
+            [Diagnostic("b.f90", 5, "warning", "w"),
+             Diagnostic("b.f90", 2, "note", "n"),
+             Diagnostic("b.f90", 5, "warning", "w")],
+            [],
+            [Diagnostic("a.f90", 1, "error", "e")],
+        ]
+
+    def test_severity_and_duplicates(self):
+        limit = DiagnosticLimit("warning")
+        self.assertListEqual([Diagnostic("b.f90", 5, "warning", "w"),
+                              Diagnostic("a.f90", 1, "error", "e")],
+                             list(limit.filter(self.per_file)))
+        self.assertFalse(limit.stopped())
+
+    def test_max_diagnostics(self):
+        limit = DiagnosticLimit(max_diagnostics=2)
+        self.assertEqual(2, len(list(limit.filter(self.per_file))))
+        self.assertTrue(limit.stopped())
+
+        limit = DiagnosticLimit(max_diagnostics=3)
+        self.assertEqual(3, len(list(limit.filter(self.per_file))))
+        self.assertFalse(limit.stopped())
+
+    def test_fail_fast(self):
+        limit = DiagnosticLimit(fail_fast=True)
+        self.assertEqual(2, len(list(limit.filter(self.per_file))))
+        self.assertTrue(limit.stopped())
+
+    def test_sort(self):
+        diagnostics = [d for file in self.per_file for d in file]
+        self.assertListEqual([("a.f90", 1), ("b.f90", 2), ("b.f90", 5),
+                              ("b.f90", 5)],
+                             [(d.path, d.line)
+                              for d in sort_diagnostics(diagnostics)])
+
 
 if __name__ == "__main__":
     unittest.main()
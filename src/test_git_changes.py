@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the git aware incremental mode.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from diagnostics import Diagnostic
+from file_io import FortranCode
+from git_changes import parse_diff, filter_touched, StagedBlobReader,\
+                        changed_ranges, repository_root, unquote_path
+
+DIFF = """diff --git a/src/a.f90 b/src/a.f90
+index 1111111..2222222 100644
+--- a/src/a.f90
++++ b/src/a.f90
+@@ -3 +3 @@ program p
+-  x = 1
++  x = 2
+@@ -10,2 +10,0 @@ contains
+-  y = 1
+-  y = 2
+@@ -20,0 +19,3 @@ contains
++  a = 1
++  b = 2
++  c = 3
+diff --git a/README.md b/README.md
+--- a/README.md
++++ b/README.md
+@@ -1 +1 @@
+-old
++new
+"""
+
+
+class TestGitChanges(unittest.TestCase):
+    """Test the parsing of diffs and the filtering of diagnostics."""
+
+    def test_parse_diff(self):
+        self.assertDictEqual({"/repo/src/a.f90": [(3, 3), (10, 10), (19, 21)]},
+                             parse_diff(DIFF, "/repo"))
+
+    def test_parse_diff_quoted_paths(self):
+        diff = ('+++ "b/t\\303\\251st.f90"\n@@ -1 +1 @@\n'
+                '+++ "b/tab\\there.f90"\n@@ -2 +2 @@\n'
+                '+++ "b/\u00e9\\"quote.f90"\n@@ -3 +3 @@\n')
+        self.assertDictEqual({"/repo/t\u00e9st.f90": [(1, 1)],
+                              "/repo/tab\there.f90": [(2, 2)],
+                              '/repo/\u00e9"quote.f90': [(3, 3)]},
+                             parse_diff(diff, "/repo"))
+        self.assertEqual("b/a.f90", unquote_path("b/a.f90"))
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def test_changed_ranges_non_ascii_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            subprocess.check_call(["git", "init", "-q"], cwd=directory)
+            subprocess.check_call(["git", "config", "core.quotePath", "true"],
+                                  cwd=directory)
+            path = os.path.join(directory, "t\u00e9st.f90")
+            with open(path, "w") as fortran_file:
+                fortran_file.write("program p\nend program p\n")
+            subprocess.check_call(["git", "add", "."], cwd=directory)
+
+            ranges = changed_ranges(staged=True, cwd=directory)
+            self.assertListEqual([(1, 2)], list(ranges.values())[0])
+            self.assertEqual("t\u00e9st.f90",
+                             os.path.basename(list(ranges)[0]))
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def test_changed_ranges_latin1_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            subprocess.check_call(["git", "init", "-q"], cwd=directory)
+            path = os.path.join(directory, "a.f90")
+            with open(path, "wb") as fortran_file:
+                fortran_file.write(b"program p\nend program p\n")
+            subprocess.check_call(["git", "add", "."], cwd=directory)
+            subprocess.check_call(
+                ["git", "-c", "user.name=flint", "-c", "user.email=flint@x",
+                 "commit", "-q", "-m", "initial"], cwd=directory)
+            content = b"program p\n! caf\xe9\nend program p\n"
+            with open(path, "wb") as fortran_file:
+                fortran_file.write(content)
+
+            self.assertListEqual(
+                [(2, 2)], changed_ranges("HEAD", cwd=directory)[
+                    os.path.join(repository_root(directory), "a.f90")])
+
+            subprocess.check_call(["git", "add", "."], cwd=directory)
+            self.assertListEqual(
+                [(2, 2)], list(changed_ranges(staged=True,
+                                              cwd=directory).values())[0])
+            with StagedBlobReader(directory) as reader:
+                self.assertEqual(content, reader.read(path))
+
+    def test_filter_touched(self):
+        f_code = FortranCode([
+            "module m\n", "contains\n", "subroutine s\n", "x = 1\n",
+            "end subroutine s\n", "subroutine t\n", "end subroutine t\n",
+            "end module m\n",
+        ])
+        diagnostics = [Diagnostic("a.f90", line, "warning", "w")
+                       for line in (1, 3, 6)]
+
+        self.assertListEqual(
+            [diagnostics[1]],
+            filter_touched(diagnostics, f_code.scope_tree(), [(4, 4)]))
+        self.assertListEqual(
+            [diagnostics[0], diagnostics[2]],
+            filter_touched(diagnostics, f_code.scope_tree(), [(2, 2), (7, 7)]))
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def test_staged_blob_reader(self):
+        with tempfile.TemporaryDirectory() as directory:
+            subprocess.check_call(["git", "init", "-q"], cwd=directory)
+            path = os.path.join(directory, "a.f90")
+            with open(path, "w") as fortran_file:
+                fortran_file.write("program p\nend program p\n")
+            subprocess.check_call(["git", "add", "a.f90"], cwd=directory)
+            with open(path, "w") as fortran_file:
+                fortran_file.write("unstaged\n")
+
+            with StagedBlobReader(directory) as reader:
+                self.assertEqual(b"program p\nend program p\n",
+                                 reader.read(path))
+                self.assertIsNone(reader.read("missing.f90"))
+                self.assertEqual(b"program p\nend program p\n",
+                                 reader.read("a.f90"))
+
+
+if __name__ == "__main__":
+    unittest.main()
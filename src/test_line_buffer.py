@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the `LineBuffer`.
+"""
+
+import mmap
+import os
+import tempfile
+import unittest
+
+import line_buffer
+from line_buffer import EncodedLineBuffer, LineBuffer
+
+
+class TestLineBuffer(unittest.TestCase):
+    """Test the line offset table and the lowercase view."""
+
+    def test_lines(self):
+        buffer = LineBuffer("Program A\n\n  Integer :: I\nEND")
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(list(buffer.lines()),
+                         ["Program A\n", "\n", "  Integer :: I\n", "END"])
+        self.assertEqual(buffer.line(2), "  Integer :: I\n")
+        self.assertEqual(buffer.lines()[-1], "END")
+        self.assertEqual(buffer.lines()[1:3], ["\n", "  Integer :: I\n"])
+
+    def test_empty(self):
+        buffer = LineBuffer("")
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(list(buffer.lower_lines()), [])
+        self.assertEqual(buffer.text(), "")
+
+    def test_from_lines(self):
+        lines = ["A\n", "B\n"]
+        buffer = LineBuffer.from_lines(lines)
+        self.assertEqual(buffer.text(), "A\nB\n")
+        self.assertEqual(buffer.lines(), lines)
+
+    def test_lower_ascii(self):
+        buffer = LineBuffer("PROGRAM A\nEND PROGRAM A\n")
+        self.assertEqual(list(buffer.lower_lines()),
+                         ["program a\n", "end program a\n"])
+
+    def test_lower_unicode(self):
+        # 'İ' becomes two characters when lowercased.
+        buffer = LineBuffer("PRINT *, 'İ'\nEND\n")
+        self.assertEqual(buffer.lower_line(1), "end\n")
+        self.assertEqual(buffer.lower_line(0), "print *, 'i̇'\n")
+        self.assertEqual(buffer.line(0), "PRINT *, 'İ'\n")
+
+    def test_index_error(self):
+        with self.assertRaises(IndexError):
+            LineBuffer("a\n").lines()[1]
+
+
+class TestEncodedLineBuffer(unittest.TestCase):
+    """Test decoding lines of bytes on demand."""
+
+    def test_ascii(self):
+        buffer = EncodedLineBuffer(b"PROGRAM A\r\nEND PROGRAM A")
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(list(buffer.lines()),
+                         ["PROGRAM A\n", "END PROGRAM A"])
+        self.assertEqual(buffer.lower_line(0), "program a\n")
+
+    def test_utf8(self):
+        buffer = EncodedLineBuffer("x = 1\n! Größe\n".encode("utf-8"))
+        self.assertEqual(buffer.line(1), "! Größe\n")
+        self.assertEqual(buffer.encoding(), "utf-8")
+
+    def test_latin1_fallback(self):
+        data = "x = 1\n! Größe\n".encode("latin-1")
+        buffer = EncodedLineBuffer(data)
+        self.assertEqual(buffer.line(0), "x = 1\n")
+        self.assertEqual(buffer.line(1), "! Größe\n")
+        self.assertEqual(buffer.encoding(), "latin-1")
+        self.assertEqual(buffer.text().encode("latin-1"), data)
+
+    def test_map_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "a.f90")
+            with open(path, "wb") as fortran_file:
+                fortran_file.write(b"program a\nend program a\n")
+
+            # Small files are read, truncating them does no harm.
+            buffer = EncodedLineBuffer.map_file(path)
+            self.assertIsInstance(buffer._data, bytes)
+            open(path, "wb").close()
+            self.assertEqual(buffer.line(1), "end program a\n")
+
+            open(path, "wb").close()
+            self.assertEqual(len(EncodedLineBuffer.map_file(path)), 0)
+
+    def test_mapping_closed(self):
+        min_size = line_buffer.MMAP_MIN_SIZE
+        line_buffer.MMAP_MIN_SIZE = 1
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "a.f90")
+                with open(path, "wb") as fortran_file:
+                    fortran_file.write(b"program a\nend program a\n")
+
+                buffer = EncodedLineBuffer.map_file(path)
+                mapping = buffer._data
+                self.assertIsInstance(mapping, mmap.mmap)
+                self.assertEqual(buffer.line(0), "program a\n")
+                self.assertFalse(mapping.closed)
+
+                # The mapping is closed once all lines are decoded.
+                lines = buffer.lines()
+                self.assertEqual(buffer.text(),
+                                 "program a\nend program a\n")
+                self.assertTrue(mapping.closed)
+                self.assertEqual(lines[1], "end program a\n")
+                self.assertEqual(buffer.encoding(), "utf-8")
+        finally:
+            line_buffer.MMAP_MIN_SIZE = min_size
+
+    def test_close(self):
+        buffer = EncodedLineBuffer(b"x = 1\ny = 2\n")
+        self.assertEqual(buffer.line(0), "x = 1\n")
+        buffer.close()
+        buffer.close()
+        self.assertEqual(buffer.line(0), "x = 1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the shared line classification.
+"""
+
+import re
+import unittest
+
+from common_matcher import LINE_MATCHER
+from file_io import FortranCode
+from line_classification import classify_lines, unterminated_ignore,\
+                                LINE_BLANK, LINE_COMMENT, LINE_CODE
+
+
+class TestLineClassification(unittest.TestCase):
+    """Test that every line is classified as the matchers would do."""
+
+    def test_kinds(self):
+        infos = classify_lines(["\n", "  ! comment\n", "  x = 1 ! set\n"])
+        self.assertListEqual([LINE_BLANK, LINE_COMMENT, LINE_CODE],
+                             [info.kind for info in infos])
+        self.assertListEqual([False, False, True],
+                             [info.trailing_comment for info in infos])
+
+    def test_blocks(self):
+        infos = classify_lines([
+            "module m\n",
+            "  pure function f(x)\n",
+            "  end function f\n",
+            "  ! end function f\n",
+            "end module m\n",
+        ])
+        self.assertListEqual([True, True, False, False, False],
+                             [info.begin_block for info in infos])
+        self.assertListEqual([False, False, True, False, True],
+                             [info.end_block for info in infos])
+
+    def test_ignore_region(self):
+        infos = classify_lines([
+            "integer :: i\n",
+            "  !&<\n",
+            "integer :: j\n",
+            "  !&>\n",
+            "integer :: k !& keep\n",
+        ])
+        self.assertListEqual([False, True, True, True, False],
+                             [info.ignored for info in infos])
+        self.assertTrue(infos[4].ignore_single)
+        self.assertFalse(unterminated_ignore(infos))
+        self.assertTrue(unterminated_ignore(infos[:3]))
+
+    def test_cached_on_code(self):
+        f_code = FortranCode(["program p\n", "end program p\n"])
+        self.assertIs(f_code.line_info(), f_code.line_info())
+
+        infos = f_code.line_info()
+        f_code.update_lines(["! program p\n"])
+        self.assertIsNot(infos, f_code.line_info())
+        self.assertEqual(LINE_COMMENT, f_code.line_info()[0].kind)
+
+    def test_pattern_registered_later(self):
+        # Rules are imported lazily and register their patterns after the
+        # code might have been classified.
+        f_code = FortranCode(["program p\n", "  stale_pattern_test\n",
+                              "end program p\n"])
+        infos = f_code.line_info()
+        tree = f_code.scope_tree()
+        self.assertNotIn("stale-pattern-test", infos[1].matches)
+
+        LINE_MATCHER.register("stale-pattern-test",
+                              re.compile(r"^\s*stale_pattern_test"),
+                              ("stale_pattern_test",))
+        self.assertIn("stale-pattern-test", f_code.line_info()[1].matches)
+        self.assertIsNot(tree, f_code.scope_tree())
+        self.assertIs(f_code.line_info(), f_code.line_info())
+
+    def test_apply_edits(self):
+        f_code = FortranCode([
+            "program p\n",
+            "  integer :: i ! counter\n",
+            "  !&<\n",
+            "end program p\n",
+        ])
+        infos = f_code.line_info()
+        tree = f_code.scope_tree()
+
+        f_code.apply_edits({1: "  integer :: i   ! counter\n",
+                            2: "  !&> ! ignore\n"})
+        self.assertEqual("  integer :: i   ! counter\n",
+                         f_code.original_lines()[1])
+        self.assertIs(infos, f_code.line_info())
+        self.assertIs(tree, f_code.scope_tree())
+        self.assertListEqual(
+            [(i.kind, i.ignored, i.trailing_comment, i.matches)
+             for i in classify_lines(f_code.insensitive_lines())],
+            [(i.kind, i.ignored, i.trailing_comment, i.matches)
+             for i in f_code.line_info()])
+
+        f_code.apply_edits({3: "end program q\n"})
+        self.assertIsNot(tree, f_code.scope_tree())
+
+
+if __name__ == "__main__":
+    unittest.main()
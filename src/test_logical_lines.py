@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for joining continued lines into logical lines.
+"""
+
+import unittest
+
+from file_io import CodeFile, FortranCode
+from logical_lines import is_fixed_form
+
+
+class TestLogicalLines(unittest.TestCase):
+    """Test free-form and fixed-form continuations."""
+
+    def test_free_form(self):
+        code = FortranCode(["program p\n",
+                            "  call s(a, & ! first\n",
+                            "\n",
+                            "    ! comment between\n",
+                            "         & b, 'x&\n",
+                            "&y', &\n",
+                            "    c)\n",
+                            "end program p\n"])
+        logical_lines = code.logical_lines()
+
+        self.assertListEqual(["program p", "  call s(a,  b, 'xx',     c)",
+                              "end program p"],
+                             [logical.text for logical in logical_lines])
+        statement = logical_lines[1]
+        self.assertEqual((2, 7), (statement.start, statement.end))
+        self.assertIs(statement, logical_lines.starting_at(2))
+        self.assertIsNone(logical_lines.starting_at(5))
+        self.assertEqual((2, 2), statement.position(2))
+        self.assertEqual((5, 11), statement.position(13))
+        self.assertEqual((7, 4), statement.position(len(statement.text) - 2))
+
+    def test_fixed_form(self):
+        code = CodeFile("old.f", b"""      PROGRAM P
+C     a comment
+*     another comment
+      X = 1 +
+     &    2 ! trailing comment
+  100 FORMAT(I8)
+      END
+""")
+        self.assertTrue(code.fixed_form())
+        self.assertListEqual(["      program p", "      x = 1 +    2",
+                              "  100 format(i8)", "      end"],
+                             [logical.text
+                              for logical in code.logical_lines()])
+        statement = code.logical_lines()[1]
+        self.assertEqual((4, 5), (statement.start, statement.end))
+        self.assertEqual((5, 10), statement.position(17))
+
+    def test_fixed_form_continuation(self):
+        code = CodeFile("old.f", b"""      CALL S(A, 'X ! Y
+C     comment within the string
+     !Z', B)
+      END
+""")
+        self.assertListEqual(["      call s(a, 'xxxxxx', b)", "      end"],
+                             [logical.text
+                              for logical in code.logical_lines()])
+        self.assertEqual((1, 3), (code.logical_lines()[0].start,
+                                  code.logical_lines()[0].end))
+        self.assertListEqual(["code", "comment", "code", "code"],
+                             [info.kind for info in code.line_info()])
+
+    def test_cache(self):
+        code = FortranCode(["x = 1 + &\n", "    2\n"])
+        logical_lines = code.logical_lines()
+        self.assertIs(logical_lines, code.logical_lines())
+
+        code.apply_edits({1: "    3\n"})
+        self.assertEqual("x = 1 +     3", code.logical_lines()[0].text)
+
+    def test_is_fixed_form(self):
+        self.assertTrue(is_fixed_form("a/b.F"))
+        self.assertTrue(is_fixed_form("b.f77"))
+        self.assertFalse(is_fixed_form("b.f90"))
+        self.assertFalse(FortranCode(["x = 1\n"]).fixed_form())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the language server.
+"""
+
+import io
+import json
+import unittest
+
+from check.abstract_check import AbstractCheck
+from check.check_implicit_none import CheckImplicitNone
+from diagnostics import create_diagnostic
+from format.format_align_colon import FormatAlignColon
+from format.format_trailing_comment import FormatAlignTrailingComment
+from lsp_server import Document, LanguageServer, format_document
+
+URI = "file:///test.f90"
+TEXT = ("subroutine a\n"
+        "end subroutine a\n"
+        "subroutine b\n"
+        "  integer :: i\n"
+        "  real(8), save :: x\n"
+        "  x = 1\n"
+        "end subroutine b\n")
+
+
+class _CountingCheck(CheckImplicitNone):
+    """Count how often a unit is analysed."""
+    runs = 0
+
+    def check(self):
+        _CountingCheck.runs += 1
+        super(_CountingCheck, self).check()
+
+
+class _StopCheck(AbstractCheck):
+    """Report every line with a `stop` statement."""
+
+    def check(self):
+        self.lines = [i + 1 for i, line
+                      in enumerate(self._f_file.insensitive_lines())
+                      if line.strip() == "stop"]
+
+    def diagnostics(self):
+        for line in self.lines:
+            yield create_diagnostic(self._f_file, line, "warning", "stop")
+
+
+def _messages(output: bytes):
+    """Split the framed output of the server into messages."""
+    messages = []
+    while output:
+        header, _, rest = output.partition(b"\r\n\r\n")
+        length = int(header.split(b":")[1])
+        messages.append(json.loads(rest[:length].decode()))
+        output = rest[length:]
+    return messages
+
+
+class TestDocument(unittest.TestCase):
+    """Test incremental changes and the per unit diagnostics."""
+
+    def test_apply_change(self):
+        document = Document(URI, "ab\ncd\n")
+        document.apply_change({
+            "range": {"start": {"line": 0, "character": 1},
+                      "end": {"line": 1, "character": 1}},
+            "text": "X\nY"
+        })
+        self.assertListEqual(["aX\n", "Yd\n"], document.lines)
+
+        document.apply_change({"text": "new\n"})
+        self.assertListEqual(["new\n"], document.lines)
+
+    def test_apply_change_beyond_line_end(self):
+        document = Document(URI, "ab\ncd\n")
+        document.apply_change({
+            "range": {"start": {"line": 0, "character": 5},
+                      "end": {"line": 0, "character": 5}},
+            "text": "X"
+        })
+        self.assertListEqual(["abX\n", "cd\n"], document.lines)
+
+    def test_code_is_updated_incrementally(self):
+        document = Document(URI, TEXT)
+        code = document.code()
+        code.scope_tree()
+        document.apply_change({
+            "range": {"start": {"line": 5, "character": 2},
+                      "end": {"line": 5, "character": 3}},
+            "text": "y"
+        })
+        self.assertIs(code, document.code())
+        self.assertEqual("  y = 1\n", code.original_lines()[5])
+
+        # Adding lines builds the code again.
+        document.apply_change({
+            "range": {"start": {"line": 5, "character": 0},
+                      "end": {"line": 5, "character": 0}},
+            "text": "  z = 1\n"
+        })
+        self.assertIsNot(code, document.code())
+        self.assertEqual(8, document.code().line_count())
+
+    def test_lines_outside_units_are_checked(self):
+        document = Document(URI, "stop\nsubroutine a\nstop\n"
+                                 "end subroutine a\nstop\n")
+        records = document.diagnostics(["stop"], {"stop": _StopCheck})
+        self.assertListEqual([1, 3, 5], [record.line for record in records])
+
+    def test_only_changed_units_are_checked(self):
+        document = Document(URI, TEXT)
+        checks = {"implicit-none": _CountingCheck}
+
+        _CountingCheck.runs = 0
+        records = document.diagnostics(["implicit-none"], checks)
+        self.assertListEqual([1, 3], [record.line for record in records])
+        self.assertEqual(2, _CountingCheck.runs)
+
+        document.apply_change({
+            "range": {"start": {"line": 3, "character": 0},
+                      "end": {"line": 3, "character": 0}},
+            "text": "  implicit none\n"
+        })
+        records = document.diagnostics(["implicit-none"], checks)
+        self.assertListEqual([1], [record.line for record in records])
+        self.assertEqual(3, _CountingCheck.runs)
+
+
+class TestLanguageServer(unittest.TestCase):
+    """Test the handling of LSP messages."""
+
+    def setUp(self):
+        self.output = io.BytesIO()
+        self.server = LanguageServer(
+            {"implicit-none": CheckImplicitNone},
+            {"align-double-colon": FormatAlignColon}, ["implicit-none"],
+            ["align-double-colon"], io.BytesIO(), self.output)
+
+    def test_publish_diagnostics(self):
+        self.server.handle({"method": "textDocument/didOpen",
+                            "params": {"textDocument": {"uri": URI,
+                                                        "text": TEXT}}})
+        notification = _messages(self.output.getvalue())[-1]
+        self.assertEqual("textDocument/publishDiagnostics",
+                         notification["method"])
+        self.assertListEqual(
+            [0, 2], [d["range"]["start"]["line"]
+                     for d in notification["params"]["diagnostics"]])
+
+    def test_range_formatting(self):
+        self.server.handle({"method": "textDocument/didOpen",
+                            "params": {"textDocument": {"uri": URI,
+                                                        "text": TEXT}}})
+        self.server.handle({
+            "id": 1, "method": "textDocument/rangeFormatting",
+            "params": {"textDocument": {"uri": URI},
+                       "range": {"start": {"line": 3, "character": 0},
+                                 "end": {"line": 5, "character": 0}}}
+        })
+        response = _messages(self.output.getvalue())[-1]
+        self.assertEqual(1, response["id"])
+        self.assertListEqual(
+            [{"range": {"start": {"line": 3, "character": 0},
+                        "end": {"line": 4, "character": 0}},
+              "newText": "  integer       :: i\n"}], response["result"])
+
+    def test_range_formatting_in_ignored_region(self):
+        text = (" !&<\n"
+                " integer :: i\n"
+                " real(8) :: x\n"
+                " !&>\n")
+        self.server.handle({"method": "textDocument/didOpen",
+                            "params": {"textDocument": {"uri": URI,
+                                                        "text": text}}})
+        self.server.handle({"id": 1, "method": "textDocument/formatting",
+                            "params": {"textDocument": {"uri": URI}}})
+        self.server.handle({
+            "id": 2, "method": "textDocument/rangeFormatting",
+            "params": {"textDocument": {"uri": URI},
+                       "range": {"start": {"line": 1, "character": 0},
+                                 "end": {"line": 3, "character": 0}}}
+        })
+        responses = _messages(self.output.getvalue())[-2:]
+        self.assertListEqual([[], []],
+                             [response["result"] for response in responses])
+
+    def test_diagnostic_range_utf16(self):
+        text = "program p ! \U0001F600\nend program p\n"
+        self.server.handle({"method": "textDocument/didOpen",
+                            "params": {"textDocument": {"uri": URI,
+                                                        "text": text}}})
+        diagnostic = _messages(
+            self.output.getvalue())[-1]["params"]["diagnostics"][0]
+        self.assertEqual(14, diagnostic["range"]["end"]["character"])
+
+    def test_malformed_messages(self):
+        def frame(body: bytes, length=None):
+            length = len(body) if length is None else length
+            return "Content-Length: {}\r\n\r\n".format(length).encode() + body
+
+        server = LanguageServer(
+            {}, {}, [], [], io.BytesIO(
+                frame(b'{"id": 1, "method":') +
+                frame(b"", "many") +
+                frame(b"[1, 2]") +
+                frame(b'{"id": 2, "method": "shutdown"}') +
+                frame(b'{"method": "exit"}')), self.output)
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(0, server.run())
+        responses = _messages(self.output.getvalue())
+        self.assertListEqual(
+            [-32700, -32700, -32600],
+            [response["error"]["code"] for response in responses[:3]])
+        self.assertListEqual([(None, None), (2, None)],
+                             [(response["id"], response.get("result"))
+                              for response in responses[2:]])
+
+    def test_fixed_form_document(self):
+        uri = "file:///old.f"
+        text = ("c     subroutine helper is not defined here\n"
+                "      program p\n"
+                "      x = 1 ! one\n"
+                "C     a comment line\n"
+                "      end program p\n")
+        self.server.handle({"method": "textDocument/didOpen",
+                            "params": {"textDocument": {"uri": uri,
+                                                        "text": text}}})
+        notification = _messages(self.output.getvalue())[-1]
+        self.assertListEqual(
+            [1], [d["range"]["start"]["line"]
+                  for d in notification["params"]["diagnostics"]])
+
+        self.assertDictEqual({}, format_document(
+            uri, text.splitlines(True), ["align-trailing-comment"],
+            {"align-trailing-comment": FormatAlignTrailingComment}))
+
+    def test_unknown_request(self):
+        self.server.handle({"id": 7, "method": "workspace/unknown"})
+        response = _messages(self.output.getvalue())[-1]
+        self.assertEqual(7, response["id"])
+        self.assertIn("error", response)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the combined matcher engine.
+"""
+
+import re
+import unittest
+
+from common_matcher import LINE_MATCHER, match_begin_block, match_end_block,\
+                           match_blank_line, match_commented_line,\
+                           match_ignore_single, match_ignore_start,\
+                           match_ignore_end
+from matcher_engine import MatcherEngine
+
+
+class TestMatcherEngine(unittest.TestCase):
+    """Test that the engine reports exactly the matching patterns."""
+
+    def setUp(self):
+        self.engine = MatcherEngine()
+        self.engine.register("comment", re.compile(r'^\s*!'), ("!",))
+        self.engine.register("ignore", re.compile(r'^\s*!&<'), ("!&<",))
+        self.engine.register("use", re.compile(r'^\s*use\s+'), ("use",))
+        self.engine.register("blank", re.compile(r'^\s*$'))
+
+    def test_match(self):
+        self.assertEqual(frozenset(["blank"]), self.engine.match("  \n"))
+        self.assertEqual(frozenset(), self.engine.match("x = 1\n"))
+        self.assertEqual(frozenset(["use"]), self.engine.match(" use m\n"))
+        self.assertEqual(frozenset(["comment"]), self.engine.match(" ! use\n"))
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(
+            frozenset(["comment", "ignore"]), self.engine.match(" !&<\n"))
+
+    def test_statistics(self):
+        self.assertDictEqual({}, self.engine.take_statistics())
+        self.engine.enable_statistics()
+        self.engine.match(" ! use\n")
+        self.engine.match("  \n")
+
+        self.assertDictEqual({"comment": (1, 1), "use": (1, 0),
+                              "blank": (2, 1)},
+                             self.engine.take_statistics())
+        self.assertDictEqual({}, self.engine.take_statistics())
+
+        self.engine.disable_statistics()
+        self.assertEqual(frozenset(["blank"]), self.engine.match("  \n"))
+        self.assertDictEqual({}, self.engine.take_statistics())
+
+    def test_register_replaces(self):
+        self.engine.register("use", re.compile(r'^\s*use,'), ("use",))
+        self.assertEqual(frozenset(), self.engine.match(" use m\n"))
+        self.assertEqual(frozenset(["use"]), self.engine.match(" use, m\n"))
+
+    def test_generation(self):
+        generation = self.engine.generation()
+        self.engine.match(" use m\n")
+        self.assertEqual(generation, self.engine.generation())
+        self.engine.register("use", re.compile(r'^\s*use,'), ("use",))
+        self.assertNotEqual(generation, self.engine.generation())
+
+    def test_common_matchers_agree(self):
+        matchers = {
+            "begin-block": match_begin_block,
+            "end-block": match_end_block,
+            "blank-line": match_blank_line,
+            "comment-line": match_commented_line,
+            "ignore-single": match_ignore_single,
+            "ignore-start": match_ignore_start,
+            "ignore-end": match_ignore_end,
+        }
+        lines = [
+            "  pure function f(x)\n", "end subroutine s\n", " \t\n",
+            "  ! program p\n", "  x = 1 !& keep\n", "  !&<\n", "  !&>\n",
+            "  call modulefunction(x)\n",
+        ]
+        for line in lines:
+            matches = LINE_MATCHER.match(line)
+            for name, matcher in matchers.items():
+                self.assertEqual(matcher(line), name in matches,
+                                 "{} on {!r}".format(name, line))
+
+
+if __name__ == "__main__":
+    unittest.main()
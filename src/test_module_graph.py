@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the module dependency graph.
+"""
+
+import unittest
+
+from module_graph import ModuleGraph, scan_content
+
+FILES = {
+    "a.f90": "module a\n"
+             "  use b\n"
+             "  use, intrinsic :: iso_fortran_env, only: int64\n"
+             "end module a\n",
+    "b.f90": "MODULE B\n"
+             "  USE :: c\n"
+             "END MODULE B\n"
+             "module c\n"
+             "  use b\n"
+             "  interface\n"
+             "    module procedure f\n"
+             "  end interface\n"
+             "contains\n"
+             "  subroutine s()\n"
+             "    use helper\n"
+             "  end subroutine s\n"
+             "endmodule\n",
+    "p.f90": "program p\n"
+             "  use a\n"
+             "  ! use commented\n"
+             "  user = 1; used = 'use x'\n"
+             "end program p\n",
+    "h.f90": "module helper\n"
+             "end module helper\n"
+             "submodule (helper) helper_impl\n"
+             "end submodule helper_impl\n",
+}
+
+
+def _graph():
+    return ModuleGraph([scan_content(path, content)
+                        for path, content in sorted(FILES.items())])
+
+
+class TestModuleGraph(unittest.TestCase):
+    """Test scanning, cycles, dependents and the waves."""
+
+    def test_scan(self):
+        statements = scan_content("b.f90", FILES["b.f90"])
+        self.assertListEqual([("b", 1, None), ("c", 4, None)],
+                             statements.modules)
+        self.assertListEqual([("b", "c", 2), ("c", "b", 5),
+                              ("c", "helper", 11)], statements.uses)
+
+        statements = scan_content("p.f90", FILES["p.f90"])
+        self.assertListEqual([(None, "a", 2)], statements.uses)
+
+    def test_graph(self):
+        graph = _graph()
+        self.assertSetEqual({"b", "iso_fortran_env"}, graph.edges["a"])
+        self.assertSetEqual({"a"}, graph.edges["p.f90"])
+        self.assertSetEqual({"helper"}, graph.edges["helper_impl"])
+        self.assertTrue(graph.is_external("iso_fortran_env"))
+        self.assertListEqual([["b", "c"]], graph.cycles())
+
+    def test_dependents(self):
+        graph = _graph()
+        self.assertSetEqual({"helper_impl", "c", "b", "a", "p.f90"},
+                            graph.dependents("helper"))
+        self.assertSetEqual(set(), graph.dependents("p.f90"))
+
+    def test_waves(self):
+        self.assertListEqual([["h.f90"], ["b.f90"], ["a.f90"], ["p.f90"]],
+                             _graph().waves())
+
+        graph = ModuleGraph([scan_content("x.f90", "module x\nuse y\n"),
+                             scan_content("y.f90", "module y\nuse x\n"),
+                             scan_content("z.f90", "x = 1\n")])
+        self.assertListEqual([["x.f90", "y.f90", "z.f90"]], graph.waves())
+
+    def test_output(self):
+        graph = _graph()
+        data = graph.to_json()
+        self.assertIn({"from": "p.f90", "to": "a"}, data["edges"])
+        self.assertIn({"name": "iso_fortran_env", "path": None,
+                       "kind": "external"}, data["nodes"])
+        self.assertIn('  "b" -> "c" [color="red"];\n', graph.to_dot())
+        self.assertIn("cycle: b -> c -> b\n", graph.to_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
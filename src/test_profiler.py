@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for profiling runs.
+"""
+
+import unittest
+
+from check.abstract_check import run_checks
+from check.check_implicit_none import CheckImplicitNone
+from common_matcher import LINE_MATCHER
+from file_io import CodeFile, FortranCode
+from format.format_align_colon import FormatAlignColon
+from format.format_trailing_comment import FormatAlignTrailingComment
+from format.utility import run_formatters
+from profiler import FileProfile, ProfileReport, profile_preprocessing,\
+                     start_profile
+
+
+class TestProfiler(unittest.TestCase):
+    """Test the collected timings and statistics."""
+
+    def tearDown(self):
+        LINE_MATCHER.disable_statistics()
+
+    def test_check(self):
+        code = CodeFile("p.f90", b"program p\nx = 1\nend program p\n")
+        profile = start_profile("p.f90")
+        profile_preprocessing(profile, code)
+        self.assertEqual(1, len(list(run_checks(code, [CheckImplicitNone],
+                                                profile))))
+        profile.finish()
+
+        self.assertListEqual(
+            ["read", "tokenize", "classify", "scope",
+             "check CheckImplicitNone"],
+            [phase for phase, _ in profile.timings])
+        self.assertEqual((2, 2), profile.matcher["begin-block"])
+        self.assertEqual((3, 0), profile.matcher["blank-line"])
+
+    def test_format(self):
+        lines = ["integer(8) :: a ! x\n", "real :: b ! y\n", "b = 1\n"]
+        profiled = FortranCode(lines)
+        profile = FileProfile("p.f90")
+        edits = run_formatters(
+            profiled, [FormatAlignColon, FormatAlignTrailingComment],
+            profile)
+
+        code = FortranCode(lines)
+        self.assertDictEqual(run_formatters(
+            code, [FormatAlignColon, FormatAlignTrailingComment]), edits)
+        self.assertListEqual(
+            ["format FormatAlignColon", "format FormatAlignTrailingComment",
+             "apply edits"],
+            [phase for phase, _ in profile.timings])
+
+    def test_report(self):
+        report = ProfileReport()
+        for path, seconds in [("a.f90", 1.0), ("b.f90", 3.0)]:
+            profile = FileProfile(path)
+            profile.timings = [("read", seconds), ("check X", seconds)]
+            profile.matcher = {"blank-line": (2, 1)}
+            report.add(profile)
+
+        result = report.to_json(top=1)
+        self.assertEqual(8.0, result["total_seconds"])
+        self.assertListEqual([{"path": "b.f90", "seconds": 6.0}],
+                             result["slowest_files"])
+        self.assertListEqual([{"pattern": "blank-line", "tried": 4,
+                               "matched": 2}], result["matcher"])
+        self.assertIn("check X", report.table())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the persistent result cache.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from diagnostics import Diagnostic
+from result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    """Test storing, loading and evicting cached diagnostics."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key(self):
+        key = self.cache.key(b"program p", ["implicit-none"])
+        self.assertEqual(key, self.cache.key(b"program p", ["implicit-none"]))
+        self.assertNotEqual(key, self.cache.key(b"program q",
+                                                ["implicit-none"]))
+        self.assertNotEqual(key, self.cache.key(b"program p",
+                                                ["format-label"]))
+
+    def test_key_source_form(self):
+        free = self.cache.key(b"c comment", ["implicit-none"], "/a.f90")
+        self.assertEqual(free, self.cache.key(b"c comment",
+                                              ["implicit-none"], "/b.F90"))
+        self.assertNotEqual(free, self.cache.key(b"c comment",
+                                                 ["implicit-none"], "/a.f"))
+
+    def test_key_configuration(self):
+        other = ResultCache(self.directory.name, configuration="plugin@2")
+        self.assertNotEqual(self.cache.key(b"program p", ["plugin"]),
+                            other.key(b"program p", ["plugin"]))
+
+    def test_roundtrip(self):
+        key = self.cache.key(b"program p", ["implicit-none"])
+        self.assertIsNone(self.cache.get(key, "/a.f90"))
+
+        self.cache.put(key, [Diagnostic("/a.f90", 1, "warning", "message",
+                                        "implicit-none")])
+        self.assertListEqual([Diagnostic("/b.f90", 1, "warning", "message",
+                                         "implicit-none")],
+                             self.cache.get(key, "/b.f90"))
+
+        self.cache.put(key, [])
+        self.assertListEqual([], self.cache.get(key, "/a.f90"))
+
+    def test_put_failure_removes_temporary_file(self):
+        key = self.cache.key(b"program p", [])
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertLogs(level="WARNING"):
+                self.cache.put(key, [])
+
+        for _, _, files in os.walk(self.directory.name):
+            self.assertListEqual([], files)
+        self.assertIsNone(self.cache.get(key, "/a.f90"))
+
+    def test_evict_interval(self):
+        key = self.cache.key(b"program p", [])
+        self.cache.put(key, [Diagnostic("/a.f90", 1, "note", "x" * 100)])
+        cache = ResultCache(self.directory.name, 0, evict_interval=3600)
+
+        # The first eviction scans, the next only after the interval.
+        cache.evict()
+        self.assertIsNone(self.cache.get(key, "/a.f90"))
+        self.cache.put(key, [])
+        written_log = os.path.join(self.directory.name, "written.log")
+        self.assertTrue(os.path.exists(written_log))
+        ResultCache(self.directory.name, 1000, evict_interval=3600).evict()
+        self.assertTrue(os.path.exists(written_log))
+        self.assertIsNotNone(self.cache.get(key, "/a.f90"))
+
+    def test_evict_beyond_limit_before_interval(self):
+        keys = [self.cache.key(str(i).encode(), []) for i in range(2)]
+        diagnostics = [Diagnostic("/a.f90", 1, "note", "x" * 100)]
+        self.cache.put(keys[0], diagnostics)
+        entry_size = os.stat(self.cache._entry_path(keys[0])).st_size
+        cache = ResultCache(self.directory.name, entry_size + 10,
+                            evict_interval=3600)
+        cache.evict()
+        self.assertTrue(os.path.exists(self.cache._entry_path(keys[0])))
+        os.utime(self.cache._entry_path(keys[0]), (1000, 1000))
+
+        # The written entries exceed the limit, the cache is scanned
+        # although the interval has not passed.
+        self.cache.put(keys[1], diagnostics)
+        cache.evict()
+        self.assertIsNone(self.cache.get(keys[0], "/a.f90"))
+        self.assertIsNotNone(self.cache.get(keys[1], "/a.f90"))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory.name, "written.log")))
+
+    def test_evict_keeps_fresh_temporary_files(self):
+        key = self.cache.key(b"program p", [])
+        self.cache.put(key, [])
+        entry_directory = os.path.dirname(self.cache._entry_path(key))
+        fresh = os.path.join(entry_directory, "fresh.tmp")
+        stale = os.path.join(entry_directory, "stale.tmp")
+        for path in (fresh, stale):
+            with open(path, "w") as tmp_file:
+                tmp_file.write("[]")
+        os.utime(stale, (1000, 1000))
+
+        ResultCache(self.directory.name, 0).evict()
+
+        self.assertListEqual(["fresh.tmp"], os.listdir(entry_directory))
+
+    def test_evict_least_recently_used(self):
+        keys = [self.cache.key(str(i).encode(), []) for i in range(3)]
+        for age, key in enumerate(keys):
+            self.cache.put(key, [Diagnostic("/a.f90", 1, "note", "x" * 100)])
+            entry = self.cache._entry_path(key)
+            os.utime(entry, (1000 + age, 1000 + age))
+
+        # Using the oldest entry makes the second one the oldest.
+        self.cache.get(keys[0], "/a.f90")
+
+        entry_size = os.stat(self.cache._entry_path(keys[0])).st_size
+        ResultCache(self.directory.name, 2 * entry_size).evict()
+
+        self.assertIsNotNone(self.cache.get(keys[0], "/a.f90"))
+        self.assertIsNone(self.cache.get(keys[1], "/a.f90"))
+        self.assertIsNotNone(self.cache.get(keys[2], "/a.f90"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the lazy rule registry.
+"""
+
+import collections
+import unittest
+
+import rule_registry
+from rule_registry import RuleRegistry, RuleSpec
+from flint import ALL_CHECKS, ALL_FORMATTERS
+from version import source_digest
+
+
+class FakeEntryPoint(object):
+    """Entry point of a plugin, that returns a fixed class."""
+
+    def __init__(self, name, rule_class, version="1.0"):
+        self.name = name
+        self.value = "plugin_package:" + rule_class.__name__
+        self.dist = collections.namedtuple("Distribution", "version")(version)
+        self._rule_class = rule_class
+
+    def load(self):
+        return self._rule_class
+
+
+class PluginCheck(object):
+    """Rule of a plugin."""
+
+    @classmethod
+    def help(cls):
+        return "Plugin check"
+
+
+class TestRuleRegistry(unittest.TestCase):
+    """Test lookup, listing and plugins of the registry."""
+
+    def setUp(self):
+        self.entry_points = rule_registry._entry_points
+        rule_registry._entry_points = lambda group: {
+            "plugin": FakeEntryPoint("plugin", PluginCheck),
+            "builtin": FakeEntryPoint("builtin", PluginCheck),
+        }
+        self.registry = RuleRegistry("group", collections.OrderedDict([
+            ("builtin", RuleSpec("no_such_module", "Rule", "Built in")),
+            ("ordered", RuleSpec("collections", "OrderedDict", "Ordered")),
+        ]))
+
+    def tearDown(self):
+        rule_registry._entry_points = self.entry_points
+
+    def test_lookup(self):
+        self.assertIs(collections.OrderedDict, self.registry["ordered"])
+        self.assertIs(PluginCheck, self.registry["plugin"])
+        self.assertEqual([PluginCheck, collections.OrderedDict],
+                         self.registry.load(["plugin", "ordered"]))
+        with self.assertRaises(KeyError):
+            self.registry["missing"]
+
+    def test_list_without_import(self):
+        self.assertEqual(["builtin", "ordered", "plugin"], list(self.registry))
+        self.assertIn("plugin", self.registry)
+        self.assertNotIn("missing", self.registry)
+        # Built-in rules are described by the manifest, plugins can not
+        # replace them.
+        self.assertEqual("Built in", self.registry.help("builtin"))
+        self.assertEqual("Plugin check", self.registry.help("plugin"))
+        with self.assertRaises(ImportError):
+            self.registry["builtin"]
+
+    def test_builtin_names_do_not_search_plugins(self):
+        def no_search(group):
+            raise AssertionError("plugins searched")
+        rule_registry._entry_points = no_search
+        registry = RuleRegistry("group", self.registry._manifest)
+
+        self.assertEqual(["builtin", "ordered"], registry.builtin_names())
+        self.assertIn("ordered", registry)
+        self.assertEqual("Ordered", registry.help("ordered"))
+        self.assertIs(collections.OrderedDict, registry["ordered"])
+
+    def test_plugin_names(self):
+        self.assertEqual(["plugin"], self.registry.plugin_names())
+
+    def test_identity(self):
+        identity = self.registry.identity(["ordered", "plugin"])
+        self.assertEqual("ordered=collections:OrderedDict;"
+                         "plugin=plugin_package:PluginCheck@1.0;"
+                         "flint@" + source_digest(), identity)
+        self.assertEqual("plugin=plugin_package:PluginCheck@1.0",
+                         self.registry.identity(["plugin"]))
+
+        rule_registry._entry_points = lambda group: {
+            "plugin": FakeEntryPoint("plugin", PluginCheck, "2.0")}
+        registry = RuleRegistry("group", self.registry._manifest)
+        self.assertNotEqual(identity, registry.identity(["ordered", "plugin"]))
+
+    def test_source_digest(self):
+        self.assertRegex(source_digest(), "^[0-9a-f]{64}$")
+        self.assertEqual(source_digest(), source_digest())
+
+    def test_builtin_manifest(self):
+        # The manifest repeats the help texts of the rule classes, so they
+        # can be listed without importing the rules.
+        rule_registry._entry_points = self.entry_points
+        for rules in (ALL_CHECKS, ALL_FORMATTERS):
+            for name in rules.builtin_names():
+                with self.subTest(rule=name):
+                    rule_class = rules[name]
+                    self.assertEqual(rule_class.help(), rules.help(name))
+                    self.assertEqual(rules._manifest[name].class_name,
+                                     rule_class.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
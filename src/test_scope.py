@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the scope tree of program units.
+"""
+
+from os.path import dirname, join
+import unittest
+
+from file_io import CodeFile, FortranCode
+
+
+class TestScopeTree(unittest.TestCase):
+    """Test that the program units are found with their line ranges."""
+
+    def test_nesting(self):
+        f_file = CodeFile(
+            join(dirname(__file__), "../test/check/implicit_none_edge.f90"))
+        root = f_file.scope_tree()
+
+        self.assertEqual("file", root.kind)
+        self.assertListEqual(
+            [("module", "mod_utility", 1, 12),
+             ("subroutine", "locate", 4, 6),
+             ("function", "equal", 7, 11),
+             ("program", "my_program", 14, 16)],
+            [(unit.kind, unit.name, unit.start, unit.end)
+             for unit in root.walk() if unit is not root])
+
+        module = root.children[0]
+        self.assertIs(module, module.children[1].parent)
+        self.assertListEqual([1, 2, 3, 12], list(module.own_lines()))
+        self.assertIs(module.children[1], root.unit_at(9))
+        self.assertIs(root, root.unit_at(13))
+
+    def test_post_order(self):
+        f_code = FortranCode([
+            "module m\n", "contains\n", "subroutine s\n", "end subroutine s\n",
+            "end module m\n",
+        ])
+        self.assertListEqual(
+            ["s", "m", None],
+            [unit.name for unit in f_code.scope_tree().walk_post_order()])
+
+    def test_unbalanced(self):
+        f_code = FortranCode(["end subroutine s\n", "program p\n", "x = 1\n"])
+        program = f_code.scope_tree().children[0]
+        self.assertEqual((2, 3), (program.start, program.end))
+
+
+if __name__ == "__main__":
+    unittest.main()
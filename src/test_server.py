@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the resident daemon and its file cache.
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from check.check_implicit_none import CheckImplicitNone
+from flint_client import request
+from format.format_align_colon import FormatAlignColon
+from server import FileCache, FlintServer
+
+
+class FailingCheck(CheckImplicitNone):
+    """Check, that fails like a broken rule."""
+
+    def check(self):
+        raise AssertionError("broken rule")
+
+
+def _write(path: str, content: str):
+    with open(path, "w") as fortran_file:
+        fortran_file.write(content)
+
+
+class TestFileCache(unittest.TestCase):
+    """Test the validation and the bound of the file cache."""
+
+    def test_lru_and_invalidation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, "{}.f90".format(i))
+                     for i in range(3)]
+            for path in paths:
+                _write(path, "program p\nend program p\n")
+
+            cache = FileCache(max_files=2)
+            first = cache.entry(paths[0])
+            self.assertIs(first, cache.entry(paths[0]))
+
+            # Touching without changes keeps the entry.
+            os.utime(paths[0], (1, 1))
+            self.assertIs(first, cache.entry(paths[0]))
+
+            _write(paths[0], "program q\nend program q\n")
+            self.assertIsNot(first, cache.entry(paths[0]))
+
+            cache.entry(paths[1])
+            cache.entry(paths[2])
+            self.assertEqual(2, len(cache))
+
+
+class TestFlintServer(unittest.TestCase):
+    """Test requests against a running daemon."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "flint.sock")
+        self.server = FlintServer(self.socket_path,
+                                  {"implicit-none": CheckImplicitNone,
+                                   "failing": FailingCheck},
+                                  {"align-double-colon": FormatAlignColon})
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.start()
+
+    def tearDown(self):
+        request(self.socket_path, {"command": "shutdown"})
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_check(self):
+        path = os.path.join(self.directory.name, "a.f90")
+        _write(path, "program p\nx = 1\nend program p\n")
+        message = {"command": "check", "files": [path],
+                   "checks": ["implicit-none"]}
+
+        expected = [[path, 1, "warning", "no 'implicit none' found",
+                     "implicit-none"]]
+        self.assertListEqual(expected,
+                             request(self.socket_path, message)["diagnostics"])
+        self.assertListEqual(expected,
+                             request(self.socket_path, message)["diagnostics"])
+        self.assertEqual(1, request(self.socket_path,
+                                    {"command": "ping"})["files"])
+
+    def test_format(self):
+        changed = os.path.join(self.directory.name, "a.f90")
+        _write(changed, "integer(8) :: a\nreal :: b\nb = 1\n")
+        unchanged = os.path.join(self.directory.name, "b.f90")
+        _write(unchanged, "b = 1\n")
+        os.utime(unchanged, (0, 0))
+
+        message = {"command": "format", "files": [changed, unchanged],
+                   "formatters": ["align-double-colon"]}
+        self.assertListEqual([changed],
+                             request(self.socket_path, message)["formatted"])
+        self.assertEqual(0, os.stat(unchanged).st_mtime)
+        with open(changed) as fortran_file:
+            self.assertEqual("real       :: b\n", fortran_file.readlines()[1])
+
+    def test_errors(self):
+        response = request(self.socket_path, {"command": "check",
+                                              "files": [], "checks": ["x"]})
+        self.assertIn("error", response)
+        self.assertIn("error", request(self.socket_path, {"command": "x"}))
+
+    def test_failing_rule(self):
+        path = os.path.join(self.directory.name, "a.f90")
+        _write(path, "program p\nend program p\n")
+        with self.assertLogs(level="ERROR"):
+            response = request(self.socket_path, {
+                "command": "check", "files": [path], "checks": ["failing"]})
+        self.assertIn("broken rule", response["error"])
+        # The daemon keeps serving.
+        self.assertEqual(1, request(self.socket_path,
+                                    {"command": "ping"})["files"])
+
+
+class TestClient(unittest.TestCase):
+    """Test the handling of broken responses in the client."""
+
+    def _request_with_reply(self, reply: bytes):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "flint.sock")
+            with socket.socket(socket.AF_UNIX,
+                               socket.SOCK_STREAM) as listener:
+                listener.bind(socket_path)
+                listener.listen(1)
+
+                def answer():
+                    connection, _ = listener.accept()
+                    with connection:
+                        connection.makefile("rb").readline()
+                        connection.sendall(reply)
+
+                thread = threading.Thread(target=answer)
+                thread.start()
+                response = request(socket_path, {"command": "ping"})
+                thread.join()
+        return response
+
+    def test_empty_reply(self):
+        self.assertIn("without a response",
+                      self._request_with_reply(b"")["error"])
+
+    def test_invalid_reply(self):
+        self.assertIn("Invalid response",
+                      self._request_with_reply(b"{broken\n")["error"])
+        self.assertIn("Invalid response",
+                      self._request_with_reply(b"[1]\n")["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the persistent symbol index.
+"""
+
+import os
+import tempfile
+import unittest
+
+from symbol_index import SymbolIndex, extract_symbols, file_digest
+
+SOURCE = b"""module m
+  implicit none
+  integer, parameter :: n = 3
+contains
+  subroutine s(x)
+    real(8), dimension(2, n), intent(inout) :: x, y = reshape([1, 2], [2])
+    character(len=8) :: text = 'a :: b'
+    write(*, 100) x
+    if (n > 2) go to 200
+100 format('x = ', 2f8.3)
+200 continue
+  end subroutine s
+end module m
+"""
+
+
+class TestSymbolIndex(unittest.TestCase):
+    """Test the extraction, the incremental update and the queries."""
+
+    def test_extract(self):
+        symbols = extract_symbols("m.f90", SOURCE)
+        self.assertEqual(file_digest(SOURCE), symbols.digest)
+        self.assertListEqual([(0, None, "module", "m", 1, 13, True),
+                              (1, 0, "subroutine", "s", 5, 12, False)],
+                             symbols.units)
+        self.assertListEqual(
+            [(0, "n", "integer, parameter", 3),
+             (1, "x", "real(8), dimension(2, n), intent(inout)", 6),
+             (1, "y", "real(8), dimension(2, n), intent(inout)", 6),
+             (1, "text", "character(len=8)", 7)], symbols.declarations)
+        self.assertListEqual([(1, 100, 8, "use"), (1, 200, 9, "use"),
+                              (1, 100, 10, "definition"),
+                              (1, 200, 11, "definition")], symbols.labels)
+
+    def test_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "index.sqlite")
+            with SymbolIndex(database) as index:
+                index.update(extract_symbols("m.f90", SOURCE))
+                index.update(extract_symbols("p.f90", b"program p\nend\n"))
+
+            with SymbolIndex(database) as index:
+                self.assertDictEqual(
+                    {"m.f90": file_digest(SOURCE),
+                     "p.f90": file_digest(b"program p\nend\n")},
+                    index.digests())
+                self.assertListEqual(
+                    [("m.f90", 5, 12, "subroutine", "s"),
+                     ("p.f90", 1, 2, "program", "p")],
+                    index.missing_implicit_none())
+                self.assertListEqual(
+                    [("p.f90", 1, 2, "program", "p")],
+                    index.missing_implicit_none("program"))
+                self.assertListEqual(
+                    [("m.f90", 8, "use", "s"), ("m.f90", 10, "definition",
+                                                "s")], index.labels(100))
+                self.assertListEqual([("m.f90", 3, "integer, parameter",
+                                       "m")], index.declarations("N"))
+                self.assertListEqual([("m.f90", 1, 13, "module", "m")],
+                                     index.units(kind="module"))
+
+                # Updating a file replaces all of its symbols.
+                index.update(extract_symbols("m.f90", b"module m\nend\n"))
+                self.assertListEqual([], index.labels(100))
+                self.assertListEqual([], index.declarations("n"))
+                index.remove("p.f90")
+                self.assertListEqual(["m.f90"], list(index.digests()))
+
+
+if __name__ == "__main__":
+    unittest.main()
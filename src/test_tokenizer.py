@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the string and comment aware tokenizer.
+"""
+
+import unittest
+
+from tokenizer import tokenize_line, tokenize_lines, retokenize_lines,\
+                      comment_start, mask_strings, Segment, SEGMENT_CODE, SEGMENT_STRING,\
+                      SEGMENT_COMMENT
+
+
+class TestTokenizer(unittest.TestCase):
+    """Test the segmentation of lines."""
+
+    def test_code_and_comment(self):
+        segments, quote = tokenize_line("  x = 1 ! set x\n")
+        self.assertIsNone(quote)
+        self.assertTupleEqual((Segment(SEGMENT_CODE, 0, 8),
+                               Segment(SEGMENT_COMMENT, 8, 15)), segments)
+        self.assertEqual(8, comment_start(segments))
+
+        segments, _ = tokenize_line("\n")
+        self.assertTupleEqual((), segments)
+        self.assertEqual(-1, comment_start(segments))
+
+    def test_exclamation_in_string(self):
+        line = "  print *, \"Hi!\", 'it''s!' ! greet\n"
+        segments, _ = tokenize_line(line)
+        self.assertListEqual([
+            SEGMENT_CODE, SEGMENT_STRING, SEGMENT_CODE, SEGMENT_STRING,
+            SEGMENT_CODE, SEGMENT_COMMENT
+        ], [segment.kind for segment in segments])
+        self.assertEqual(line.index("! greet"), comment_start(segments))
+
+    def test_continued_string(self):
+        tokens = tokenize_lines([
+            "  s = \"first ! &\n",
+            "      & second\" ! comment\n",
+            "  t = 'not continued\n",
+            "  ! comment\n",
+        ])
+        self.assertEqual(-1, comment_start(tokens[0]))
+        self.assertEqual(SEGMENT_STRING, tokens[1][1].kind)
+        self.assertEqual(16, comment_start(tokens[1]))
+        self.assertEqual(-1, comment_start(tokens[2]))
+        self.assertEqual(2, comment_start(tokens[3]))
+
+    def test_fixed_form_comment_lines(self):
+        lines = ["c     subroutine s\n", "*     note\n", "      call s\n",
+                 "      x = 1 ! set\n"]
+        tokens = tokenize_lines(lines, fixed_form=True)
+        self.assertTupleEqual((Segment(SEGMENT_COMMENT, 0, 18),), tokens[0])
+        self.assertEqual(0, comment_start(tokens[1]))
+        self.assertEqual(-1, comment_start(tokens[2]))
+        self.assertEqual(12, comment_start(tokens[3]))
+        # Free-form lines starting with `c` are code.
+        self.assertEqual(-1, comment_start(tokenize_lines(lines)[0]))
+
+    def test_fixed_form_continuation_lines(self):
+        lines = ["      x = 'a ! b\n",
+                 "c     comment within the string\n",
+                 "     !c'  ! comment\n",
+                 "     ! y\n",
+                 "      s = 'open\n",
+                 "      call t\n"]
+        open_quotes = []
+        tokens = tokenize_lines(lines, open_quotes, fixed_form=True)
+        self.assertListEqual(["'", "'", None, None, "'", None], open_quotes)
+        self.assertTupleEqual((Segment(SEGMENT_CODE, 0, 6),
+                               Segment(SEGMENT_STRING, 6, 8),
+                               Segment(SEGMENT_CODE, 8, 10),
+                               Segment(SEGMENT_COMMENT, 10, 19)), tokens[2])
+        self.assertEqual("     !x'  ! comment\n",
+                         mask_strings(lines[2], tokens[2]))
+        # A '!' in column 6 is a continuation mark.
+        self.assertEqual(-1, comment_start(tokens[3]))
+        # Only continuation lines continue a string.
+        self.assertTupleEqual((Segment(SEGMENT_CODE, 0, 12),), tokens[5])
+
+    def test_retokenize(self):
+        lines = [
+            "  s = \"first\"\n",
+            "  x = 1 ! comment\n",
+            "  t = 'a'\n",
+        ]
+        open_quotes = []
+        tokens = tokenize_lines(lines, open_quotes)
+
+        # Only the changed line is tokenized again.
+        lines[1] = "  x = 1    ! comment\n"
+        self.assertEqual([1], retokenize_lines(lines, tokens, open_quotes,
+                                               [1]))
+        self.assertEqual(11, comment_start(tokens[1]))
+
+        # A string continued by the edit changes the next line.
+        lines[0] = "  s = \"first &\n"
+        self.assertEqual([0, 1], retokenize_lines(lines, tokens,
+                                                     open_quotes, [0]))
+        self.assertEqual(tokenize_lines(lines), tokens)
+
+    def test_mask_strings(self):
+        line = "  write(*,*) \"x :: y\" ! z\n"
+        masked = mask_strings(line, tokenize_line(line)[0])
+        self.assertEqual("  write(*,*) \"xxxxxx\" ! z\n", masked)
+        self.assertIs(line, mask_strings(line, ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
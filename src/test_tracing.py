@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for tracing single rules.
+"""
+
+import io
+import json
+import unittest
+
+from check.abstract_check import run_checks
+from check.check_implicit_none import CheckImplicitNone
+from file_io import CodeFile, FortranCode
+from format.format_align_colon import FormatAlignColon
+from format.format_trailing_comment import FormatAlignTrailingComment
+from format.utility import run_formatters
+from tracing import disable_tracing, enable_tracing, tracer
+
+
+class TestTracing(unittest.TestCase):
+    """Test the events of traced rules."""
+
+    def setUp(self):
+        self.stream = io.StringIO()
+
+    def tearDown(self):
+        disable_tracing()
+
+    def events(self):
+        return [json.loads(line) for line in self.stream.getvalue().split("\n")
+                if line]
+
+    def test_disabled(self):
+        code = FortranCode(["integer :: i\n"])
+        self.assertIsNone(tracer(FormatAlignColon(code), code))
+
+        enable_tracing({"align-double-colon": FormatAlignColon}, self.stream)
+        self.assertIsNone(tracer(FormatAlignTrailingComment(code), code))
+
+    def test_block_formatter(self):
+        enable_tracing({"align-double-colon": FormatAlignColon}, self.stream)
+        code = FortranCode(["integer(8) :: a\n", "real :: b\n", "b = 1\n"])
+        run_formatters(code, [FormatAlignColon, FormatAlignTrailingComment])
+
+        events = self.events()
+        self.assertListEqual(["line", "line", "line", "align"],
+                             [event["event"] for event in events])
+        self.assertTrue(all(event["rule"] == "align-double-colon"
+                            for event in events))
+        self.assertListEqual([1, 2], events[2]["closed_block"])
+        self.assertListEqual([2], events[3]["changed"])
+
+    def test_check(self):
+        enable_tracing({"implicit-none": CheckImplicitNone}, self.stream)
+        f_file = CodeFile("p.f90", b"program p\nend program p\n")
+        list(run_checks(f_file, [CheckImplicitNone]))
+
+        self.assertListEqual(
+            [{"rule": "implicit-none", "file": f_file.path(),
+              "event": "unit", "unit": "p", "kind": "program", "line": 1,
+              "implicit_none": False}], self.events())
+
+
+if __name__ == "__main__":
+    unittest.main()
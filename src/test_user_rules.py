@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for reading the declarative user rules.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from user_rules import UserRule, UserRuleError, load_user_rules,\
+                       parse_user_rules
+
+
+class TestUserRules(unittest.TestCase):
+    """Test the defaults and the validation of the configuration."""
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.json")
+            with open(path, "w") as config:
+                json.dump({"rules": [{"name": "no-stop",
+                                      "pattern": r"\bstop\b"}]}, config)
+
+            self.assertEqual(
+                (UserRule("no-stop", r"\bstop\b", "code", "warning",
+                          "line matches rule 'no-stop'"),),
+                load_user_rules(path))
+
+            with self.assertRaises(UserRuleError):
+                load_user_rules(os.path.join(directory, "missing.json"))
+
+    def test_invalid(self):
+        for config in ([], {"rules": {}}, {"rules": [1]},
+                       {"rules": [{"name": "a"}]},
+                       {"rules": [{"name": "a", "pattern": "("}]},
+                       {"rules": [{"name": "a", "pattern": "a",
+                                   "scope": "module"}]},
+                       {"rules": [{"name": "a", "pattern": "a",
+                                   "severity": "fatal"}]},
+                       {"rules": [{"name": "a", "pattern": "a",
+                                   "level": "note"}]},
+                       {"rules": [{"name": "a", "pattern": "a"},
+                                  {"name": "a", "pattern": "b"}]}):
+            with self.assertRaises(UserRuleError):
+                parse_user_rules(config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Split free-form fortran lines into code, string literal and comment
+segments.
+
+The tokenizer runs in linear time over every line. It knows about both
+quote characters, doubled quotes within strings and strings that are
+continued on the next line with `&`. In fixed-form sources a `c`, `C` or
+`*` in the first column makes the whole line a comment, a character in
+column 6 marks a continuation line and strings are continued without `&`.
+"""
+
+import collections
+import re
+
+SEGMENT_CODE = "code"
+SEGMENT_STRING = "string"
+SEGMENT_COMMENT = "comment"
+
+# Half open column range `[start, end)` of a segment within a line.
+Segment = collections.namedtuple("Segment", ["kind", "start", "end"])
+
+__regex_code_stop = re.compile(r'[\'"!]')
+__regex_leading_ampersand = re.compile(r'^\s*&')
+
+# First characters of comment lines in fixed-form sources, besides '!'.
+FIXED_FORM_COMMENTS = "cC*"
+
+# Number of columns of the label and the continuation mark in fixed-form
+# sources.
+FIXED_FORM_MARGIN = 6
+
+
+def is_fixed_continuation(line: str):
+    """
+    Return True if the fixed-form `line` continues the previous statement,
+    any character but a blank or `0` in column 6 marks it. Even a `!`
+    there is a continuation mark and does not start a comment.
+    """
+    return len(line) > 5 and line[5] not in " 0\r\n" and \
+        not line[:5].strip()
+
+
+def tokenize_line(line: str, open_quote: str = None,
+                  fixed_form: bool = False):
+    """
+    Split a single line into segments. The newline is not part of any
+    segment.
+
+    :line: arbitrary line of code
+    :open_quote: quote character of a string, that is continued from the
+                 previous line, or `None`
+    :fixed_form: True if the line is from a fixed-form source
+    :returns: tuple of the tuple of `Segment`s and the quote character of
+              a string that continues on the next line (or `None`)
+    """
+    length = len(line.rstrip("\r\n"))
+    segments = []
+    position = 0
+
+    if fixed_form:
+        if length and line[0] in FIXED_FORM_COMMENTS:
+            # Comment lines within a continued string do not end it.
+            return (Segment(SEGMENT_COMMENT, 0, length),), open_quote
+        if is_fixed_continuation(line):
+            # The continued string resumes after the continuation mark.
+            segments.append(Segment(SEGMENT_CODE, 0, FIXED_FORM_MARGIN))
+            position = FIXED_FORM_MARGIN
+        elif open_quote is not None:
+            # Only continuation lines continue the string. Comment and
+            # blank lines in between do not end it, other lines do.
+            segments, quote = tokenize_line(line, None, True)
+            column = comment_start(segments)
+            if not line[:column if column >= 0 else length].strip():
+                return segments, open_quote
+            return segments, quote
+    elif open_quote is not None:
+        # The continued string might start with an optional '&'.
+        match = __regex_leading_ampersand.match(line, 0, length)
+        if match:
+            segments.append(Segment(SEGMENT_CODE, 0, match.end()))
+            position = match.end()
+
+    quote = open_quote
+    while position < length:
+        if quote is None:
+            match = __regex_code_stop.search(line, position, length)
+            stop = match.start() if match else length
+            if stop > position:
+                segments.append(Segment(SEGMENT_CODE, position, stop))
+            if stop == length:
+                break
+
+            if line[stop] == "!":
+                segments.append(Segment(SEGMENT_COMMENT, stop, length))
+                break
+
+            quote = line[stop]
+            string_start = stop
+            position = stop + 1
+        else:
+            string_start = position
+
+        # Search the closing quote, two quotes are an escaped quote.
+        while True:
+            stop = line.find(quote, position, length)
+            if stop == -1:
+                break
+            if stop + 1 < length and line[stop + 1] == quote:
+                position = stop + 2
+                continue
+            break
+
+        if stop == -1:
+            segments.append(Segment(SEGMENT_STRING, string_start, length))
+            # Only an '&' at the end continues the string on the next line
+            # of free-form sources.
+            continued = fixed_form or \
+                line[string_start:length].rstrip().endswith("&")
+            return tuple(segments), quote if continued else None
+
+        segments.append(Segment(SEGMENT_STRING, string_start, stop + 1))
+        quote = None
+        position = stop + 1
+
+    return tuple(segments), None
+
+
+def tokenize_lines(lines, open_quotes: list = None, fixed_form: bool = False):
+    """
+    Tokenize all `lines` in one pass.
+
+    :open_quotes: if given, the quote character of the string continued
+                  after every line (or `None`) is appended to it
+    :fixed_form: True if the lines are a fixed-form source
+    :returns: list with the tuple of `Segment`s for every line
+    """
+    tokens = []
+    open_quote = None
+    for line in lines:
+        segments, open_quote = tokenize_line(line, open_quote, fixed_form)
+        tokens.append(segments)
+        if open_quotes is not None:
+            open_quotes.append(open_quote)
+    return tokens
+
+
+def retokenize_lines(lines, tokens: list, open_quotes: list, changed,
+                     fixed_form: bool = False):
+    """
+    Tokenize only the `changed` lines again and update `tokens` and
+    `open_quotes` in place. Following lines are tokenized as well, as long
+    as a changed line continues a string differently than before.
+
+    :changed: indices of the changed lines
+    :fixed_form: True if the lines are a fixed-form source
+    :returns: sorted list of the indices of all tokenized lines
+    """
+    tokenized = []
+    next_index = 0
+    for index in sorted(changed):
+        if index < next_index:
+            # Already tokenized as a following line.
+            continue
+        while index < len(lines):
+            open_quote = open_quotes[index - 1] if index > 0 else None
+            segments, open_quote = tokenize_line(lines[index], open_quote,
+                                                 fixed_form)
+            tokens[index] = segments
+            tokenized.append(index)
+            unchanged = open_quotes[index] == open_quote
+            open_quotes[index] = open_quote
+            index += 1
+            if unchanged:
+                break
+        next_index = index
+    return tokenized
+
+
+def comment_start(segments):
+    """Return the column the comment starts at, -1 without comment."""
+    if segments and segments[-1].kind == SEGMENT_COMMENT:
+        return segments[-1].start
+    return -1
+
+
+def has_trailing_comment(line: str, segments):
+    """
+    Return True if the comment of the line follows some code. A comment
+    directly after a backslash is not counted.
+    """
+    column = comment_start(segments)
+    return column > 0 and line[column - 1] != "\\" and \
+           not line[:column].isspace()
+
+
+def mask_strings(line: str, segments):
+    """
+    Return `line` with the content of all string literals replaced, so
+    that line patterns can not match on text within strings.
+    The quotes and the length of the line are kept.
+    """
+    pieces = []
+    last = 0
+    for segment in segments:
+        if segment.kind != SEGMENT_STRING:
+            continue
+        # Keep the quotes and the '&' of a continued string, parts of
+        # continued strings lack one or both quotes.
+        start = segment.start
+        end = segment.end
+        if line[start] in "'\"":
+            start += 1
+        if end > start and line[end - 1] in "'\"&":
+            end -= 1
+        if end == start:
+            continue
+        pieces.append(line[last:start])
+        pieces.append("x" * (end - start))
+        last = end
+
+    if not pieces:
+        return line
+    pieces.append(line[last:])
+    return "".join(pieces)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured tracing of single rules for debugging their decisions.
+
+Tracing is enabled per rule. A rule asks for its `Tracer` once when it
+is created and gets `None` if it is not traced, so its loops contain no
+tracing code at all in that case. Block formatters are traced by
+wrapping their block detection and alignment, see `trace_block_formatter`.
+
+Every event is written as one JSON object per line, by default to
+stderr.
+"""
+
+import json
+import sys
+
+# Maps the traced rule classes to their names.
+_traced = {}
+# Stream the events are written to.
+_stream = None
+
+
+def enable_tracing(rules: dict, stream=None):
+    """
+    Trace the given rules.
+
+    :rules: dict of the rule name to its class
+    :stream: text stream for the events, stderr if not given
+    """
+    global _stream
+    _traced.clear()
+    _traced.update((rule_class, name) for name, rule_class in rules.items())
+    _stream = stream
+
+
+def disable_tracing():
+    """Stop tracing all rules."""
+    enable_tracing({})
+
+
+def tracer(rule, code):
+    """
+    Return the `Tracer` of the `rule` instance for `code` or `None` if the
+    rule is not traced.
+    """
+    if not _traced:
+        return None
+    name = _traced.get(type(rule))
+    if name is None:
+        return None
+    path = code.path() if hasattr(code, "path") else None
+    return Tracer(name, path, _stream or sys.stderr)
+
+
+class Tracer(object):
+    """Write the events of one rule for one file."""
+
+    __slots__ = ("_rule", "_path", "_stream")
+
+    def __init__(self, rule: str, path: str, stream):
+        self._rule = rule
+        self._path = path
+        self._stream = stream
+
+    def event(self, event: str, **fields):
+        """
+        Write an event. Line indices are written as one based line
+        numbers by the callers.
+        """
+        record = {"rule": self._rule, "file": self._path, "event": event}
+        record.update(fields)
+        self._stream.write(json.dumps(record) + "\n")
+
+
+def trace_block_formatter(formatter, trace: Tracer):
+    """
+    Replace `scan_line` and `align_block` of a `BlockFormatter` instance
+    with versions that write the state of the block detection for every
+    line and the lines changed by every alignment.
+    """
+    scan_line = formatter.scan_line
+    align_block = formatter.align_block
+    lines = formatter._formatted_lines
+
+    def traced_scan_line(i, info):
+        block = scan_line(i, info)
+        open_start = formatter.open_block_start()
+        trace.event("line", line=i + 1, kind=info.kind, ignored=info.ignored,
+                    open_block=None if open_start is None else open_start + 1,
+                    closed_block=None if block is None else
+                    [block[0] + 1, block[1]])
+        return block
+
+    def traced_align_block(start, end):
+        before = lines[start:end]
+        align_block(start, end)
+        changed = [start + i + 1 for i, line in enumerate(before)
+                   if lines[start + i] != line]
+        trace.event("align", start=start + 1, end=end, changed=changed)
+
+    formatter.scan_line = traced_scan_line
+    formatter.align_block = traced_align_block
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Declarative line rules of the user, read from a JSON file.
+
+Every rule reports all lines whose text in the rule's scope matches a
+regular expression:
+
+    {"rules": [
+        {"name": "no-stop", "pattern": "\\\\bstop\\\\b", "scope": "unit",
+         "severity": "error", "message": "use error stop"}
+    ]}
+
+The patterns are searched case insensitive. The scopes are
+
+- "code": the code of code lines without strings and comments (default)
+- "unit": like "code", but only within a program unit
+- "comment": the comment of a line, including the `!`
+- "line": the complete line
+
+The rules are reported by the check `user-rules`, that compiles all of
+them into one scan per scope, see `check.check_user_rules`.
+"""
+
+import collections
+import json
+import re
+
+from diagnostics import SEVERITIES
+
+UserRule = collections.namedtuple(
+    "UserRule", ["name", "pattern", "scope", "severity", "message"])
+
+SCOPES = ("code", "unit", "comment", "line")
+
+# The rules the `user-rules` check reports, set for every process.
+_rules = ()
+
+
+class UserRuleError(Exception):
+    """Raised if the user rules are invalid."""
+    pass
+
+
+def parse_user_rules(config: dict):
+    """
+    Validate the parsed JSON configuration.
+
+    :returns: tuple of `UserRule`
+    """
+    if not isinstance(config, dict) or \
+            not isinstance(config.get("rules"), list):
+        raise UserRuleError("expected an object with a list of 'rules'")
+
+    rules = []
+    names = set()
+    for index, entry in enumerate(config["rules"]):
+        if not isinstance(entry, dict):
+            raise UserRuleError("rule {} is not an object".format(index))
+        name = entry.get("name")
+        pattern = entry.get("pattern")
+        if not isinstance(name, str) or not isinstance(pattern, str):
+            raise UserRuleError(
+                "rule {} requires a 'name' and a 'pattern'".format(index))
+        if name in names:
+            raise UserRuleError("rule '{}' is defined twice".format(name))
+        names.add(name)
+
+        unknown = set(entry) - set(UserRule._fields)
+        if unknown:
+            raise UserRuleError("rule '{}' has unknown keys: {}".format(
+                name, ", ".join(sorted(unknown))))
+
+        scope = entry.get("scope", "code")
+        if scope not in SCOPES:
+            raise UserRuleError("rule '{}' has the unknown scope '{}'".format(
+                name, scope))
+        severity = entry.get("severity", "warning")
+        if severity not in SEVERITIES:
+            raise UserRuleError(
+                "rule '{}' has the unknown severity '{}'".format(
+                    name, severity))
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as error:
+            raise UserRuleError("rule '{}' has an invalid pattern: {}".format(
+                name, error))
+
+        message = entry.get("message",
+                            "line matches rule '{}'".format(name))
+        rules.append(UserRule(name, pattern, scope, severity, message))
+    return tuple(rules)
+
+
+def load_user_rules(path: str):
+    """
+    Read and validate the user rules in the JSON file at `path`.
+
+    :returns: tuple of `UserRule`
+    """
+    try:
+        with open(path) as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError) as error:
+        raise UserRuleError("could not read '{}': {}".format(path, error))
+    return parse_user_rules(config)
+
+
+def set_user_rules(rules: tuple):
+    """Set the rules reported by the `user-rules` check."""
+    global _rules
+    _rules = tuple(rules)
+
+
+def user_rules():
+    """Return the rules reported by the `user-rules` check."""
+    return _rules
+
+
+def rules_digest(rules: tuple):
+    """Return a string, that changes with every change of `rules`."""
+    return json.dumps([list(rule) for rule in rules])
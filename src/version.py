@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Version of flint. Cached results of older versions are not reused.
+"""
+
+import hashlib
+import os
+
+__version__ = "0.1.0"
+
+# Hash of the sources, computed on first use.
+_source_digest = None
+
+
+def source_digest():
+    """
+    Return the hash of all flint sources without the tests. It changes
+    with every change of the code, even if the version is not raised.
+    """
+    global _source_digest
+    if _source_digest is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for directory, subdirectories, files in os.walk(root):
+            # Walk in a fixed order, the hash must not depend on it.
+            subdirectories.sort()
+            for name in sorted(files):
+                if not name.endswith(".py") or name.startswith("test_"):
+                    continue
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(b"\0")
+                with open(path, "rb") as source:
+                    digest.update(source.read())
+                digest.update(b"\0")
+        _source_digest = digest.hexdigest()
+    return _source_digest
@@ -0,0 +1,20 @@
+c     this subroutine computes x and writes it
+      subroutine comp(x)
+      implicit none
+      real x
+      x = 1.0
+      write(6,
+     &      100) x
+C     subroutine helper is not defined here
+  100 format(f8.3)
+      end subroutine comp
+*     end subroutine in a comment
+      integer function f()
+      implicit none
+      write(6, 200) 1
+      f = 1
+      end function f
+      program main
+      real y
+      call comp(y)
+      end program main
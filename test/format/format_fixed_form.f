@@ -0,0 +1,8 @@
+      subroutine comp(x)
+      implicit none
+      real x ! the value
+      integer n     ! the count
+C     a comment line
+*     another comment line
+      x = 1.0
+      end subroutine comp